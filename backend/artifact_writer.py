@@ -0,0 +1,178 @@
+"""
+ARTIFACT WRITER — Write-behind image encoding for previews and crops
+=====================================================================
+
+Previews (JPEG q90), figure / table crops (PNG) and column images were
+encoded with cv2.imwrite inside the scan path — the page waited for zlib /
+libjpeg before the next stage could start.
+
+ArtifactWriter encodes on a small thread pool (cv2 releases the GIL while
+encoding) behind a bounded queue:
+
+    path = artifact_writer.write(path, image, kind="crop")
+        → returns the FINAL path at once (extension follows the configured
+          format); the URL can be built and handed out immediately.
+          Blocks only when ARTIFACT_QUEUE_SIZE images are already waiting.
+    artifact_writer.wait([paths])   → blocks until those files are on disk
+    artifact_writer.is_pending(path)
+
+Files appear atomically (temp file + os.replace), so a reader never sees
+a half-written image. The caller must not modify the array after write().
+
+Readers that need a file wait for that file only:
+  - build_report callers  → crops of the items being exported
+  - /recrop               → its source preview
+  - /output/... requests  → the requested file (middleware in main.py)
+  - result cache / OCR pool workers → the files referenced by their result
+
+Formats:
+  previews → jpg | webp | png   (ARTIFACT_PREVIEW_FORMAT)
+  crops    → png | jpg           (ARTIFACT_CROP_FORMAT — python-docx cannot embed WebP)
+  PNG uses ARTIFACT_PNG_COMPRESSION (1 = fast, ~3x faster than cv2's default 3).
+
+Configuration (.env):
+  ARTIFACT_WRITER          = true    # false = encode inline (old behaviour)
+  ARTIFACT_WRITER_THREADS  = 2
+  ARTIFACT_QUEUE_SIZE      = 32
+  ARTIFACT_PREVIEW_FORMAT  = jpg
+  ARTIFACT_CROP_FORMAT     = png
+  ARTIFACT_JPEG_QUALITY    = 90
+  ARTIFACT_WEBP_QUALITY    = 85
+  ARTIFACT_PNG_COMPRESSION = 1
+
+Updated: March 2026
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+import cv2
+
+logger = logging.getLogger("BioManual.ArtifactWriter")
+
+ARTIFACT_WRITER          = os.getenv("ARTIFACT_WRITER", "true").lower() == "true"
+ARTIFACT_WRITER_THREADS  = max(1, int(os.getenv("ARTIFACT_WRITER_THREADS", "2")))
+ARTIFACT_QUEUE_SIZE      = max(1, int(os.getenv("ARTIFACT_QUEUE_SIZE", "32")))
+ARTIFACT_PREVIEW_FORMAT  = os.getenv("ARTIFACT_PREVIEW_FORMAT", "jpg").lower()
+ARTIFACT_CROP_FORMAT     = os.getenv("ARTIFACT_CROP_FORMAT", "png").lower()
+ARTIFACT_JPEG_QUALITY    = int(os.getenv("ARTIFACT_JPEG_QUALITY", "90"))
+ARTIFACT_WEBP_QUALITY    = int(os.getenv("ARTIFACT_WEBP_QUALITY", "85"))
+ARTIFACT_PNG_COMPRESSION = int(os.getenv("ARTIFACT_PNG_COMPRESSION", "1"))
+
+_ALLOWED = {
+    "preview": ("jpg", "webp", "png"),
+    "crop":    ("png", "jpg"),
+}
+
+
+def _format_for(kind: str) -> str:
+    fmt = ARTIFACT_PREVIEW_FORMAT if kind == "preview" else ARTIFACT_CROP_FORMAT
+    allowed = _ALLOWED.get(kind, _ALLOWED["crop"])
+    return fmt if fmt in allowed else allowed[0]
+
+
+def _encode_params(fmt: str) -> list:
+    if fmt == "jpg":
+        return [cv2.IMWRITE_JPEG_QUALITY, ARTIFACT_JPEG_QUALITY]
+    if fmt == "webp":
+        return [cv2.IMWRITE_WEBP_QUALITY, ARTIFACT_WEBP_QUALITY]
+    return [cv2.IMWRITE_PNG_COMPRESSION, ARTIFACT_PNG_COMPRESSION]
+
+
+def artifact_path(path: str, kind: str = "crop") -> str:
+    """`path` with the extension of the configured format for `kind`."""
+    return f"{os.path.splitext(path)[0]}.{_format_for(kind)}"
+
+
+def _encode_to_file(path: str, image, fmt: str):
+    ok, buf = cv2.imencode(f".{fmt}", image, _encode_params(fmt))
+    if not ok:
+        raise IOError(f"encode failed: {os.path.basename(path)}")
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(buf.tobytes())
+    os.replace(tmp, path)
+
+
+class ArtifactWriter:
+
+    def __init__(self, threads: int = ARTIFACT_WRITER_THREADS, queue_size: int = ARTIFACT_QUEUE_SIZE,
+                 enabled: bool = ARTIFACT_WRITER):
+        self.enabled = enabled
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._pending = {}     # abs path → Future
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="artifact") if enabled else None
+        if enabled:
+            logger.info(f"✓ Artifact Writer: {threads} threads, queue {queue_size} "
+                        f"(previews={_format_for('preview')}, crops={_format_for('crop')})")
+
+    def write(self, path: str, image, kind: str = "crop") -> str:
+        """Queue `image` for encoding; returns the final file path immediately."""
+        path = os.path.abspath(artifact_path(path, kind))
+        fmt = _format_for(kind)
+        if not self.enabled:
+            _encode_to_file(path, image, fmt)
+            return path
+
+        self._slots.acquire()           # backpressure: bounded number of images in memory
+        try:
+            future = self._executor.submit(self._run, path, image, fmt)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pending[path] = future
+        future.add_done_callback(lambda f, p=path: self._done(p, f))
+        return path
+
+    def _run(self, path: str, image, fmt: str):
+        try:
+            _encode_to_file(path, image, fmt)
+        except Exception as e:
+            logger.warning(f"⚠️ Artifact write failed: {os.path.basename(path)} ({e})")
+            raise
+        finally:
+            self._slots.release()
+
+    def _done(self, path: str, future):
+        with self._lock:
+            if self._pending.get(path) is future:
+                del self._pending[path]
+
+    def is_pending(self, path: str) -> bool:
+        with self._lock:
+            return os.path.abspath(path) in self._pending
+
+    def wait(self, paths, timeout: float = 60.0) -> bool:
+        """Block until the given files (those still queued) are written. True if all finished."""
+        wanted = {os.path.abspath(p) for p in paths if p}
+        with self._lock:
+            futures = [self._pending[p] for p in wanted if p in self._pending]
+        if not futures:
+            return True
+        done, not_done = wait_futures(futures, timeout=timeout)
+        if not_done:
+            logger.warning(f"⚠️ {len(not_done)} artifact(s) still encoding after {timeout:.0f}s")
+        return not not_done
+
+    def flush(self, timeout: float = 120.0) -> bool:
+        """Wait for everything queued so far."""
+        with self._lock:
+            paths = list(self._pending)
+        return self.wait(paths, timeout)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_artifact_writer() -> ArtifactWriter:
+    """Process-wide writer (API process and each OCR pool worker have their own)."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ArtifactWriter()
+    return _writer
@@ -0,0 +1,99 @@
+"""
+Microbenchmark: column-gap detection on 300 DPI A4 pages (2480 x 3508 px)
+=========================================================================
+
+Compares the old per-pixel Python loop (main.py _split_columns_simple /
+direct_reader extract_pdf_direct before column_detect.py) with the
+shared NumPy run-length implementation, on synthetic 1-, 2- and
+3-column pages. Also checks both return the same gaps.
+
+    python bench_column_gaps.py [repeats]
+
+Updated: March 2026
+"""
+
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from column_detect import find_column_gaps
+
+PAGE_W, PAGE_H = 2480, 3508   # A4 @ 300 DPI
+
+
+def legacy_find_column_gaps(img):
+    """Old implementation (main.py _split_columns_simple), kept here for comparison."""
+    h, w = img.shape[:2]
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    _, binary = cv2.threshold(gray, 200, 255, cv2.THRESH_BINARY)
+    margin_y = int(h * 0.05)
+    roi = binary[margin_y:h - margin_y, :]
+    white_ratio = np.mean(roi == 255, axis=0)
+    kernel_size = max(5, w // 100)
+    kernel = np.ones(kernel_size) / kernel_size
+    white_smooth = np.convolve(white_ratio, kernel, mode='same')
+    is_gap = white_smooth > 0.95
+    min_gap_width = max(15, int(w * 0.015))
+
+    gaps = []
+    in_gap = False
+    gap_start = 0
+    for x in range(w):
+        if is_gap[x] and not in_gap:
+            gap_start = x
+            in_gap = True
+        elif not is_gap[x] and in_gap:
+            gap_width = x - gap_start
+            if gap_width >= min_gap_width:
+                gap_center = gap_start + gap_width // 2
+                if gap_center > w * 0.08 and gap_center < w * 0.92:
+                    gaps.append(gap_center)
+            in_gap = False
+    return gaps
+
+
+def synthetic_page(num_cols: int, seed: int = 0):
+    """White page with `num_cols` blocks of random 'text' lines."""
+    rng = np.random.default_rng(seed)
+    page = np.full((PAGE_H, PAGE_W, 3), 255, np.uint8)
+    margin, gutter = 180, 120
+    col_w = (PAGE_W - 2 * margin - (num_cols - 1) * gutter) // num_cols
+    for c in range(num_cols):
+        x0 = margin + c * (col_w + gutter)
+        for y in range(260, PAGE_H - 260, 48):
+            line_w = int(col_w * rng.uniform(0.6, 1.0))
+            x = x0
+            while x < x0 + line_w:
+                word = int(rng.integers(40, 160))
+                cv2.rectangle(page, (x, y), (min(x + word, x0 + line_w), y + 26), (0, 0, 0), -1)
+                x += word + 22
+    return page
+
+
+def _time(fn, img, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn(img)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"Page {PAGE_W}x{PAGE_H}, best of {repeats} runs\n")
+    print(f"{'layout':<10}{'legacy ms':>12}{'numpy ms':>12}{'speed-up':>10}  gaps")
+    for num_cols in (1, 2, 3):
+        img = synthetic_page(num_cols)
+        old = legacy_find_column_gaps(img)
+        new = find_column_gaps(img)
+        assert old == new, f"mismatch: legacy={old} numpy={new}"
+        t_old = _time(legacy_find_column_gaps, img, repeats)
+        t_new = _time(find_column_gaps, img, repeats)
+        print(f"{num_cols}-col{'':<5}{t_old:>12.2f}{t_new:>12.2f}{t_old / t_new:>9.1f}x  {new}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+BLANK PAGE — Cheap pre-check before layout / OCR
+=================================================
+
+Scanned manuals are full of blank separator pages, "intentionally left
+blank" pages and pages holding only a logo. Each one still went through
+Surya, full-page PaddleOCR, header/footer filtering and correction.
+
+classify_page(img) looks at a ≤ BLANK_THUMB_PX grayscale thumbnail
+(a few ms per page):
+
+  ink        = pixels clearly darker than the paper (90th percentile − BLANK_INK_DELTA)
+  components = connected components of the ink (single-pixel specks ignored)
+
+and returns page['blank'] = {"kind": ..., "ink_ratio", "components", "ink_bbox"}:
+
+  empty    ink_ratio < BLANK_INK_RATIO                       → no layout, no OCR
+  figure   ≤ BLANK_FIGURE_COMPONENTS components and the largest holds
+           ≥ BLANK_FIGURE_SHARE of the ink (logo, stamp, single photo —
+           high share so a figure with a caption still goes through OCR)
+                                                             → one figure element, no layout, no OCR
+  sparse   ≤ BLANK_SPARSE_COMPONENTS components (a title, one line of text,
+           or a heading + drawing + caption)                 → full pipeline; a page whose only
+                                                               text is "intentionally left blank" → empty
+  content  everything else                                   → full pipeline
+
+A border of BLANK_MARGIN on each side is ignored (scanner shadows, punch holes).
+
+Configuration (.env):
+  BLANK_PAGE_CHECK        = true
+  BLANK_THUMB_PX          = 400
+  BLANK_INK_DELTA         = 60
+  BLANK_INK_RATIO         = 0.001
+  BLANK_SPARSE_COMPONENTS = 40
+  BLANK_FIGURE_COMPONENTS = 8
+  BLANK_FIGURE_SHARE      = 0.85
+  BLANK_MARGIN            = 0.03
+
+Updated: March 2026
+"""
+
+import os
+import re
+import time
+
+import cv2
+import numpy as np
+
+BLANK_PAGE_CHECK        = os.getenv("BLANK_PAGE_CHECK", "true").lower() == "true"
+BLANK_THUMB_PX          = int(os.getenv("BLANK_THUMB_PX", "400"))
+BLANK_INK_DELTA         = int(os.getenv("BLANK_INK_DELTA", "60"))
+BLANK_INK_RATIO         = float(os.getenv("BLANK_INK_RATIO", "0.001"))
+BLANK_SPARSE_COMPONENTS = int(os.getenv("BLANK_SPARSE_COMPONENTS", "40"))
+BLANK_FIGURE_COMPONENTS = int(os.getenv("BLANK_FIGURE_COMPONENTS", "8"))
+BLANK_FIGURE_SHARE      = float(os.getenv("BLANK_FIGURE_SHARE", "0.85"))
+BLANK_MARGIN            = float(os.getenv("BLANK_MARGIN", "0.03"))
+
+# Kinds for which Surya and OCR are skipped entirely
+SKIPPED_KINDS = ("empty", "figure")
+
+_LEFT_BLANK = re.compile(
+    r"^[\s\W]*(this\s+page\s+(is\s+)?)?(intentionally\s+left\s+blank|left\s+blank\s+intentionally|"
+    r"(halaman\s+ini\s+)?sengaja\s+dikosongkan|(halaman\s+ini\s+)?sengaja\s+dibiarkan\s+kosong|"
+    r"halaman\s+kosong|blank\s+page)[\s\W]*$",
+    re.IGNORECASE
+)
+
+
+def is_left_blank_text(text: str) -> bool:
+    """True for 'This page intentionally left blank' / 'Halaman ini sengaja dikosongkan' notices."""
+    return bool(text) and bool(_LEFT_BLANK.match(text.strip()))
+
+
+def blank_signature() -> str:
+    """Pre-check settings that change which pages are read ('' when the check is off)."""
+    if not BLANK_PAGE_CHECK:
+        return ""
+    return (f"blank={BLANK_THUMB_PX}/{BLANK_INK_DELTA}/{BLANK_INK_RATIO:g}/{BLANK_SPARSE_COMPONENTS}/"
+            f"{BLANK_FIGURE_COMPONENTS}/{BLANK_FIGURE_SHARE:g}/{BLANK_MARGIN:g}")
+
+
+def classify_page(image) -> dict:
+    """Blank / figure-only / sparse / content verdict for a BGR or grayscale page."""
+    t0 = time.perf_counter()
+    h, w = image.shape[:2]
+    scale = min(1.0, BLANK_THUMB_PX / max(h, w))
+    thumb = image if scale >= 1.0 else cv2.resize(
+        image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA
+    )
+    gray = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY) if thumb.ndim == 3 else thumb
+
+    th, tw = gray.shape
+    my, mx = int(th * BLANK_MARGIN), int(tw * BLANK_MARGIN)
+    roi = gray[my:th - my, mx:tw - mx]
+
+    paper = float(np.percentile(roi, 90))
+    ink = (roi < paper - BLANK_INK_DELTA).astype(np.uint8)
+    n, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    keep = areas >= 2
+    comps = stats[1:][keep]
+    ink_px = int(areas[keep].sum())
+    ink_ratio = ink_px / max(1, roi.size)
+    count = len(comps)
+
+    ink_bbox = None
+    if count:
+        x1 = comps[:, cv2.CC_STAT_LEFT].min()
+        y1 = comps[:, cv2.CC_STAT_TOP].min()
+        x2 = (comps[:, cv2.CC_STAT_LEFT] + comps[:, cv2.CC_STAT_WIDTH]).max()
+        y2 = (comps[:, cv2.CC_STAT_TOP] + comps[:, cv2.CC_STAT_HEIGHT]).max()
+        # thumbnail ROI → full-resolution page coordinates
+        ink_bbox = [int((x1 + mx) / scale), int((y1 + my) / scale),
+                    min(w, int(np.ceil((x2 + mx) / scale))), min(h, int(np.ceil((y2 + my) / scale)))]
+
+    if ink_ratio < BLANK_INK_RATIO or count == 0:
+        kind = "empty"
+    elif count <= BLANK_FIGURE_COMPONENTS and comps[:, cv2.CC_STAT_AREA].max() >= BLANK_FIGURE_SHARE * ink_px:
+        kind = "figure"
+    elif count <= BLANK_SPARSE_COMPONENTS:
+        kind = "sparse"
+    else:
+        kind = "content"
+
+    return {
+        "kind": kind,
+        "ink_ratio": round(ink_ratio, 5),
+        "components": count,
+        "ink_bbox": ink_bbox,
+        "ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
@@ -0,0 +1,158 @@
+"""
+Accuracy check: reduced-precision Surya layout vs fp32 on sample pages
+======================================================================
+
+SURYA_LABEL_MAP turns Surya labels into heading / paragraph / table /
+figure, and the table / figure decisions pick what gets cropped into the
+report. Before switching SURYA_PRECISION (or SURYA_MAX_SIDE) on, run the
+candidate against full precision on real manual pages:
+
+    python check_surya_precision.py samples/ --precision int8
+    python check_surya_precision.py page1.png page2.png --precision bf16 --max-side 1600
+
+For every fp32 region the best-overlapping candidate region (IoU >= --iou)
+is matched; reported per page and overall:
+
+    matched   share of fp32 regions found again
+    type      share of matched regions with the same mapped type
+    tbl/fig   F1 of table and figure regions (type + IoU)
+    ms        Surya time per page, fp32 vs candidate
+
+Exit code 1 when table or figure F1 falls below --min-f1.
+
+Updated: March 2026
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import cv2
+
+from surya_runtime import PRECISIONS, build_layout_predictor, cap_image, layout_context
+from vision_engine import BioVisionHybrid
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp")
+
+
+def _iter_images(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(IMAGE_EXTS):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def _regions(predictor, image, max_side=0):
+    """[(mapped type, bbox)] in image coordinates, plus Surya time in ms."""
+    from PIL import Image
+    small, scale = cap_image(image, max_side)
+    pil = Image.fromarray(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+    t0 = time.perf_counter()
+    with layout_context():
+        pred = predictor([pil], batch_size=1)[0]
+    ms = (time.perf_counter() - t0) * 1000
+    regions = []
+    for item in pred.bboxes:
+        rtype = BioVisionHybrid.SURYA_LABEL_MAP.get(item.label.lower(), "paragraph")
+        if rtype != "_skip":
+            regions.append((rtype, [v / scale for v in item.bbox]))
+    return regions, ms
+
+
+def _iou(a, b):
+    ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _match(reference, candidate, min_iou):
+    """Greedy one-to-one matching by IoU → [(ref type, cand type)]."""
+    pairs = sorted(((_iou(r[1], c[1]), i, j) for i, r in enumerate(reference) for j, c in enumerate(candidate)),
+                   reverse=True)
+    used_r, used_c, matched = set(), set(), []
+    for iou, i, j in pairs:
+        if iou < min_iou:
+            break
+        if i in used_r or j in used_c:
+            continue
+        used_r.add(i)
+        used_c.add(j)
+        matched.append((reference[i][0], candidate[j][0]))
+    return matched
+
+
+def _f1(counts):
+    tp, n_ref, n_cand = counts
+    if n_ref == 0 and n_cand == 0:
+        return 1.0
+    return 2 * tp / (n_ref + n_cand)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("paths", nargs="+", help="page images or directories of page images")
+    parser.add_argument("--precision", choices=PRECISIONS, default="int8")
+    parser.add_argument("--max-side", type=int, default=0, help="SURYA_MAX_SIDE for the candidate (0 = no cap)")
+    parser.add_argument("--iou", type=float, default=0.5)
+    parser.add_argument("--min-f1", type=float, default=0.95)
+    args = parser.parse_args()
+
+    _, reference = build_layout_predictor("fp32")
+    _, candidate = build_layout_predictor(args.precision)
+    label = f"{args.precision}" + (f", max side {args.max_side}" if args.max_side else "")
+
+    totals = {"ref": 0, "matched": 0, "same": 0, "ms_ref": 0.0, "ms_cand": 0.0, "pages": 0}
+    per_type = {"table": [0, 0, 0], "figure": [0, 0, 0]}    # tp, n_ref, n_cand
+    print(f"fp32 vs {label}\n")
+    print(f"{'page':<40}{'regions':>8}{'matched':>9}{'type':>7}{'ms fp32':>9}{'ms cand':>9}")
+    for path in _iter_images(args.paths):
+        image = cv2.imread(path)
+        if image is None:
+            print(f"{os.path.basename(path):<40}  unreadable")
+            continue
+        if totals["pages"] == 0:                             # first call per model warms up kernels
+            _regions(reference, image)
+            _regions(candidate, image, args.max_side)
+        ref, ms_ref = _regions(reference, image)
+        cand, ms_cand = _regions(candidate, image, args.max_side)
+        matched = _match(ref, cand, args.iou)
+        same = sum(1 for r, c in matched if r == c)
+
+        for rtype, counts in per_type.items():
+            counts[0] += sum(1 for r, c in matched if r == c == rtype)
+            counts[1] += sum(1 for t, _ in ref if t == rtype)
+            counts[2] += sum(1 for t, _ in cand if t == rtype)
+        totals["ref"] += len(ref)
+        totals["matched"] += len(matched)
+        totals["same"] += same
+        totals["ms_ref"] += ms_ref
+        totals["ms_cand"] += ms_cand
+        totals["pages"] += 1
+        print(f"{os.path.basename(path)[:39]:<40}{len(ref):>8}{len(matched) / max(1, len(ref)):>9.0%}"
+              f"{same / max(1, len(matched)):>7.0%}{ms_ref:>9.0f}{ms_cand:>9.0f}")
+
+    if totals["pages"] == 0:
+        print("no readable pages")
+        return 2
+
+    f1 = {rtype: _f1(counts) for rtype, counts in per_type.items()}
+    print(f"\n{totals['pages']} pages, {totals['ref']} fp32 regions")
+    print(f"matched {totals['matched'] / max(1, totals['ref']):.1%}, "
+          f"same type {totals['same'] / max(1, totals['matched']):.1%}")
+    print(f"table F1 {f1['table']:.3f}  figure F1 {f1['figure']:.3f}")
+    print(f"Surya {totals['ms_ref'] / totals['pages']:.0f} ms → {totals['ms_cand'] / totals['pages']:.0f} ms per page "
+          f"({totals['ms_ref'] / max(1e-9, totals['ms_cand']):.2f}x)")
+
+    ok = min(f1.values()) >= args.min_f1
+    print("PASS" if ok else f"FAIL: table / figure F1 below {args.min_f1}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
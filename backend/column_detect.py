@@ -0,0 +1,78 @@
+"""
+COLUMN DETECT — Whitespace-gap column detection (shared)
+=========================================================
+
+One implementation of the vertical-whitespace column detector, used by:
+  - main.py        _split_column_views()   (scanned pages, 300 DPI)
+  - direct_reader  extract_pdf_direct()    (text PDFs, 72 DPI render)
+
+Steps:
+  1. grayscale → binary threshold
+  2. white ratio per pixel column (header/footer band ignored) via cv2.reduce
+  3. moving-average smoothing
+  4. is_gap = smoothed ratio > gap_ratio
+  5. run-length encode is_gap with np.diff / np.flatnonzero → gap runs
+     (replaces the per-pixel Python `for x in range(w)` loop)
+  6. keep runs ≥ min_gap_width whose centre is away from the page edges
+
+Only runs that END inside the page count as gaps (same as the old loop,
+which closed a gap only when it met a non-gap pixel).
+
+Benchmark: python bench_column_gaps.py
+
+Updated: March 2026
+"""
+
+import cv2
+import numpy as np
+
+
+def gap_runs(is_gap: np.ndarray):
+    """
+    Contiguous True runs of a 1-D boolean mask.
+    Returns (starts, ends) arrays — ends exclusive; runs touching the right edge are dropped.
+    """
+    mask = np.asarray(is_gap, dtype=np.int8)
+    edges = np.diff(np.concatenate(([0], mask, [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    closed = ends < mask.size
+    return starts[closed], ends[closed]
+
+
+def white_ratio_profile(image, threshold: int = 200, margin_frac: float = 0.05) -> np.ndarray:
+    """Fraction of white pixels per x column (BGR or grayscale image), ignoring top/bottom margin_frac."""
+    h = image.shape[0]
+    margin_y = int(h * margin_frac)
+    roi = image[margin_y:h - margin_y]          # crop first: no grayscale work on the margins
+    if roi.shape[0] == 0:
+        return np.ones(image.shape[1])
+    gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY) if roi.ndim == 3 else roi
+    _, binary = cv2.threshold(gray, threshold, 1, cv2.THRESH_BINARY)
+    # Column sums with cv2.reduce (SIMD) — ~10x faster than np.mean(binary == 255, axis=0)
+    white = cv2.reduce(binary, 0, cv2.REDUCE_SUM, dtype=cv2.CV_32S).ravel()
+    return white / binary.shape[0]
+
+
+def find_column_gaps(image, threshold: int = 200, margin_frac: float = 0.05,
+                     kernel_size: int = None, gap_ratio: float = 0.95,
+                     min_gap_width: int = None, edge_frac: float = 0.08) -> list:
+    """
+    x centres (pixels) of vertical whitespace gaps between text columns.
+
+    kernel_size   : smoothing window (default max(5, w // 100))
+    min_gap_width : narrowest gap kept (default max(15, 1.5% of w))
+    edge_frac     : gaps centred within this fraction of either edge are ignored
+    """
+    w = image.shape[1]
+    white_ratio = white_ratio_profile(image, threshold, margin_frac)
+
+    k = kernel_size or max(5, w // 100)
+    white_smooth = np.convolve(white_ratio, np.ones(k) / k, mode='same')
+
+    starts, ends = gap_runs(white_smooth > gap_ratio)
+    widths = ends - starts
+    min_w = min_gap_width if min_gap_width is not None else max(15, int(w * 0.015))
+    centers = starts + widths // 2
+    keep = (widths >= min_w) & (centers > w * edge_frac) & (centers < w * (1 - edge_frac))
+    return [int(c) for c in centers[keep]]
@@ -17,9 +17,14 @@ import cv2
 import logging
 import numpy as np
 from pathlib import Path
+from column_detect import find_column_gaps
+from spatial_index import BBoxIndex, overlap_ratio
 
 logger = logging.getLogger("BioManual.DirectReader")
 
+# Grid cell for BBoxIndex in PDF points (72 DPI) — a few text lines tall
+PDF_INDEX_CELL = 32
+
 
 # ═══════════════════════════════════════════════════════════════
 # 1. PDF TYPE DETECTION — is it text-based or scanned?
@@ -461,38 +466,14 @@ def extract_pdf_direct(pdf_path: str, lang: str = 'id') -> dict:
                 img_cv = cv2.cvtColor(np.array(render.original), cv2.COLOR_RGB2BGR)
                 h_cv, w_cv = img_cv.shape[:2]
                 
-                # Grayscale + Threshold
-                gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
-                _, binary = cv2.threshold(gray, 220, 255, cv2.THRESH_BINARY)
-                
-                # Vertical projection (percentage of white pixels)
-                margin_y = int(h_cv * 0.1) # Ignore header/footer for column detection
-                roi = binary[margin_y:h_cv-margin_y, :]
-                white_ratio = np.mean(roi == 255, axis=0) # shape (w_cv,)
-                
-                # Smooth
-                kernel = np.ones(max(3, w_cv // 80)) / max(3, w_cv // 80)
-                white_smooth = np.convolve(white_ratio, kernel, mode='same')
-                
-                # Identify gaps (> 95% white)
-                is_gap = white_smooth > 0.95
-                min_gap_w = max(5, int(w_cv * 0.012))
-                
-                gaps = []
-                in_gap = False
-                gs = 0
-                for x in range(w_cv):
-                    if is_gap[x] and not in_gap:
-                        gs = x
-                        in_gap = True
-                    elif not is_gap[x] and in_gap:
-                        gw = x - gs
-                        if gw >= min_gap_w:
-                            gc = gs + gw // 2
-                            # Ignore edges (10% margin)
-                            if w_cv * 0.1 < gc < w_cv * 0.9:
-                                gaps.append(gc * (page.width / w_cv))
-                        in_gap = False
+                # Whitespace gaps (> 95% white) — header/footer band (10%) and edges (10%) ignored
+                gaps_px = find_column_gaps(
+                    img_cv, threshold=220, margin_frac=0.1,
+                    kernel_size=max(3, w_cv // 80),
+                    min_gap_width=max(5, int(w_cv * 0.012)),
+                    edge_frac=0.1,
+                )
+                gaps = [gc * (page.width / w_cv) for gc in gaps_px]
                 
                 if gaps:
                     col_boundaries = sorted([0] + gaps + [page.width])
@@ -560,6 +541,9 @@ def extract_pdf_direct(pdf_path: str, lang: str = 'id') -> dict:
                 })
                 
                 if tables:
+                    # Ids in col_index line up with col_elements positions
+                    col_index = BBoxIndex([e['bbox'] for e in col_elements], cell=PDF_INDEX_CELL)
+                    dropped = set()
                     for t_idx, table_data in enumerate(tables):
                         if not table_data or not any(any(c for c in r if c) for r in table_data): continue
                         
@@ -577,7 +561,9 @@ def extract_pdf_direct(pdf_path: str, lang: str = 'id') -> dict:
                             bbox = [int(cx1), 0, int(cx2), 100]
                         
                         # Filter overlap
-                        col_elements = [e for e in col_elements if not _bbox_overlap(e['bbox'], bbox, threshold=0.5)]
+                        for i in col_index.covered_by(bbox, threshold=0.5):
+                            col_index.remove(i)
+                            dropped.add(i)
                         col_elements.append({
                             "type": "table",
                             "text": table_md or "[TABLE]",
@@ -585,6 +571,8 @@ def extract_pdf_direct(pdf_path: str, lang: str = 'id') -> dict:
                             "bbox": bbox,
                             "table_data": clean_table,
                         })
+                        col_index.insert(bbox)
+                    col_elements = [e for i, e in enumerate(col_elements) if i not in dropped]
 
                 # 3. Extract images in THIS column
                 if hasattr(page, 'images') and page.images:
@@ -625,6 +613,9 @@ def extract_pdf_direct(pdf_path: str, lang: str = 'id') -> dict:
                     "horizontal_strategy": "lines",
                 })
                 
+                # Ids in elem_index line up with elements positions
+                elem_index = BBoxIndex([e['bbox'] for e in elements], cell=PDF_INDEX_CELL)
+                dropped = set()
                 for t_idx, table_data in enumerate(tables):
                     if not table_data or not any(any(cell for cell in row if cell) for row in table_data):
                         continue
@@ -645,10 +636,9 @@ def extract_pdf_direct(pdf_path: str, lang: str = 'id') -> dict:
                         bbox = [0, 0, int(page.width), 100]
                     
                     # Remove paragraph elements that overlap with this table
-                    elements = [
-                        e for e in elements
-                        if not _bbox_overlap(e['bbox'], bbox, threshold=0.5)
-                    ]
+                    for i in elem_index.covered_by(bbox, threshold=0.5):
+                        elem_index.remove(i)
+                        dropped.add(i)
                     
                     elements.append({
                         "type": "table",
@@ -657,6 +647,8 @@ def extract_pdf_direct(pdf_path: str, lang: str = 'id') -> dict:
                         "bbox": bbox,
                         "table_data": clean_table,
                     })
+                    elem_index.insert(bbox)
+                elements = [e for i, e in enumerate(elements) if i not in dropped]
             
             # ── Extract images ──
             if hasattr(page, 'images') and page.images:
@@ -815,16 +807,5 @@ def _finalize_paragraph(para_data: dict, paragraphs: list, page_width: float):
 
 
 def _bbox_overlap(bbox1, bbox2, threshold=0.5) -> bool:
-    """Check if two bboxes overlap significantly."""
-    x1 = max(bbox1[0], bbox2[0])
-    y1 = max(bbox1[1], bbox2[1])
-    x2 = min(bbox1[2], bbox2[2])
-    y2 = min(bbox1[3], bbox2[3])
-    
-    if x2 <= x1 or y2 <= y1:
-        return False
-    
-    overlap_area = (x2 - x1) * (y2 - y1)
-    area1 = max((bbox1[2] - bbox1[0]) * (bbox1[3] - bbox1[1]), 1)
-    
-    return overlap_area / area1 > threshold
+    """Check if two bboxes overlap significantly (share of bbox1 covered by bbox2)."""
+    return overlap_ratio(bbox1, bbox2) > threshold
@@ -0,0 +1,261 @@
+"""
+IMAGE QUALITY — Fast quality estimate that gates OCR preprocessing
+===================================================================
+
+_preprocess_for_ocr runs the cleanup chain: red watermark masking,
+bilateral denoise, CLAHE, unsharp mask and a deskew. Crisp born-digital
+pages need none of it, and the bilateral filter alone costs ~90 ms per
+megapixel. extract_page_text assesses each page once and cleans the
+full-page OCR inputs with that plan: Stage 2B PaddleOCR (every page) and
+the Stage 2.55 Tesseract pass (Indonesian, fast_mode off; cleaned on the
+Tesseract pool thread). Deskew never runs there — OCR boxes keep page
+coordinates; PAGE_DESKEW straightens pages earlier.
+
+assess_quality(page) measures on a ≤ QUALITY_SAMPLE_PX downsample:
+  noise     → σ from the median |Laplacian| (text edges are sparse, so the
+              median sees background grain only)
+  contrast  → gray-level spread p99 − p1
+  watermark → share of red / pink / orange pixels (same HSV ranges as the mask)
+  skew      → angle of the foreground pixels' minAreaRect
+and returns a plan (dict) of which steps to run for that page:
+
+  watermark  red share  > QUALITY_WATERMARK_RATIO
+  denoise    noise σ    > QUALITY_NOISE_SIGMA
+  clahe      contrast   < QUALITY_MIN_CONTRAST
+  sharpen    after denoise / clahe (restores edges they soften)
+  deskew     0.3° < |skew| < 5°   (only when PAGE_DESKEW is off)
+
+OCR_PREPROCESS selects the mode:
+  auto → per-page plan (default)
+  full → every cleanup step
+  off  → the Tesseract input is left untouched
+
+Page deskew (PAGE_DESKEW=true): estimate_page_skew() finds the page angle
+once — projection-profile search on a ≤ PAGE_SKEW_SAMPLE_PX binarized
+downsample — and deskew_page() straightens the page before Surya sees it.
+Crops of a deskewed page never run their own Otsu + minAreaRect + warp.
+
+Skipped steps are priced with a running ms-per-megapixel cost of each step
+(measured whenever it does run), so logs show the time saved per page.
+
+Configuration (.env):
+  OCR_PREPROCESS          = auto    # auto | full | off
+  QUALITY_NOISE_SIGMA     = 2.5
+  QUALITY_MIN_CONTRAST    = 150
+  QUALITY_WATERMARK_RATIO = 0.002
+  QUALITY_SAMPLE_PX       = 1000
+  PAGE_DESKEW             = true
+  PAGE_DESKEW_MAX_ANGLE   = 5       # degrees searched either way
+  PAGE_SKEW_SAMPLE_PX     = 800
+
+Updated: March 2026
+"""
+
+import os
+import time
+import threading
+
+import cv2
+import numpy as np
+
+OCR_PREPROCESS          = os.getenv("OCR_PREPROCESS", "auto").lower()
+QUALITY_NOISE_SIGMA     = float(os.getenv("QUALITY_NOISE_SIGMA", "2.5"))
+QUALITY_MIN_CONTRAST    = float(os.getenv("QUALITY_MIN_CONTRAST", "150"))
+QUALITY_WATERMARK_RATIO = float(os.getenv("QUALITY_WATERMARK_RATIO", "0.002"))
+QUALITY_SAMPLE_PX       = int(os.getenv("QUALITY_SAMPLE_PX", "1000"))
+PAGE_DESKEW             = os.getenv("PAGE_DESKEW", "true").lower() == "true"
+PAGE_DESKEW_MAX_ANGLE   = float(os.getenv("PAGE_DESKEW_MAX_ANGLE", "5"))
+PAGE_SKEW_SAMPLE_PX     = int(os.getenv("PAGE_SKEW_SAMPLE_PX", "800"))
+
+STEPS = ("watermark", "denoise", "clahe", "sharpen", "deskew")
+
+# ms per megapixel, seeded with measurements on a 4-core desktop; updated by record_step()
+_step_cost = {"watermark": 11.0, "denoise": 90.0, "clahe": 25.0, "sharpen": 6.0, "deskew": 11.0}
+_cost_lock = threading.Lock()
+
+# Immerkær noise kernel (L2 norm 6)
+_NOISE_KERNEL = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+
+
+def _downsample(image, max_px: int = None):
+    # Nearest-neighbour: ~5x faster than INTER_AREA and keeps per-pixel noise
+    # (area averaging would hide exactly the grain we are measuring)
+    h, w = image.shape[:2]
+    scale = (max_px or QUALITY_SAMPLE_PX) / max(h, w)
+    if scale >= 1.0:
+        return image
+    return cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_NEAREST)
+
+
+def watermark_mask(image_bgr):
+    """Red / pink / orange pixels (watermarks, stamps) — the mask _preprocess_for_ocr whitens."""
+    hsv = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2HSV)
+    mask1 = cv2.inRange(hsv, np.array([0,  30,  30]), np.array([10,  255, 255]))
+    mask2 = cv2.inRange(hsv, np.array([160, 30, 30]), np.array([180, 255, 255]))
+    mask3 = cv2.inRange(hsv, np.array([10,  50, 50]), np.array([25,  255, 255]))
+    return mask1 + mask2 + mask3
+
+
+def estimate_noise(gray) -> float:
+    """Robust noise σ (gray levels) of a grayscale image."""
+    if gray.shape[0] < 3 or gray.shape[1] < 3:
+        return 0.0
+    response = cv2.filter2D(gray.astype(np.float32), -1, _NOISE_KERNEL)[1:-1, 1:-1]
+    # Integer responses → median from a histogram (much cheaper than np.median)
+    hist = np.bincount(np.abs(response).astype(np.uint16).ravel())
+    median = int(np.searchsorted(np.cumsum(hist), response.size / 2.0))
+    return float(1.4826 * median / 6.0)
+
+
+def estimate_skew(gray) -> float:
+    """
+    Text skew in degrees (same convention as the per-crop deskew: the angle
+    to pass to getRotationMatrix2D). 0.0 when there is too little ink.
+    """
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    coords = np.column_stack(np.where(binary > 0))
+    if len(coords) <= 50:
+        return 0.0
+    angle = cv2.minAreaRect(coords)[-1]
+    # minAreaRect returns angle in [-90, 0]
+    if angle < -45:
+        angle = 90 + angle
+    return float(angle)
+
+
+def needs_deskew(angle) -> bool:
+    # Only correct small angles (< 5°) to avoid false deskew
+    return angle is not None and 0.3 < abs(angle) < 5.0
+
+
+def _profile_score(binary, angle: float) -> float:
+    """Variance of row ink sums after rotating by `angle` — peaks when text lines are horizontal."""
+    h, w = binary.shape
+    M = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    rotated = cv2.warpAffine(binary, M, (w, h), flags=cv2.INTER_NEAREST, borderValue=0)
+    rows = cv2.reduce(rotated, 1, cv2.REDUCE_SUM, dtype=cv2.CV_32S).ravel()
+    return float(np.var(rows.astype(np.float64)))
+
+
+def estimate_page_skew(image, max_angle: float = None) -> float:
+    """
+    Page skew in degrees — the angle to pass to getRotationMatrix2D to
+    straighten it. Coarse 0.5° then fine 0.1° projection-profile search on a
+    binarized ≤ PAGE_SKEW_SAMPLE_PX downsample. 0.0 for pages without text.
+    """
+    max_angle = PAGE_DESKEW_MAX_ANGLE if max_angle is None else max_angle
+    small = _downsample(image, PAGE_SKEW_SAMPLE_PX)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+    _, binary = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    if np.count_nonzero(binary) < binary.size * 0.001:
+        return 0.0
+
+    coarse = np.arange(-max_angle, max_angle + 1e-6, 0.5)
+    best = max(coarse, key=lambda a: _profile_score(binary, a))
+    fine = np.arange(best - 0.4, best + 0.4 + 1e-6, 0.1)
+    best = max(fine, key=lambda a: _profile_score(binary, a))
+    return round(float(best), 2)
+
+
+def deskew_page(image):
+    """
+    (image, angle): the page straightened once, before layout. The input is
+    returned untouched when PAGE_DESKEW is off or the skew is negligible.
+    """
+    if not PAGE_DESKEW:
+        return image, 0.0
+    angle = estimate_page_skew(image)
+    if not needs_deskew(angle):
+        return image, angle
+    h, w = image.shape[:2]
+    M = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    straight = cv2.warpAffine(image, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
+    return straight, angle
+
+
+def full_plan() -> dict:
+    """OCR_PREPROCESS=full: every step, skew measured per crop (skew_angle None)."""
+    plan = {step: True for step in STEPS}
+    plan.update({"mode": "full", "skew_angle": None, "metrics": {}, "spent_ms": 0.0, "saved_ms": 0.0})
+    if PAGE_DESKEW:
+        # Pages are straightened before layout — crops skip the per-crop deskew
+        plan.update({"deskew": False, "skew_angle": 0.0})
+    return plan
+
+
+def assess_quality(image_bgr) -> dict:
+    """Measure a page (or crop) and decide which preprocessing steps it needs."""
+    t0 = time.perf_counter()
+    small = _downsample(image_bgr)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+    noise = estimate_noise(gray)
+    p1, p99 = np.percentile(gray, (1, 99))
+    contrast = float(p99 - p1)
+    red_ratio = 0.0
+    if small.ndim == 3:
+        # Opening drops isolated chroma-noise pixels; watermark strokes survive
+        red = cv2.morphologyEx(watermark_mask(small), cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+        red_ratio = float(np.count_nonzero(red) / gray.size)
+    # Deskewed pages (PAGE_DESKEW) are already straight: no skew measurement needed
+    skew = 0.0 if PAGE_DESKEW else estimate_skew(gray)
+
+    plan = {
+        "mode": "auto",
+        "watermark": red_ratio > QUALITY_WATERMARK_RATIO,
+        "denoise": noise > QUALITY_NOISE_SIGMA,
+        "clahe": contrast < QUALITY_MIN_CONTRAST,
+        "deskew": needs_deskew(skew),
+        "skew_angle": skew,
+        "metrics": {"noise": round(noise, 2), "contrast": round(contrast, 1),
+                    "red_ratio": round(red_ratio, 4), "skew": round(skew, 2)},
+        "spent_ms": 0.0,
+        "saved_ms": 0.0,
+    }
+    plan["sharpen"] = plan["denoise"] or plan["clahe"]
+    plan["assess_ms"] = (time.perf_counter() - t0) * 1000
+    return plan
+
+
+def plan_for(image_bgr, mode: str = None):
+    """Plan for the configured mode; None for OCR_PREPROCESS=off."""
+    mode = mode or OCR_PREPROCESS
+    if mode == "off":
+        return None
+    if mode == "full":
+        return full_plan()
+    return assess_quality(image_bgr)
+
+
+def record_step(step: str, ms: float, megapixels: float):
+    """Update the running cost of a step that just ran."""
+    if megapixels <= 0:
+        return
+    with _cost_lock:
+        _step_cost[step] = 0.9 * _step_cost[step] + 0.1 * (ms / megapixels)
+
+
+def skipped_cost_ms(plan: dict, megapixels: float) -> float:
+    """Estimated time of the steps this plan skips, for an image of `megapixels`."""
+    with _cost_lock:
+        return sum(_step_cost[s] * megapixels for s in STEPS if not plan.get(s))
+
+
+def preprocess_signature() -> str:
+    """Preprocessing + page deskew settings that change OCR output — part of the result cache key."""
+    pre = OCR_PREPROCESS
+    if pre == "auto":
+        pre += (f":{QUALITY_NOISE_SIGMA:g}/{QUALITY_MIN_CONTRAST:g}/"
+                f"{QUALITY_WATERMARK_RATIO:g}/{QUALITY_SAMPLE_PX}")
+    deskew = f"{PAGE_DESKEW_MAX_ANGLE:g}/{PAGE_SKEW_SAMPLE_PX}" if PAGE_DESKEW else "off"
+    return f"pre={pre},deskew={deskew}"
+
+
+def describe(plan: dict) -> str:
+    """One-line summary of a plan for the logs."""
+    on = [s for s in STEPS if plan.get(s)] or ["none"]
+    m = plan.get("metrics") or {}
+    if not m:
+        return f"{plan['mode']}: {'+'.join(on)}"
+    return (f"{plan['mode']}: {'+'.join(on)} (noise σ={m['noise']}, contrast={m['contrast']:.0f}, "
+            f"red={m['red_ratio']:.2%}, skew={m['skew']:.1f}°)")
@@ -0,0 +1,212 @@
+"""
+JOB ENGINE — Background processing for /process
+================================================
+
+The OCR / AI / report pipeline is heavy synchronous work (poppler, Surya,
+PaddleOCR, Tesseract, python-docx). Running it directly inside an
+``async def`` endpoint blocks the uvicorn event loop, so /progress, /ping
+and every other upload stall until the document finishes.
+
+JobEngine moves that work onto a bounded pool of worker threads:
+  - submit()   → enqueue a job, returns immediately
+  - get()      → job state (queued / running / complete / failed)
+  - result()   → final payload once the job is complete
+
+The progress dict (progress_tracker in main.py) is passed in so the
+pipeline keeps writing progress exactly as before, and /progress reads
+the same state.
+
+Configuration (.env):
+  JOB_WORKERS    = 2    # jobs processed at the same time
+  JOB_QUEUE_SIZE = 16   # jobs allowed to wait in the queue
+
+Updated: March 2026
+"""
+
+import os
+import time
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("BioManual.JobEngine")
+
+JOB_WORKERS    = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "16"))
+
+
+class JobQueueFull(Exception):
+    """Raised when the queue already holds JOB_QUEUE_SIZE waiting jobs."""
+
+
+class JobEngine:
+    """
+    Bounded background job runner.
+    Jobs are identified by session_id (one job per session at a time).
+    """
+
+    def __init__(self, progress: dict, max_workers: int = JOB_WORKERS, max_queue: int = JOB_QUEUE_SIZE,
+                 result_sink=None):
+        self.progress    = progress
+        # result_sink(job_id, result): publish finished results (shared state for other workers)
+        self.result_sink = result_sink
+        self.max_workers = max(1, max_workers)
+        self.max_queue   = max(0, max_queue)
+        self.jobs        = {}
+        self._lock       = threading.Lock()
+        # Slots = running + waiting; acquired on submit, released when a job ends
+        self._slots      = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._executor   = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="bio-job"
+        )
+        logger.info(f"✓ JobEngine Ready | workers={self.max_workers}, queue={self.max_queue}")
+
+    # ─────────────────────────────────────────────
+    # Submit / query
+    # ─────────────────────────────────────────────
+    def submit(self, job_id: str, fn, *args, **kwargs) -> dict:
+        """
+        Enqueue fn(*args, **kwargs) as a background job.
+        fn must return the final result dict (same shape as the old /process response).
+
+        Raises JobQueueFull when every worker is busy and the queue is full.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFull(
+                f"Server busy: {self.max_workers} job(s) running and "
+                f"{self.max_queue} waiting. Try again later."
+            )
+
+        with self._lock:
+            job = {
+                "job_id"      : job_id,
+                "status"      : "queued",
+                "submitted_at": time.time(),
+                "started_at"  : None,
+                "finished_at" : None,
+                "result"      : None,
+                "error"       : None,
+            }
+            self.jobs[job_id] = job
+
+        entry = self.progress.get(job_id) or {}
+        entry.update({
+            "status": "queued",
+            "current_page": entry.get("current_page", 0),
+            "total_pages": entry.get("total_pages", 0),
+            "percentage": 0,
+            "message": "Waiting in queue...",
+            "stage": "queued",
+            "result_ready": False,
+            "queue_position": self.queued_count(),
+        })
+        self.progress[job_id] = entry
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        logger.info(f"📥 Job queued: {job_id} (queued={self.queued_count()}, running={self.running_count()})")
+        return job
+
+    def complete(self, job_id: str, result: dict) -> dict:
+        """Record an already-finished job (e.g. served from the result cache) without running it."""
+        now = time.time()
+        job = {
+            "job_id"      : job_id,
+            "status"      : "complete" if result.get("success") else "failed",
+            "submitted_at": now,
+            "started_at"  : now,
+            "finished_at" : now,
+            "result"      : result,
+            "error"       : None if result.get("success") else result.get("error"),
+        }
+        with self._lock:
+            self.jobs[job_id] = job
+        self._sink(job_id, result)
+        return job
+
+    def get(self, job_id: str):
+        return self.jobs.get(job_id)
+
+    def result(self, job_id: str):
+        job = self.jobs.get(job_id)
+        if job and job["status"] in ("complete", "failed"):
+            return job["result"]
+        return None
+
+    def purge(self, max_age_seconds: float) -> int:
+        """Forget finished jobs (and their result payloads) older than max_age_seconds."""
+        cutoff = time.time() - max_age_seconds
+        with self._lock:
+            old = [jid for jid, j in self.jobs.items()
+                   if j["status"] in ("complete", "failed") and (j["finished_at"] or 0) < cutoff]
+            for jid in old:
+                self.jobs.pop(jid, None)
+        return len(old)
+
+    def queued_count(self) -> int:
+        return sum(1 for j in list(self.jobs.values()) if j["status"] == "queued")
+
+    def running_count(self) -> int:
+        return sum(1 for j in list(self.jobs.values()) if j["status"] == "running")
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": self.running_count(),
+            "queued": self.queued_count(),
+        }
+
+    def _sink(self, job_id: str, result):
+        if self.result_sink is None or result is None:
+            return
+        try:
+            self.result_sink(job_id, result)
+        except Exception as e:
+            logger.warning(f"Could not publish result of {job_id}: {e}")
+
+    # ─────────────────────────────────────────────
+    # Worker
+    # ─────────────────────────────────────────────
+    def _run(self, job: dict, fn, args, kwargs):
+        job_id = job["job_id"]
+        job["status"] = "running"
+        job["started_at"] = time.time()
+        wait_s = job["started_at"] - job["submitted_at"]
+        logger.info(f"▶️ Job started: {job_id} (waited {wait_s:.1f}s)")
+
+        try:
+            result = fn(*args, **kwargs)
+            if not isinstance(result, dict):
+                result = {"success": False, "error": "Pipeline returned no result"}
+            job["result"] = result
+            job["status"] = "complete" if result.get("success") else "failed"
+            job["error"] = None if result.get("success") else result.get("error")
+        except Exception as e:
+            logger.error(f"Job {job_id} crashed: {e}\n{traceback.format_exc()}")
+            job["result"] = {"success": False, "error": str(e)}
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = time.time()
+            self._slots.release()
+            self._sink(job_id, job["result"])
+
+            # Make sure /progress never stays stuck at "processing".
+            # result_ready is written last: the result is stored, /result can be fetched
+            # (progress streams close on it).
+            entry = self.progress.get(job_id)
+            if entry is not None:
+                entry.pop("queue_position", None)
+                final = {"job_status": job["status"], "result_ready": True, "stage": "done"}
+                if job["status"] == "failed":
+                    final.update({
+                        "status": "error",
+                        "message": f"Processing failed: {job['error']}",
+                    })
+                elif entry.get("status") != "complete":
+                    final.update({"status": "complete", "percentage": 100})
+                entry.update(final)
+
+            took = job["finished_at"] - job["started_at"]
+            logger.info(f"⏹️ Job {job['status']}: {job_id} ({took:.1f}s)")
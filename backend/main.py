@@ -15,12 +15,15 @@ Updated: February 2026
 
 import os
 import sys
+import copy
 import time
 import uuid
 import json
 import shutil
+import hashlib
 import logging
 import traceback
+import threading
 import uvicorn
 import re
 from pathlib import Path
@@ -28,9 +31,10 @@ from pathlib import Path
 from fastapi import FastAPI, UploadFile, File, Request, Form
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse
 from pydantic import BaseModel
 import cv2
+import numpy as np
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -42,13 +46,26 @@ load_dotenv()
 from bio_brain import BioBrain
 from bio_architect import BioArchitect
 from language_filter import enforce_language, enforce_language_on_items, get_language_instruction, clean_text
-
-try:
-    from vision_engine import create_vision_engine
-    VISION_ENGINE_AVAILABLE = True
-except Exception as e:
-    VISION_ENGINE_AVAILABLE = False
-    logging.warning(f"Vision Engine not available: {e}")
+from job_engine import JobEngine, JobQueueFull
+from ocr_pool import get_ocr_pool, OCR_WORKERS, OCR_FAST_MODE
+from vision_server import VISION_SERVER, VisionServerUnavailable, get_vision_client
+from pdf_raster import PdfPageStream, resolve_poppler_path, raster_signature, PDF_DPI
+from paddle_profile import PADDLE_PROFILE, active_signature as paddle_signature
+from surya_runtime import layout_signature as surya_layout_signature
+from tiled_ocr import tile_signature
+from page_pipeline import StagedPipeline
+from result_cache import get_document_cache, cache_key, PIPELINE_VERSION
+from artifact_writer import get_artifact_writer, artifact_path
+from column_detect import find_column_gaps
+from blank_page import SKIPPED_KINDS, blank_signature
+from page_dedupe import PAGE_DEDUPE, DuplicatePageIndex, page_fingerprint, clone_scan_result, dedupe_signature
+from image_quality import preprocess_signature
+from progress_stream import ProgressHub, ProgressTracker, sse_event, PROGRESS_STREAM_KEEPALIVE
+from session_store import create_session_store
+from state_backend import create_state_store, UVICORN_WORKERS
+
+# vision_engine (torch, Surya, PaddleOCR) is imported by the background model warm-up
+from model_loader import get_model_loader
 
 try:
     from direct_reader import is_text_pdf, extract_docx_direct, extract_pdf_direct
@@ -140,12 +157,35 @@ app.add_middleware(
 
 app.mount("/output", StaticFiles(directory=OUTPUT_DIR), name="output")
 
+
+@app.middleware("http")
+async def _wait_for_pending_artifact(request, call_next):
+    """An /output/ URL can be handed out before its file is encoded — wait for that one file."""
+    path = request.url.path
+    if path.startswith("/output/"):
+        local = os.path.join(OUTPUT_DIR, path[len("/output/"):])
+        if artifact_writer.is_pending(local):
+            from fastapi.concurrency import run_in_threadpool
+            await run_in_threadpool(artifact_writer.wait, [local])
+    return await call_next(request)
+
+@app.on_event("startup")
+def _start_model_warmup():
+    # Background thread: the port is served while torch / Surya / PaddleOCR load
+    model_loader.start()
+
 @app.get("/")
 @app.get("/health")
 @app.get("/ping")
 async def health_check():
     return {"status": "ok", "message": "BioManual Backend is RUNNING", "timestamp": time.time()}
 
+@app.get("/ready")
+async def readiness():
+    """Per-model warm-up state. 503 until the models OCR needs have finished loading."""
+    status = model_loader.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
 # Serve static files from backend directory (e.g., letterhead.png)
 @app.api_route("/files/{filename}", methods=["GET", "HEAD"])
 async def serve_backend_file(filename: str):
@@ -161,25 +201,176 @@ async def serve_backend_file(filename: str):
 # SYSTEM ORCHESTRATOR (Integration)
 # ==========================================
 
-def initialize_vision_module():
-    """Initialize vision module based on VISION_MODE setting"""
-    if VISION_MODE in ['gemini', 'hybrid'] and VISION_ENGINE_AVAILABLE:
-        try:
-            logger.info(f"Initializing {VISION_MODE.upper()} vision mode...")
-            return create_vision_engine(mode=VISION_MODE)
-        except Exception as e:
-            logger.error(f"Failed to initialize Vision Engine: {e}")
-            logger.info("Falling back to basic mode...")
-            return None
+def initialize_vision_module(tracker):
+    """Initialize vision module based on VISION_MODE setting (runs on the model warm-up thread)"""
+    if VISION_MODE not in ['gemini', 'hybrid']:
+        return None
+    try:
+        with tracker.track("vision_imports"):
+            from vision_engine import create_vision_engine
+    except Exception as e:
+        logger.warning(f"Vision Engine not available: {e}")
+        return None
+    try:
+        logger.info(f"Initializing {VISION_MODE.upper()} vision mode...")
+        return create_vision_engine(mode=VISION_MODE, tracker=tracker)
+    except Exception as e:
+        logger.error(f"Failed to initialize Vision Engine: {e}")
+        logger.info("Falling back to basic mode...")
+        return None
+
+
+def _connect_vision_server(tracker):
+    """VISION_SERVER=true: wait until the vision daemon answers with its models loaded."""
+    client = get_vision_client()
+    client.wait_ready(tracker=tracker)
+    return client
+
+
+def _warm_ocr_pool(tracker):
+    """OCR_WORKERS > 1: start the worker processes (each loads its own models)."""
+    pool = get_ocr_pool(mode=VISION_MODE).warm_up()
+    if pool.paddle_signature:
+        tracker.mark("paddleocr", "ready", signature=pool.paddle_signature)
+    return pool
+
+
+def _warm_text_corrector(tracker):
+    """Load the bundled Indonesian SymSpell dictionary before the first scan needs it."""
+    if not TEXT_CORRECTOR_AVAILABLE:
+        return None
+    _ocr_correct("teks", lang="id")
+    return True
+
+
+# OCR pool workers (spawn) re-import this file as __mp_main__ when started via
+# `python main.py` — they build their own engine, so skip it here.
+IS_OCR_POOL_WORKER = __name__ == "__mp_main__"
+
+# Heavy models load on a background thread (started with the server, see
+# _start_model_warmup); GET /ready reports their state. Only OCR paths wait.
+model_loader = get_model_loader()
+SCANNER_MODEL = None    # loader of whatever scans pages in this process (engine / pool / daemon)
+if not IS_OCR_POOL_WORKER:
+    if VISION_SERVER:
+        # Models live in the vision_server.py daemon (shared by all API workers).
+        # A daemon that was not up in time is connected again by the next job.
+        model_loader.register("vision_server", _connect_vision_server, required=True, retry=True)
+        SCANNER_MODEL = "vision_server"
+    elif OCR_WORKERS > 1:
+        # Scans run in the pool — this process never needs its own engine
+        model_loader.register("ocr_pool", _warm_ocr_pool, required=True)
+        SCANNER_MODEL = "ocr_pool"
+    else:
+        model_loader.register("vision_engine", initialize_vision_module, required=True)
+        SCANNER_MODEL = "vision_engine"
+    model_loader.register("text_corrector", _warm_text_corrector)
+
+
+def get_vision_module():
+    """In-process vision engine (None when unavailable) — waits while it is still loading."""
+    return model_loader.get("vision_engine")
+
+
+def _get_scan_pool():
+    """Out-of-process scanner: the vision server, the OCR process pool, or None (in-process engine)."""
+    if VISION_SERVER:
+        client = model_loader.get("vision_server")
+        if client is None:
+            # No in-process engine in this mode — scanning without the daemon returns nothing
+            raise VisionServerUnavailable("vision server not connected (see GET /ready); the next job retries")
+        return client
+    return get_ocr_pool(mode=VISION_MODE)
+
+
+def _reported_paddle_signature():
+    models = model_loader.status()["models"]
+    for name in ("paddleocr", "server:paddleocr"):
+        signature = (models.get(name) or {}).get("signature")
+        if signature:
+            return signature
     return None
 
-vision_module = initialize_vision_module()
+
+def _paddle_cache_signature():
+    """
+    PaddleOCR part of the /process result-cache key, as resolved by the process
+    that scans (engine, OCR pool worker or vision daemon — reported through
+    model_loader). Blocking: call it on the threadpool. An explicit
+    PADDLE_PROFILE needs no paddle import; 'auto' waits for the scanner.
+    """
+    signature = _reported_paddle_signature()
+    if signature:
+        return signature
+    if PADDLE_PROFILE != "auto":
+        return paddle_signature()
+    model_loader.get(SCANNER_MODEL)
+    return _reported_paddle_signature() or "auto"
+
+
+def _pipeline_signature(paddle_sig):
+    """Every setting that changes /process output — the result-cache version string."""
+    return "|".join([
+        PIPELINE_VERSION, raster_signature(), paddle_sig, surya_layout_signature(), tile_signature(),
+        preprocess_signature(), blank_signature(), dedupe_signature(), f"fast={int(OCR_FAST_MODE)}",
+    ])
+
+
+def _surya_batch_size():
+    engine_mod = sys.modules.get("vision_engine")
+    return getattr(engine_mod, "SURYA_BATCH_SIZE", 1)
+
+
 architect_module = BioArchitect()
 
-# Progress tracking
-progress_tracker = {}
-# Session Data Storage (for Supplementary Uploads)
-active_sessions = {}
+# Cross-worker state (progress + job results) for uvicorn --workers N; no-op for one worker
+state_store = None if IS_OCR_POOL_WORKER else create_state_store(BASE_PATH)
+# Progress tracking — writes are pushed to /progress/{session_id}/stream subscribers
+progress_hub = ProgressHub()
+progress_tracker = ProgressTracker(progress_hub, state=state_store)
+# Session Data Storage (for /translate, /supplement, /generate_custom_report) — bounded, TTL
+session_store = None if IS_OCR_POOL_WORKER else create_session_store(
+    BASE_PATH, shared=state_store is not None and state_store.shared
+)
+# Background workers for /process (keeps the event loop free)
+job_engine = JobEngine(
+    progress_tracker,
+    result_sink=state_store.save_result if state_store is not None and state_store.shared else None
+)
+
+# Content-addressed /process result cache (None when RESULT_CACHE=false)
+document_cache = None if IS_OCR_POOL_WORKER else get_document_cache(BASE_PATH)
+
+# Write-behind encoder for previews / crops (vision engine, direct-PDF path, /recrop)
+artifact_writer = get_artifact_writer()
+
+
+def _wait_for_crops(items):
+    """Block until the figure/table crops referenced by `items` are on disk."""
+    artifact_writer.wait([it.get("crop_local") for it in items or [] if isinstance(it, dict)])
+
+# Finished progress entries / job results are kept this long for /progress and /result
+JOB_RESULT_TTL_MIN = float(os.getenv("JOB_RESULT_TTL_MIN", "60"))
+
+
+def _state_janitor(interval: float = 300):
+    """Periodically drop expired sessions, stale progress entries and old job results."""
+    while True:
+        time.sleep(interval)
+        try:
+            running = {jid for jid, j in list(job_engine.jobs.items()) if j["status"] in ("queued", "running")}
+            n_sess = session_store.purge_expired()
+            n_prog = progress_tracker.purge(JOB_RESULT_TTL_MIN * 60, keep=running)
+            n_jobs = job_engine.purge(JOB_RESULT_TTL_MIN * 60)
+            n_jobs += state_store.purge(JOB_RESULT_TTL_MIN * 60)
+            if n_sess or n_prog or n_jobs:
+                logger.info(f"🧹 State cleanup: {n_sess} sessions, {n_prog} progress entries, {n_jobs} job results")
+        except Exception as e:
+            logger.warning(f"State cleanup failed: {e}")
+
+
+if not IS_OCR_POOL_WORKER:
+    threading.Thread(target=_state_janitor, name="bio-state-janitor", daemon=True).start()
 
 def _print_progress(current: int, total: int, label: str = "", width: int = 40):
     """Print a colored ASCII progress bar to the terminal."""
@@ -274,15 +465,11 @@ def convert_pdf_to_images_safe(path, last_page=None):
     """
     Convert PDF pages to PIL images.
     Set last_page=1 for quick detection to avoid memory issues with large PDFs.
+    For whole documents use PdfPageStream (renders one window of pages at a time).
     """
     from pdf2image import convert_from_path
-    poppler = os.environ.get('POPPLER_PATH')
-    if not poppler:
-         for p in [r"C:\poppler\Library\bin", r"C:\poppler\bin"]:
-             if os.path.exists(p):
-                 poppler = p
-                 break
-    dpi = int(os.getenv('PDF_DPI', '300'))
+    poppler = resolve_poppler_path()
+    dpi = PDF_DPI
     try:
         kwargs = {"dpi": dpi, "poppler_path": poppler}
         if last_page:
@@ -295,7 +482,18 @@ def convert_pdf_to_images_safe(path, last_page=None):
         return convert_from_path(path, dpi=dpi)
 
 
-def _split_columns_simple(image_path, filename_base):
+def _to_bgr(img_src):
+    """Page source (path, PIL image or BGR ndarray) → BGR ndarray, or None."""
+    if img_src is None:
+        return None
+    if isinstance(img_src, str):
+        return cv2.imread(img_src)
+    if isinstance(img_src, np.ndarray):
+        return img_src
+    return cv2.cvtColor(np.asarray(img_src.convert("RGB")), cv2.COLOR_RGB2BGR)
+
+
+def _split_column_views(img):
     """
     Deteksi dan crop kolom pada halaman dokumen menggunakan whitespace analysis.
     
@@ -303,68 +501,24 @@ def _split_columns_simple(image_path, filename_base):
       1. Convert ke grayscale → threshold → biner
       2. Hitung vertical projection (jumlah pixel gelap per kolom-x)
       3. Cari celah lebar (banyak pixel putih berturut-turut) → column gap
-      4. Crop setiap kolom → simpan sebagai file terpisah
+      4. Slice setiap kolom sebagai view (tanpa copy, tanpa tulis ke disk)
     
-    Returns: list of image paths (1 per column). Jika single-column → [original_path]
+    img: BGR ndarray (halaman penuh)
+    Returns: list of ndarray views (1 per column). Jika single-column → [img]
     """
-    import cv2
-    import numpy as np
-    
-    img = cv2.imread(image_path)
-    if img is None:
-        return [image_path]
-    
     h, w = img.shape[:2]
     
     # Minimum width untuk multi-column detection (dokumen kecil biasa 1 kolom)
     if w < 800:
-        return [image_path]
-    
-    # Convert ke grayscale dan binarize
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    _, binary = cv2.threshold(gray, 200, 255, cv2.THRESH_BINARY)
-    
-    # Vertical projection: hitung persentase pixel putih per kolom-x
-    # Ignore top 5% dan bottom 5% (header/footer biasanya full-width)
-    margin_y = int(h * 0.05)
-    roi = binary[margin_y:h - margin_y, :]
-    
-    # Untuk setiap kolom x, hitung berapa % pixel yang putih
-    white_ratio = np.mean(roi == 255, axis=0)  # array shape (w,)
-    
-    # Smooth dengan moving average untuk menghilangkan noise
-    kernel_size = max(5, w // 100)
-    kernel = np.ones(kernel_size) / kernel_size
-    white_smooth = np.convolve(white_ratio, kernel, mode='same')
-    
-    # Cari region yang "hampir semua putih" (> 95% putih) → column gap
-    # 95% lebih akurat dari 90% — menghindari false gap dari noise
-    gap_threshold = 0.95
-    is_gap = white_smooth > gap_threshold
-    
-    # Cari gap yang cukup lebar (minimal 1.5% dari lebar halaman)
-    min_gap_width = max(15, int(w * 0.015))
+        return [img]
     
-    # Find contiguous gap segments
-    gaps = []
-    in_gap = False
-    gap_start = 0
-    for x in range(w):
-        if is_gap[x] and not in_gap:
-            gap_start = x
-            in_gap = True
-        elif not is_gap[x] and in_gap:
-            gap_width = x - gap_start
-            if gap_width >= min_gap_width:
-                gap_center = gap_start + gap_width // 2
-                # Ignore gaps too close to edges (within 5% of page width)
-                if gap_center > w * 0.08 and gap_center < w * 0.92:
-                    gaps.append(gap_center)
-            in_gap = False
+    # Whitespace gaps (> 95% putih, lebar ≥ 1.5% halaman, bukan di tepi 8%)
+    # Header/footer (5% atas & bawah) diabaikan — biasanya full-width
+    gaps = find_column_gaps(img, threshold=200, margin_frac=0.05, edge_frac=0.08)
     
     if not gaps:
         logger.info(f"📊 Column split: no column gaps found — single column")
-        return [image_path]
+        return [img]
     
     # Build column boundaries
     col_boundaries = [0] + sorted(gaps) + [w]
@@ -373,16 +527,12 @@ def _split_columns_simple(image_path, filename_base):
     # Sanity: max 6 columns (lebih dari itu kemungkinan noise)
     if num_cols > 6:
         logger.warning(f"📊 Too many columns detected ({num_cols}) — likely noise, skipping split")
-        return [image_path]
+        return [img]
     
     logger.info(f"📊 Column split: detected {num_cols} columns (gaps at x={[int(g) for g in gaps]})")
     
-    # Crop each column
-    backend_dir = os.path.dirname(os.path.abspath(__file__))
-    output_dir = os.path.join(backend_dir, "output_results")
-    os.makedirs(output_dir, exist_ok=True)
-    
-    column_paths = []
+    # Slice each column (views share the page buffer)
+    column_views = []
     for col_idx in range(num_cols):
         col_x1 = int(col_boundaries[col_idx])
         col_x2 = int(col_boundaries[col_idx + 1])
@@ -396,20 +546,281 @@ def _split_columns_simple(image_path, filename_base):
         if (col_x2 - col_x1) < w * 0.10:
             continue
         
-        col_img = img[0:h, col_x1:col_x2]
-        
-        col_fname = f"COL_{filename_base}_c{col_idx + 1}.png"
-        col_path = os.path.join(output_dir, col_fname)
-        cv2.imwrite(col_path, col_img)
-        column_paths.append(col_path)
+        column_views.append(img[0:h, col_x1:col_x2])
         
         logger.info(f"   Column {col_idx + 1}: x={col_x1}-{col_x2} ({col_x2-col_x1}px wide)")
     
-    if len(column_paths) <= 1:
+    if len(column_views) <= 1:
         # Hanya 1 kolom valid → kembalikan original
-        return [image_path]
+        return [img]
     
-    return column_paths
+    return column_views
+
+def _raster_dpi(images, page_index):
+    """Adaptive DPI of an OCR-sized PDF page (the scanner skips its upscale), else None."""
+    ocr_sized = getattr(images, "ocr_sized", None)
+    return images.page_dpi[page_index] if ocr_sized and ocr_sized(page_index) else None
+
+
+def _rasterize_pages(images):
+    """
+    Pipeline source: yield {"page_index", "image", "raster_dpi"} (BGR ndarray) page by page.
+    `images` may be a PdfPageStream (lazy), a list of PIL images, or a list of paths.
+    Pages stay in memory — nothing is written to disk here.
+    """
+    for i, img_src in enumerate(images):
+        page_img = _to_bgr(img_src)
+        del img_src
+        if page_img is None:
+            logger.error(f"Failed to load page {i + 1}")
+            continue
+        yield {"page_index": i, "image": page_img, "raster_dpi": _raster_dpi(images, i)}
+
+
+def _normalize_scan_elements(brain_module, layout_elements, lang):
+    """
+    BioBrain.normalize_text + text_corrector highlights for every element.
+    Stateless per element, so it runs as a pipeline stage; results are stored
+    on the element as '_normalized' / '_highlights' for the assembly loop.
+    """
+    for element in layout_elements:
+        normalized_result = brain_module.normalize_text(element['text'], lang=lang)
+        # Terapkan text_corrector SETELAH BioBrain — gunakan versi highlights
+        correction_result = apply_text_correction_with_highlights(
+            normalized_result['corrected'], lang=lang
+        )
+        element['text'] = correction_result['text']
+        normalized_result['corrected'] = correction_result['text']
+        element['_normalized'] = normalized_result
+        element['_highlights'] = correction_result['highlights']
+
+
+def _build_page_pipeline(brain_module, filename, lang, direct_translate=False):
+    """
+    Staged OCR pipeline for one document:
+      rasterize → split → layout → ocr → normalize   (in-process models)
+      rasterize → split → scan → normalize           (OCR_WORKERS > 1: scan runs in the process pool;
+                                                      VISION_SERVER=true: scan runs in the vision daemon)
+    Each item that leaves the pipeline carries task["scan_result"].
+
+    Near-duplicate pages (PAGE_DEDUPE) are recognised in the split stage and
+    skip layout / OCR: the normalize stage clones the first occurrence's
+    result (it has always left that stage already — stages keep page order).
+    """
+    empty_result = {"elements": [], "clean_image_path": None}
+    dedupe = DuplicatePageIndex() if PAGE_DEDUPE else None
+
+    def split_stage(item):
+        i = item["page_index"]
+        try:
+            col_views = _split_column_views(item["image"])
+        except Exception as e:
+            logger.warning(f"Column split failed (non-fatal): {e}")
+            col_views = [item["image"]]
+
+        if len(col_views) > 1:
+            logger.info(f"📊 Page {i + 1}: split into {len(col_views)} columns")
+
+        # ── Near-duplicate of an earlier page in this job? ──
+        source, offset, new_source = None, None, None
+        if dedupe is not None:
+            fp = page_fingerprint(item["image"])
+            match = dedupe.find(fp)
+            if match is not None and match[0]["num_cols"] == len(col_views):
+                source, offset = match
+                # Column views follow their own gaps, so only the vertical shift carries over
+                if len(col_views) > 1:
+                    offset = (0, offset[1])
+                logger.info(f"♻️ Page {i + 1}: duplicate of page {source['page_index'] + 1} — reusing its OCR")
+            else:
+                new_source = {"page_index": i, "num_cols": len(col_views), "results": {}}
+                dedupe.add(new_source, fp)
+
+        tasks = []
+        for col_idx, col_img in enumerate(col_views):
+            col_suffix = f"_col{col_idx}" if len(col_views) > 1 else ""
+            task = {
+                "page_index"   : i,
+                "col_idx"      : col_idx,
+                "num_cols"     : len(col_views),
+                "image"        : col_img,   # view into the page array
+                "filename_base": f"{filename}_{i}{col_suffix}",
+                "raster_dpi"   : item.get("raster_dpi"),
+            }
+            if source is not None:
+                task["duplicate_of"] = source
+                task["dup_offset"] = offset
+            elif new_source is not None:
+                task["_dedupe_source"] = new_source
+            tasks.append(task)
+        return tasks
+
+    def normalize_stage(task):
+        scan_result = task.get("scan_result") or empty_result
+        if not direct_translate and isinstance(scan_result, dict):
+            _normalize_scan_elements(brain_module, scan_result.get('elements', []), lang)
+        source = task.pop("_dedupe_source", None)
+        if source is not None:
+            # Snapshot: the consumer pops '_normalized' / '_highlights' from the originals
+            source["results"][task["col_idx"]] = copy.deepcopy(scan_result)
+        return [task]
+
+    def clone_stage(task):
+        """Duplicate page/column → the source's normalized result, re-pointed at this page."""
+        source = task.pop("duplicate_of")
+        src_result = source["results"].get(task["col_idx"], empty_result)
+        task["scan_result"] = clone_scan_result(
+            src_result, task.pop("image"), task["filename_base"], OUTPUT_DIR, task.pop("dup_offset")
+        )
+        return [task]
+
+    pool = _get_scan_pool()
+    if pool is not None:
+        # Submit is non-blocking: up to PIPELINE_QUEUE_SIZE scans are in flight
+        # while the normalize stage waits on the oldest future (keeps page order).
+        def scan_stage(task):
+            if task.get("duplicate_of") is None:
+                task["future"] = pool.submit(task, lang=lang, direct_translate=direct_translate)
+            return [task]
+
+        def collect_normalize_stage(task):
+            if task.get("duplicate_of") is not None:
+                return clone_stage(task)
+            try:
+                task["scan_result"] = task.pop("future").result()
+                task.pop("image", None)
+            except VisionServerUnavailable:
+                raise
+            except Exception as e:
+                logger.error(f"OCR worker failed on {task['filename_base']}: {e}")
+                task["scan_result"] = empty_result
+            return normalize_stage(task)
+
+        stages = [
+            ("split", split_stage),
+            ("scan", scan_stage),
+            ("normalize", collect_normalize_stage),
+        ]
+        return StagedPipeline(stages, source_name="rasterize", queue_size=max(2, pool.workers * 2))
+
+    vision_module = get_vision_module()
+    surya_batch = _surya_batch_size()
+
+    def layout_stage(tasks):
+        # Batched: every page/column already waiting goes through one Surya call
+        for task in tasks:
+            if task.get("duplicate_of") is not None:
+                task["page"] = None
+                continue
+            image = task.pop("image")
+            task["page"] = vision_module.prepare_image(
+                image, task["filename_base"], raster_dpi=task.get("raster_dpi")
+            ) if vision_module else None
+        pages = [t["page"] for t in tasks if t["page"] is not None]
+        if pages:
+            vision_module.detect_page_layouts(pages, batch_size=surya_batch)
+        return tasks
+
+    def ocr_stage(task):
+        if task["page"] is not None:
+            vision_module.extract_page_text(task["page"], lang=lang, direct_translate=direct_translate)
+        return [task]
+
+    def finalize_normalize_stage(task):
+        page = task.pop("page")
+        if task.get("duplicate_of") is not None:
+            return clone_stage(task)
+        if page is None:
+            task["scan_result"] = empty_result if vision_module else []
+        else:
+            task["scan_result"] = vision_module.finalize_page(page, lang=lang, direct_translate=direct_translate)
+        return normalize_stage(task)
+
+    stages = [
+        ("split", split_stage),
+        ("layout", layout_stage, surya_batch),
+        ("ocr", ocr_stage),
+        ("normalize", finalize_normalize_stage),
+    ]
+    return StagedPipeline(stages, source_name="rasterize")
+
+
+def _iter_scan_results(scan_tasks, lang, direct_translate=False, dedupe=None):
+    """
+    Run vision scan_image / scan_document over scan tasks ("image" ndarray or "image_path")
+    and yield (task, scan_result) in task order.
+    Uses the OCR process pool when OCR_WORKERS > 1, else the shared in-process vision engine.
+    With a DuplicatePageIndex, near-duplicates of earlier pages are cloned instead of scanned.
+    """
+    if dedupe is not None:
+        yield from _iter_deduped_scan_results(scan_tasks, lang, direct_translate, dedupe)
+        return
+
+    pool = _get_scan_pool()
+    if pool is not None:
+        yield from pool.scan_many(scan_tasks, lang=lang, direct_translate=direct_translate)
+        return
+
+    vision_module = get_vision_module()
+    for task in scan_tasks:
+        if vision_module is None:
+            yield task, []
+            continue
+        if task.get("image") is not None:
+            scan_result = vision_module.scan_image(
+                task.pop("image"), task["filename_base"], lang=lang, direct_translate=direct_translate,
+                raster_dpi=task.get("raster_dpi")
+            )
+        else:
+            scan_result = vision_module.scan_document(
+                task["image_path"], task["filename_base"], lang=lang, direct_translate=direct_translate
+            )
+        yield task, scan_result
+
+def _iter_deduped_scan_results(scan_tasks, lang, direct_translate, dedupe):
+    """
+    _iter_scan_results for unique pages only. Duplicates are held back and
+    yielded just before the next unique page's result (or at the end) — by
+    then their source page, which came earlier, has been yielded.
+    """
+    empty_result = {"elements": [], "clean_image_path": None}
+    held = []
+    # id(task) → (source entry, duplicates before it); kept off the task so the
+    # OCR pool does not pickle held-back images along with it
+    meta = {}
+
+    def unique_tasks():
+        nonlocal held
+        for task in scan_tasks:
+            image = task.get("image")
+            fp = page_fingerprint(image) if image is not None else None
+            match = dedupe.find(fp) if fp is not None else None
+            if match is not None:
+                task["duplicate_of"], task["dup_offset"] = match
+                held.append(task)
+                logger.info(f"♻️ {task['filename_base']}: duplicate of {match[0]['filename_base']} — reusing its OCR")
+                continue
+            source = {"filename_base": task["filename_base"], "result": None}
+            if fp is not None:
+                dedupe.add(source, fp)
+            meta[id(task)], held = (source, held), []
+            yield task
+
+    def clones(duplicates):
+        for dup in duplicates:
+            source = dup.pop("duplicate_of")
+            yield dup, clone_scan_result(
+                source["result"] or empty_result, dup.pop("image"), dup["filename_base"],
+                OUTPUT_DIR, dup.pop("dup_offset")
+            )
+
+    for task, scan_result in _iter_scan_results(unique_tasks(), lang, direct_translate):
+        source, preceding = meta.pop(id(task))
+        yield from clones(preceding)
+        # Snapshot before the caller mutates the elements
+        source["result"] = copy.deepcopy(scan_result)
+        yield task, scan_result
+    yield from clones(held)
 
 # ==========================================
 # API ENDPOINTS
@@ -431,7 +842,7 @@ class GenerateChapterRequest(BaseModel):
     lang: str = "id"
 
 @app.post("/generate_chapter")
-async def generate_chapter(req: GenerateChapterRequest):
+def generate_chapter(req: GenerateChapterRequest):
     try:
         from openrouter_client import get_openrouter_client
         from bio_brain import BioBrain
@@ -550,7 +961,7 @@ class CheckCompletenessRequest(BaseModel):
     lang: str = "id"
 
 @app.post("/check_chapter_completeness")
-async def check_chapter_completeness(req: CheckCompletenessRequest):
+def check_chapter_completeness(req: CheckCompletenessRequest):
     try:
         from openrouter_client import get_openrouter_client
         import base64
@@ -559,6 +970,8 @@ async def check_chapter_completeness(req: CheckCompletenessRequest):
         # 1. Collect unique source images for this chapter
         source_images = set()
         extracted_texts = []
+        # Previews may still be encoding (write-behind) right after /process
+        artifact_writer.wait([item.get("source_image_local") for item in req.items])
         for item in req.items:
             img_path = item.get("source_image_local")
             if img_path and os.path.exists(img_path):
@@ -636,15 +1049,25 @@ Kembalikan HANYA format JSON valid berikut (tanpa markdown box):
         return {"success": False, "error": str(e)}
 
 class GenerateReportRequest(BaseModel):
-    items: list[dict]
+    items: list[dict] = []
     filename: str
+    session_id: str | None = None   # items omitted → use the stored session's structured_data
     lang: str = "id"
     custom_product_name: str | None = None
     custom_product_desc: str | None = None
 
 @app.post("/generate_custom_report")
-async def generate_custom_report(req: GenerateReportRequest):
+def generate_custom_report(req: GenerateReportRequest):
     try:
+        if not req.items and req.session_id:
+            session = session_store.get(req.session_id)
+            if session is None:
+                return {"success": False, "error": "Session not found"}
+            req.items = session.get("structured_data", [])
+
+        # Crops may still be encoding (write-behind) — wait for these items' files only
+        _wait_for_crops(req.items)
+
         # ── Debug: trace crop_local values ──
         fig_count = 0
         crop_found = 0
@@ -700,8 +1123,10 @@ class RecropRequest(BaseModel):
     element_type: str
 
 @app.post("/recrop")
-async def recrop_image(req: RecropRequest):
+def recrop_image(req: RecropRequest):
     try:
+        # The source preview may still be in the write-behind queue
+        artifact_writer.wait([req.source_image_local])
         if not os.path.exists(req.source_image_local):
             return {"success": False, "error": "Source image not found on server"}
             
@@ -723,9 +1148,11 @@ async def recrop_image(req: RecropRequest):
         if crop.size == 0:
             return {"success": False, "error": "Empty crop area"}
             
-        crop_fname = f"recrop_{req.element_type}_{uuid.uuid4().hex[:6]}.png"
-        crop_path = os.path.join(OUTPUT_DIR, crop_fname)
-        cv2.imwrite(crop_path, crop)
+        crop_path = artifact_writer.write(
+            os.path.join(OUTPUT_DIR, f"recrop_{req.element_type}_{uuid.uuid4().hex[:6]}.png"),
+            crop, kind="crop"
+        )
+        crop_fname = os.path.basename(crop_path)
         
         from urllib.parse import quote
         crop_url = f"http://127.0.0.1:8000/output/{quote(crop_fname)}"
@@ -754,13 +1181,100 @@ async def start_session():
     }
     return {"session_id": session_id}
 
+def _shared_progress(session_id: str):
+    """Progress written by another uvicorn worker (None for a single worker / unknown session)."""
+    if not state_store.shared:
+        return None
+    progress = state_store.load_progress(session_id)
+    if progress is not None:
+        progress.pop("_updated_at", None)
+    return progress
+
+
 @app.get("/progress/{session_id}")
 async def get_progress(session_id: str):
-    """Get processing progress for a session"""
+    """Get processing progress for a session (written by the JobEngine worker)"""
     if session_id in progress_tracker:
-        return progress_tracker[session_id]
+        progress = dict(progress_tracker[session_id])
+        job = job_engine.get(session_id)
+        if job and progress.get("status") != "processing_supplement":
+            progress["job_status"] = job["status"]
+            progress["result_ready"] = job["status"] in ("complete", "failed")
+        return progress
+    progress = _shared_progress(session_id)
+    if progress is not None:
+        return progress
     return {"error": "Session not found"}
 
+
+async def _shared_progress_events(session_id: str, request: Request, interval: float = 1.0):
+    """SSE for a job running on another worker: follow the shared state store."""
+    import asyncio
+    from fastapi.concurrency import run_in_threadpool
+
+    last_updated = None
+    idle = 0.0
+    while not await request.is_disconnected():
+        snapshot = await run_in_threadpool(state_store.load_progress, session_id)
+        updated_at = snapshot.pop("_updated_at", None) if snapshot else None
+        if snapshot and updated_at != last_updated:
+            last_updated, idle = updated_at, 0.0
+            yield sse_event(snapshot)
+            if snapshot.get("result_ready"):
+                yield sse_event({"session_id": session_id, "job_status": snapshot.get("job_status")}, event="done")
+                return
+        else:
+            idle += interval
+            if idle >= PROGRESS_STREAM_KEEPALIVE:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+        await asyncio.sleep(interval)
+
+
+@app.get("/progress/{session_id}/stream")
+async def stream_progress(session_id: str, request: Request):
+    """
+    Server-Sent Events: one 'progress' event per progress_tracker write
+    (same fields as /progress plus 'stage'), then a 'done' event once the
+    result is ready. Replaces polling /progress.
+    """
+    import asyncio
+
+    if session_id not in progress_tracker and job_engine.get(session_id) is None:
+        if _shared_progress(session_id) is None:
+            return {"error": "Session not found"}
+        return StreamingResponse(
+            _shared_progress_events(session_id, request),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def _events():
+        q = progress_hub.subscribe(session_id)
+        try:
+            snapshot = dict(progress_tracker.get(session_id) or {})
+            while True:
+                if snapshot:
+                    yield sse_event(snapshot)
+                    if snapshot.get("result_ready"):
+                        yield sse_event({"session_id": session_id, "job_status": snapshot.get("job_status")}, event="done")
+                        return
+                if await request.is_disconnected():
+                    return
+                try:
+                    snapshot = await asyncio.wait_for(q.get(), timeout=PROGRESS_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    snapshot = None
+                    yield ": keep-alive\n\n"
+        finally:
+            progress_hub.unsubscribe(session_id, q)
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # NOTE: /files/{filename} endpoint already defined at top of file
 
 # ── Language detection helper ─────────────────────────────────────
@@ -968,7 +1482,7 @@ def _detect_lang_with_ai(file_path: str, fname_lower: str) -> dict:
                 pdf_path = file_path + "._langdetect.pdf"
                 convert(file_path, pdf_path)
                 temp_images.append(pdf_path)
-                images = convert_pdf_to_images_safe(pdf_path)
+                images = convert_pdf_to_images_safe(pdf_path, last_page=1)
                 if images:
                     img_path = os.path.join(BASE_PATH, f"_langdetect_ai_page.png")
                     images[0].save(img_path, "PNG")
@@ -1187,26 +1701,147 @@ async def detect_language(file: UploadFile = File(...)):
 
 @app.post("/process")
 async def process_workflow(request: Request, file: UploadFile = File(...)):
+    """
+    Enqueue an upload for background processing and return immediately.
+    The frontend polls /progress/{session_id} and fetches the final payload
+    from /result/{session_id} once status is 'complete'.
+    """
+    from fastapi.concurrency import run_in_threadpool
+
     # Gunakan session_id dan language dari header
     session_id = request.headers.get("X-Session-Id") or str(uuid.uuid4())
     doc_language = request.headers.get("X-Language", "id")  # 'id' or 'en'
     direct_translate = request.headers.get("X-Direct-Translate", "false") == "true"
 
+    existing_job = job_engine.get(session_id)
+    if existing_job and existing_job["status"] in ("queued", "running"):
+        return {"success": False, "error": "Session is already being processed", "session_id": session_id}
+    if existing_job is None and state_store.shared:
+        # Job may be running on another worker (result_ready stays False until it ends)
+        shared = state_store.load_progress(session_id)
+        if shared and shared.get("result_ready") is False \
+                and time.time() - shared.get("_updated_at", 0) < JOB_RESULT_TTL_MIN * 60:
+            return {"success": False, "error": "Session is already being processed", "session_id": session_id}
+
+    # Unique temp name per session — concurrent uploads of the same filename must not collide
+    temp_path = os.path.join(BASE_PATH, f"temp_{session_id[:8]}_{file.filename}")
+
+    def _save_upload():
+        # Hash while writing — the SHA-256 is the result-cache key
+        sha = hashlib.sha256()
+        with open(temp_path, "wb") as buffer:
+            for chunk in iter(lambda: file.file.read(1024 * 1024), b""):
+                sha.update(chunk)
+                buffer.write(chunk)
+        return sha.hexdigest()
+
+    file_hash = await run_in_threadpool(_save_upload)
+    paddle_sig = await run_in_threadpool(_paddle_cache_signature)
+    result_key = cache_key(file_hash, doc_language, direct_translate, version=_pipeline_signature(paddle_sig))
+
+    if document_cache is not None:
+        cached = await run_in_threadpool(document_cache.get, result_key)
+        if cached is not None:
+            logger.info(f"⚡ Result cache hit for {file.filename} ({result_key[:12]}) — skipping pipeline")
+            try:
+                os.remove(temp_path)
+            except Exception:
+                pass
+            payload = dict(cached, session_id=session_id, cached=True)
+            await run_in_threadpool(session_store.put, session_id, {
+                "original_filename": file.filename,
+                "structured_data": payload.get("results", []),
+                "images_count": payload.get("total_pages", 0),
+            })
+            job_engine.complete(session_id, payload)
+            progress_tracker[session_id] = {
+                "status": "complete",
+                "current_page": payload.get("total_pages", 0),
+                "total_pages": payload.get("total_pages", 0),
+                "percentage": 100,
+                "message": "Processing complete! (cached result)",
+                "stage": "done",
+                "job_status": "complete",
+                "result_ready": True,
+            }
+            return payload
+
+    try:
+        job_engine.submit(
+            session_id, _run_process_job,
+            session_id, temp_path, file.filename, doc_language, direct_translate,
+            result_key=result_key
+        )
+    except JobQueueFull as e:
+        logger.warning(f"⏳ /process rejected: {e}")
+        try:
+            os.remove(temp_path)
+        except Exception:
+            pass
+        return {"success": False, "error": str(e)}
+
+    return {
+        "success": True,
+        "queued": True,
+        "session_id": session_id,
+        "status": "queued",
+    }
+
+
+@app.get("/result/{session_id}")
+async def get_result(session_id: str):
+    """Final /process payload for a session (pending while the job is still queued/running)."""
+    job = job_engine.get(session_id)
+    if job is None:
+        # Finished / running on another worker?
+        from fastapi.concurrency import run_in_threadpool
+        result = await run_in_threadpool(state_store.load_result, session_id)
+        if result is not None:
+            return result
+        shared = _shared_progress(session_id)
+        if shared is not None and not shared.get("result_ready"):
+            return {"success": False, "pending": True, "status": shared.get("status"), "session_id": session_id}
+        return {"success": False, "error": "Session not found"}
+    if job["status"] in ("queued", "running"):
+        return {"success": False, "pending": True, "status": job["status"], "session_id": session_id}
+    return job["result"]
+
+
+def _collect_result_artifacts(payload: dict) -> list:
+    """Local files referenced by a /process payload (reports, previews, crops) — cached with it."""
+    from urllib.parse import unquote
+    paths = []
+    for key in ("word_url", "pdf_url"):
+        if payload.get(key):
+            paths.append(os.path.join(BASE_PATH, unquote(payload[key].rsplit('/', 1)[-1])))
+    for url in payload.get("clean_pages", []):
+        paths.append(os.path.join(OUTPUT_DIR, unquote(url.rsplit('/', 1)[-1])))
+    for item in payload.get("results", []):
+        paths.append(item.get("crop_local"))
+        paths.append(item.get("source_image_local"))
+    return [p for p in paths if p]
+
+
+def _run_process_job(session_id: str, temp_path: str, filename: str, doc_language: str, direct_translate: bool,
+                     result_key: str = None) -> dict:
+    """
+    Full BioManual pipeline for one upload (runs on a JobEngine worker thread).
+    Returns the same payload /process used to return synchronously.
+    A successful payload is stored in the result cache under result_key.
+    """
     # Initialize Brain per request (fresh context)
     brain_module = BioBrain()
     # Set initial context based on language
     brain_module.current_context = "Chapter 1" if doc_language == 'en' else "BAB 1"
-    logger.info(f"Starting BioManual Workflow for: {file.filename} (Session: {session_id}, Direct Translate: {direct_translate})")
-
-    temp_path = os.path.join(BASE_PATH, f"temp_{file.filename}")
-    with open(temp_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    logger.info(f"Starting BioManual Workflow for: {filename} (Session: {session_id}, Direct Translate: {direct_translate})")
 
     structured_data = []
 
     # Initialize / reset progress (session bisa sudah ada dari /start)
     progress_tracker[session_id] = {
         "status": "starting",
+        "stage": "starting",
+        "result_ready": False,
         "current_page": 0,
         "total_pages": 0,
         "percentage": 0,
@@ -1220,7 +1855,7 @@ async def process_workflow(request: Request, file: UploadFile = File(...)):
         total_pages = 0
 
         # Normalize filename extension
-        fname_lower = file.filename.lower()
+        fname_lower = filename.lower()
 
         # Chapter titles lookup (both Indonesian and English) — used by all paths
         chapter_titles = {
@@ -1247,12 +1882,13 @@ async def process_workflow(request: Request, file: UploadFile = File(...)):
 
         if fname_lower.endswith('.docx') and DIRECT_READER_AVAILABLE:
             print(f"\n{'='*60}")
-            print(f"  📝 File   : {file.filename}")
+            print(f"  📝 File   : {filename}")
             print(f"  ⚡ Mode   : DIRECT READ (No OCR — 100% accurate)")
             print(f"{'='*60}")
 
             progress_tracker[session_id].update({
                 "status": "processing",
+                "stage": "direct_read",
                 "message": "Reading Word document directly (no OCR needed)...",
                 "percentage": 10,
             })
@@ -1270,11 +1906,12 @@ async def process_workflow(request: Request, file: UploadFile = File(...)):
         if fname_lower.endswith('.doc') and not use_direct_docx:
             # .doc format needs conversion to PDF first (python-docx only supports .docx)
             print(f"\n{'='*60}")
-            print(f"  📝 File   : {file.filename}")
+            print(f"  📝 File   : {filename}")
             print(f"  🔄 Step 1 : Converting .doc to PDF for scanning...")
             print(f"{'='*60}")
             progress_tracker[session_id].update({
                 "status": "processing",
+                "stage": "convert",
                 "message": "Converting .doc to PDF...",
                 "percentage": 10,
             })
@@ -1295,6 +1932,7 @@ async def process_workflow(request: Request, file: UploadFile = File(...)):
             print(f"  🔄 Fallback: Converting DOCX to PDF for OCR...")
             progress_tracker[session_id].update({
                 "status": "processing",
+                "stage": "convert",
                 "message": "Converting Word to PDF for OCR fallback...",
                 "percentage": 10,
             })
@@ -1317,13 +1955,14 @@ async def process_workflow(request: Request, file: UploadFile = File(...)):
                 pdf_info = is_text_pdf(temp_path)
                 if pdf_info['is_text_based']:
                     print(f"\n{'='*60}")
-                    print(f"  📄 File   : {file.filename}")
+                    print(f"  📄 File   : {filename}")
                     print(f"  ⚡ Mode   : PDF DIRECT READ (text-based, no OCR needed)")
                     print(f"  📊 Info   : {pdf_info['avg_chars_per_page']} chars/page, {pdf_info['total_pages']} pages")
                     print(f"{'='*60}")
 
                     progress_tracker[session_id].update({
                         "status": "processing",
+                        "stage": "direct_read",
                         "message": "Reading PDF text directly (no OCR needed)...",
                         "percentage": 15,
                     })
@@ -1340,11 +1979,12 @@ async def process_workflow(request: Request, file: UploadFile = File(...)):
             if not use_direct_pdf:
                 progress_tracker[session_id]["message"] = "Converting PDF to images for OCR..."
                 print(f"\n{'='*60}")
-                print(f"  📄 File   : {file.filename}")
+                print(f"  📄 File   : {filename}")
                 print(f"  🔍 Mode   : OCR (scanned/image-based PDF)")
-                print(f"  🔄 Step 1 : Converting PDF to images...")
+                print(f"  🔄 Step 1 : Converting PDF to images (streaming)...")
                 print(f"{'='*60}")
-                images = convert_pdf_to_images_safe(temp_path)
+                # Pages are rendered lazily while the OCR loop consumes them
+                images = PdfPageStream(temp_path)
         elif not use_direct_docx:
             images = [temp_path]
 
@@ -1357,6 +1997,7 @@ async def process_workflow(request: Request, file: UploadFile = File(...)):
             progress_tracker[session_id].update({
                 "total_pages": total_pages,
                 "status": "processing",
+                "stage": "direct_read",
                 "message": f"Processing {len(direct_elements)} extracted elements...",
                 "percentage": 40,
             })
@@ -1443,6 +2084,7 @@ async def process_workflow(request: Request, file: UploadFile = File(...)):
             progress_tracker[session_id].update({
                 "total_pages": total_pages,
                 "status": "processing",
+                "stage": "direct_read",
                 "message": f"Processing {total_pages} page(s) (direct read)...",
                 "percentage": 20,
             })
@@ -1450,9 +2092,11 @@ async def process_workflow(request: Request, file: UploadFile = File(...)):
             print(f"\n  📑 Total  : {total_pages} halaman (direct read)")
             print(f"  🔄 Step 2 : Classifying & normalizing...")
 
-            # Also convert PDF to images for preview & figure crop
+            # Also render PDF pages for preview & figure crop (on demand, one page at a time)
             try:
-                preview_images = convert_pdf_to_images_safe(temp_path)
+                # Fixed DPI: figure crops are cut from these previews
+                preview_images = PdfPageStream(temp_path, dpi_mode="fixed")
+                len(preview_images)
             except Exception:
                 preview_images = []
 
@@ -1475,47 +2119,41 @@ async def process_workflow(request: Request, file: UploadFile = File(...)):
                 cnum = page_data.get('column_num', 0)
                 tot_cols = page_data.get('total_columns', 1)
                 preview_path = None
+                original_img = None   # preview pixels, for figure/table crops
                 
                 if page_num < len(preview_images):
-                    pimg = preview_images[page_num]
-                    
                     if tot_cols > 1:
-                        preview_fname = f"PREVIEW_{file.filename}_{page_num}_col{cnum}.jpg"
+                        preview_fname = f"PREVIEW_{filename}_{page_num}_col{cnum}.jpg"
                     else:
-                        preview_fname = f"PREVIEW_{file.filename}_{page_num}.jpg"
+                        preview_fname = f"PREVIEW_{filename}_{page_num}.jpg"
                         
-                    preview_path = os.path.join(OUTPUT_DIR, preview_fname)
+                    preview_path = artifact_path(os.path.join(OUTPUT_DIR, preview_fname), kind="preview")
+                    preview_fname = os.path.basename(preview_path)
                     
-                    if not os.path.exists(preview_path):
-                        # Save full page first if multi-column to allow cropping
-                        if tot_cols > 1:
-                            full_page_path = os.path.join(OUTPUT_DIR, f"FULL_PAGE_{file.filename}_{page_num}.jpg")
-                            if not os.path.exists(full_page_path):
-                                if not isinstance(pimg, str): pimg.save(full_page_path, "JPEG", quality=90)
-                                else: shutil.copy2(pimg, full_page_path)
-                            
+                    if not (os.path.exists(preview_path) or artifact_writer.is_pending(preview_path)):
+                        page_bgr = _to_bgr(preview_images.get(page_num))
+                        # Multi-column: preview = matching column view of the page (one JPEG encode)
+                        if tot_cols > 1 and page_bgr is not None:
                             try:
                                 # Use visual column splitter to get precise crops
-                                col_crops = _split_columns_simple(full_page_path, f"{file.filename}_{page_num}")
-                                if 0 < cnum <= len(col_crops):
-                                    shutil.copy2(col_crops[cnum-1], preview_path)
-                                else:
-                                    if not isinstance(pimg, str): pimg.save(preview_path, "JPEG", quality=90)
-                                    else: shutil.copy2(pimg, preview_path)
-                            except:
-                                if not isinstance(pimg, str): pimg.save(preview_path, "JPEG", quality=90)
-                                else: shutil.copy2(pimg, preview_path)
-                        else:
-                            if not isinstance(pimg, str): pimg.save(preview_path, "JPEG", quality=90)
-                            else: shutil.copy2(pimg, preview_path)
+                                col_views = _split_column_views(page_bgr)
+                                if 0 < cnum <= len(col_views):
+                                    page_bgr = col_views[cnum - 1]
+                            except Exception:
+                                pass
+                        if page_bgr is not None:
+                            # Encoded in the background; crops below use the pixels in memory
+                            artifact_writer.write(preview_path, page_bgr, kind="preview")
+                            original_img = page_bgr
                     
                     from urllib.parse import quote
                     clean_pages_urls.append(f"http://127.0.0.1:8000/output/{quote(preview_fname)}")
 
-                # Crop figures/tables from preview image
-                original_img = None
-                if preview_path and os.path.exists(preview_path):
-                    original_img = cv2.imread(preview_path)
+                # Crop figures/tables from preview image (already on disk from an earlier run)
+                if original_img is None and preview_path:
+                    artifact_writer.wait([preview_path])
+                    if os.path.exists(preview_path):
+                        original_img = cv2.imread(preview_path)
 
                 for elem_idx, element in enumerate(page_elements):
                     # Crop visual elements (table/figure) from preview image
@@ -1532,9 +2170,11 @@ async def process_workflow(request: Request, file: UploadFile = File(...)):
                         if bx2 > bx1 and by2 > by1:
                             crop_visual = original_img[by1:by2, bx1:bx2]
                             if crop_visual.size > 0:
-                                crop_fname = f"{file.filename}_{page_num}_crop_{element['type']}_{elem_idx}.png"
-                                crop_path = os.path.join(OUTPUT_DIR, crop_fname)
-                                cv2.imwrite(crop_path, crop_visual)
+                                crop_path = artifact_writer.write(
+                                    os.path.join(OUTPUT_DIR, f"{filename}_{page_num}_crop_{element['type']}_{elem_idx}.png"),
+                                    crop_visual, kind="crop"
+                                )
+                                crop_fname = os.path.basename(crop_path)
                                 from urllib.parse import quote
                                 element['crop_url'] = f"http://127.0.0.1:8000/output/{quote(crop_fname)}"
                                 element['crop_local'] = crop_path
@@ -1616,168 +2256,174 @@ async def process_workflow(request: Request, file: UploadFile = File(...)):
             progress_tracker[session_id]["total_pages"] = total_pages
             progress_tracker[session_id]["message"] = f"Processing {total_pages} page(s)..."
             progress_tracker[session_id]["status"] = "processing"
+            progress_tracker[session_id]["stage"] = "ocr"
 
             print(f"\n  📑 Total  : {total_pages} halaman")
             print(f"  🔄 Step 2 : Scanning setiap halaman (OCR)...")
 
-            # ───── MAIN OCR PROCESSING LOOP ─────────────────────────────────
-            for i, img_src in enumerate(images):
+            # ───── STEP 2: STAGED OCR PIPELINE ───────────────────────────────
+            # rasterize → split → layout → ocr → normalize run on their own
+            # threads with bounded queues; pages are rendered lazily, so page N+1
+            # rasterizes while page N is in layout and page N-1 is in OCR.
+            # Items come out in page order, so BioBrain.semantic_mapping below
+            # keeps its chapter context.
+            if not model_loader.is_ready():
+                progress_tracker[session_id]["message"] = "Waiting for OCR models to finish loading..."
+            page_pipeline = _build_page_pipeline(brain_module, filename, doc_language, direct_translate)
+            page_source = _rasterize_pages(images)
+
+            last_page_reported = -1
+            skipped_pages = 0   # blank / figure-only pages that skipped layout + OCR
+            duplicate_pages = 0 # near-duplicates of an earlier page (OCR reused)
+            for task in page_pipeline.run(page_source):
+                scan_result = task["scan_result"]
+                i = task["page_index"]
+                col_idx = task["col_idx"]
                 current_page = i + 1
-                pct = int((current_page / total_pages) * 100)
 
-                progress_tracker[session_id].update({
-                    "status": "processing",
-                    "current_page": current_page,
-                    "percentage": pct,
-                    "message": f"Processing page {current_page} of {total_pages}..."
-                })
-                _print_progress(current_page, total_pages, f"Hal. {current_page}/{total_pages}  ({pct}%)")
-                logger.info(f"Processing page {current_page}/{total_pages}")
+                if isinstance(scan_result, dict) and col_idx == 0:
+                    if scan_result.get("duplicate"):
+                        duplicate_pages += 1
+                    elif scan_result.get("page_kind") in SKIPPED_KINDS and task["num_cols"] == 1:
+                        skipped_pages += 1
+
+                if i != last_page_reported:
+                    last_page_reported = i
+                    pct = int((current_page / total_pages) * 100)
+                    notes = []
+                    if skipped_pages:
+                        notes.append(f"{skipped_pages} blank page(s) skipped")
+                    if duplicate_pages:
+                        notes.append(f"{duplicate_pages} duplicate page(s) reused")
+                    skipped_note = f" — {', '.join(notes)}" if notes else ""
+                    progress_tracker[session_id].update({
+                        "status": "processing",
+                        "stage": "ocr",
+                        "current_page": current_page,
+                        "percentage": pct,
+                        "message": f"Processing page {current_page} of {total_pages}...{skipped_note}",
+                        "skipped_pages": skipped_pages,
+                        "duplicate_pages": duplicate_pages,
+                        "pipeline": page_pipeline.stats(),
+                    })
+                    _print_progress(current_page, total_pages, f"Hal. {current_page}/{total_pages}  ({pct}%)")
+                    logger.info(f"Processing page {current_page}/{total_pages} [{page_pipeline.stats_line()}]")
 
-                # Resolve image path
-                page_path = img_src
-                if not isinstance(img_src, str):
-                    page_path = os.path.join(BASE_PATH, f"page_{i}.png")
-                    img_src.save(page_path, "PNG")
+                # Handle return format
+                if isinstance(scan_result, list):
+                    layout_elements = scan_result
+                    clean_img_url = None
+                else:
+                    layout_elements = scan_result.get('elements', [])
+                    clean_path = scan_result.get('clean_image_path')
+                    if clean_path and (os.path.exists(clean_path) or artifact_writer.is_pending(clean_path)):
+                        from urllib.parse import quote
+                        fname_base = os.path.basename(clean_path)
+                        clean_img_url = f"http://127.0.0.1:8000/output/{quote(fname_base)}"
+                        clean_pages_urls.append(clean_img_url)
+                        col_label = f"page {current_page} col {col_idx+1}" if task["num_cols"] > 1 else f"page {current_page}"
+                        logger.info(f"📷 Preview {col_label}: {clean_img_url}")
+                    else:
+                        clean_img_url = None
 
-                # ── Column detection: split multi-column pages ──
-                try:
-                    col_paths = _split_columns_simple(page_path, f"{file.filename}_{i}")
-                except Exception as e:
-                    logger.warning(f"Column split failed (non-fatal): {e}")
-                    col_paths = [page_path]
+                # B. THE BRAIN (Classify + Normalize) — per column, in page order
+                for element in layout_elements:
+                    if direct_translate:
+                        corrected = element['text']
+                        highlights = []
+                        normalized_result = {
+                            'original': corrected,
+                            'corrected': corrected,
+                            'typos': 0,
+                            'has_typo': False
+                        }
+                        # Bypass standardization, put all inside initial chapter
+                        bab_id = "Chapter 1" if doc_language == 'en' else "BAB 1"
+                        bab_title = "Translated Content" if doc_language == 'en' else "Konten Terjemahan"
+                        elem_lang = doc_language
+                        element['text'] = corrected
+                    else:
+                        # normalize_text + text_corrector already ran in the pipeline's normalize stage
+                        normalized_result = element.pop('_normalized')
+                        highlights = element.pop('_highlights')
+                        corrected = normalized_result['corrected']
 
-                if len(col_paths) > 1:
-                    logger.info(f"📊 Page {current_page}: split into {len(col_paths)} columns")
+                        # Detect element language (from AI or auto-detect from text)
+                        elem_lang = element.get('lang', '')
+                        if not elem_lang:
+                            txt_lower = element['text'].lower()
+                            en_keywords = ['the', 'and', 'for', 'user', 'manual', 'this', 'with', 'installation',
+                                           'operation', 'maintenance', 'warning', 'caution', 'chapter',
+                                           'table', 'figure', 'if', 'is', 'are', 'can', 'not', 'may']
+                            en_hits = sum(1 for kw in en_keywords if f' {kw} ' in f' {txt_lower} ')
+                            elem_lang = 'en' if en_hits >= 2 else 'id'
 
-                # ── Process each column (or full page if single column) ──
-                for col_idx, col_path in enumerate(col_paths):
-                    col_suffix = f"_col{col_idx}" if len(col_paths) > 1 else ""
+                        # Use AI-provided chapter if available, else fallback to BioBrain
+                        bab_id = element.get('chapter', '')
+                        if bab_id and bab_id in chapter_titles:
+                            bab_title = chapter_titles[bab_id]
+                        else:
+                            bab_id, bab_title = brain_module.semantic_mapping(element)
 
-                    # A. THE EYE (Scan) — pass language for OCR engine selection
-                    scan_result = vision_module.scan_document(
-                        col_path, f"{file.filename}_{i}{col_suffix}", lang=doc_language, direct_translate=direct_translate
-                    )
+                        # Remap BAB→Chapter or Chapter→BAB based on selected language
+                        if doc_language == 'en' and bab_id.startswith('BAB '):
+                            bab_num = bab_id.replace('BAB ', '')
+                            new_key = f"Chapter {bab_num}"
+                            if new_key in chapter_titles:
+                                bab_id = new_key
+                                bab_title = chapter_titles[new_key]
+                        elif doc_language == 'id' and bab_id.startswith('Chapter '):
+                            bab_num = bab_id.replace('Chapter ', '')
+                            new_key = f"BAB {bab_num}"
+                            if new_key in chapter_titles:
+                                bab_id = new_key
+                                bab_title = chapter_titles[new_key]
+
+                    # ── Enforce target language on ALL text fields ──
+                    _clean_original = enforce_language(normalized_result['original'], lang=doc_language)
+                    _clean_normalized = enforce_language(normalized_result['corrected'], lang=doc_language)
+
+                    structured_data.append({
+                        "chapter_id"    : bab_id,
+                        "chapter_title" : bab_title,
+                        "type"          : element['type'],
+                        "original"      : _clean_original,
+                        "normalized"    : _clean_normalized,
+                        "typos"         : normalized_result['typos'],
+                        "has_typo"      : normalized_result['has_typo'],
+                        "text_confidence": element.get('confidence', 1.0),
+                        "match_score"   : 100,
+                        "lang"          : elem_lang,
+                        "crop_url"      : element.get('crop_url'),
+                        "crop_local"    : element.get('crop_local'),
+                        "source_image_local": element.get('source_image_local'),
+                        "bbox"          : element.get('bbox'),
+                        "highlights"    : highlights,
+                    })
+
+            if skipped_pages:
+                logger.info(f"⬜ {skipped_pages}/{total_pages} blank or figure-only page(s) skipped layout + OCR")
+            if duplicate_pages:
+                logger.info(f"♻️ {duplicate_pages}/{total_pages} near-duplicate page(s) cloned instead of scanned")
 
-                    # Handle return format
-                    if isinstance(scan_result, list):
-                        layout_elements = scan_result
-                        clean_img_url = None
-                    else:
-                        layout_elements = scan_result.get('elements', [])
-                        clean_path = scan_result.get('clean_image_path')
-                        if clean_path and os.path.exists(clean_path):
-                            from urllib.parse import quote
-                            fname_base = os.path.basename(clean_path)
-                            clean_img_url = f"http://127.0.0.1:8000/output/{quote(fname_base)}"
-                            clean_pages_urls.append(clean_img_url)
-                            col_label = f"page {current_page} col {col_idx+1}" if len(col_paths) > 1 else f"page {current_page}"
-                            logger.info(f"📷 Preview {col_label}: {clean_img_url}")
-                        else:
-                            clean_img_url = None
-
-                    # B. THE BRAIN (Classify + Normalize) — per column
-                    for element in layout_elements:
-                        if direct_translate:
-                            corrected = element['text']
-                            highlights = []
-                            normalized_result = {
-                                'original': corrected,
-                                'corrected': corrected,
-                                'typos': 0,
-                                'has_typo': False
-                            }
-                            # Bypass standardization, put all inside initial chapter
-                            bab_id = "Chapter 1" if doc_language == 'en' else "BAB 1"
-                            bab_title = "Translated Content" if doc_language == 'en' else "Konten Terjemahan"
-                            elem_lang = doc_language
-                            element['text'] = corrected
-                        else:
-                            normalized_result = brain_module.normalize_text(element['text'], lang=doc_language)
-                            # Terapkan text_corrector SETELAH BioBrain — gunakan versi highlights
-                            correction_result = apply_text_correction_with_highlights(
-                                normalized_result['corrected'], lang=doc_language
-                            )
-                            corrected  = correction_result['text']
-                            highlights = correction_result['highlights']
-                            element['text'] = corrected
-                            normalized_result['corrected'] = corrected
-
-                            # Detect element language (from AI or auto-detect from text)
-                            elem_lang = element.get('lang', '')
-                            if not elem_lang:
-                                txt_lower = element['text'].lower()
-                                en_keywords = ['the', 'and', 'for', 'user', 'manual', 'this', 'with', 'installation',
-                                               'operation', 'maintenance', 'warning', 'caution', 'chapter',
-                                               'table', 'figure', 'if', 'is', 'are', 'can', 'not', 'may']
-                                en_hits = sum(1 for kw in en_keywords if f' {kw} ' in f' {txt_lower} ')
-                                elem_lang = 'en' if en_hits >= 2 else 'id'
-
-                            # Use AI-provided chapter if available, else fallback to BioBrain
-                            bab_id = element.get('chapter', '')
-                            if bab_id and bab_id in chapter_titles:
-                                bab_title = chapter_titles[bab_id]
-                            else:
-                                bab_id, bab_title = brain_module.semantic_mapping(element)
-
-                            # Remap BAB→Chapter or Chapter→BAB based on selected language
-                            if doc_language == 'en' and bab_id.startswith('BAB '):
-                                bab_num = bab_id.replace('BAB ', '')
-                                new_key = f"Chapter {bab_num}"
-                                if new_key in chapter_titles:
-                                    bab_id = new_key
-                                    bab_title = chapter_titles[new_key]
-                            elif doc_language == 'id' and bab_id.startswith('Chapter '):
-                                bab_num = bab_id.replace('Chapter ', '')
-                                new_key = f"BAB {bab_num}"
-                                if new_key in chapter_titles:
-                                    bab_id = new_key
-                                    bab_title = chapter_titles[new_key]
-
-                        # ── Enforce target language on ALL text fields ──
-                        _clean_original = enforce_language(normalized_result['original'], lang=doc_language)
-                        _clean_normalized = enforce_language(normalized_result['corrected'], lang=doc_language)
-
-                        structured_data.append({
-                            "chapter_id"    : bab_id,
-                            "chapter_title" : bab_title,
-                            "type"          : element['type'],
-                            "original"      : _clean_original,
-                            "normalized"    : _clean_normalized,
-                            "typos"         : normalized_result['typos'],
-                            "has_typo"      : normalized_result['has_typo'],
-                            "text_confidence": element.get('confidence', 1.0),
-                            "match_score"   : 100,
-                            "lang"          : elem_lang,
-                            "crop_url"      : element.get('crop_url'),
-                            "crop_local"    : element.get('crop_local'),
-                            "source_image_local": element.get('source_image_local'),
-                            "bbox"          : element.get('bbox'),
-                            "highlights"    : highlights,
-                        })
-
-                # Cleanup temp page image
-                if not isinstance(img_src, str):
-                    for attempt in range(3):
-                        try:
-                            if os.path.exists(page_path):
-                                os.remove(page_path)
-                            break
-                        except PermissionError:
-                            time.sleep(0.5)
-                        except Exception:
-                            pass
         # ── STEP 2.6: AI Cover Page Extraction ─────────────────────────
         # Extract product name & description strictly from the first page (cover) using AI
+        from urllib.parse import unquote
         first_page_image_path = None
+        # First page's preview (whole page or first column) in the configured preview format
+        cover_previews = {
+            artifact_path(os.path.join(OUTPUT_DIR, f"PREVIEW_{filename}_0{suffix}.jpg"), kind="preview")
+            for suffix in ("", "_col0")
+        }
         for img in clean_pages_urls:
-            filename = img.split('/')[-1]
-            local_path = os.path.join(OUTPUT_DIR, filename)
-            if ("_0.jpg" in filename or "_0_col0.jpg" in filename or "_0.png" in filename) and os.path.exists(local_path):
-                first_page_image_path = local_path
+            local_path = os.path.join(OUTPUT_DIR, unquote(img.split('/')[-1]))
+            if local_path in cover_previews:
+                artifact_writer.wait([local_path])   # may still be encoding
+                if os.path.exists(local_path):
+                    first_page_image_path = local_path
                 break
         
-        if not first_page_image_path and images and isinstance(images[0], str):
+        if not first_page_image_path and isinstance(images, list) and images and isinstance(images[0], str):
             first_page_image_path = images[0]
             
         cover_ai_result = None
@@ -1862,7 +2508,7 @@ Respond ONLY with a valid pure JSON object in this exact format, with NO markdow
                 if item.get('type') in ('title', 'heading'):
                     text = (item.get('normalized', '') or '').strip()
                     source_image = item.get('source_image_local') or ''
-                    is_first_page = f"{file.filename}_0" in source_image
+                    is_first_page = f"{filename}_0" in source_image
                     if is_first_page and len(text) < 40 and not any(kw in text.lower() for kw in ('manual', 'table of contents')):
                         item['is_cover'] = True
                         cover_count += 1
@@ -1882,12 +2528,14 @@ Respond ONLY with a valid pure JSON object in this exact format, with NO markdow
         # STEP 3: THE ARCHITECT (Build)
         progress_tracker[session_id].update({
             "status": "building",
+            "stage": "report",
             "percentage": 95,
             "message": "Generating Word/PDF reports..."
         })
         print(f"\n  🏗️  Step 3 : Menyusun laporan Word ({len(structured_data)} elemen)...")
         
-        result = architect_module.build_report(structured_data, file.filename, lang=doc_language)
+        _wait_for_crops(structured_data)
+        result = architect_module.build_report(structured_data, filename, lang=doc_language)
         
         from urllib.parse import quote
         word_url = f"http://127.0.0.1:8000/files/{quote(result['word_file'])}"
@@ -1899,11 +2547,12 @@ Respond ONLY with a valid pure JSON object in this exact format, with NO markdow
         print(f"{'='*60}\n")
         progress_tracker[session_id].update({
             "status": "complete",
+            "stage": "complete",
             "percentage": 100,
             "message": "Processing complete!"
         })
         
-        return {
+        payload = {
             "success": True,
             "session_id": session_id,
             "results": structured_data,
@@ -1913,6 +2562,11 @@ Respond ONLY with a valid pure JSON object in this exact format, with NO markdow
             "clean_pages": clean_pages_urls,
             "missing_chapters": list(set(all_chapters) - existing_chapters)
         }
+        if document_cache is not None and result_key:
+            artifacts = _collect_result_artifacts(payload)
+            artifact_writer.wait(artifacts)
+            document_cache.put(result_key, payload, artifacts)
+        return payload
 
     except Exception as e:
         logger.error(f"Workflow Failed: {e}")
@@ -1927,27 +2581,30 @@ Respond ONLY with a valid pure JSON object in this exact format, with NO markdow
 
         # Store session data for potential supplementary uploads
         if structured_data and session_id:
-             active_sessions[session_id] = {
-                 "original_filename": file.filename,
-                 "structured_data": structured_data,
-                 "images_count": len(images) if 'images' in locals() else 0
-             }
+            try:
+                session_store.put(session_id, {
+                    "original_filename": filename,
+                    "structured_data": structured_data,
+                    "images_count": len(images) if 'images' in locals() else 0
+                })
+            except Exception as e:
+                logger.warning(f"Could not store session {session_id}: {e}")
 
 
 # ==========================================
 # TRANSLATE ENDPOINT
 # ==========================================
 @app.post("/translate/{session_id}")
-async def translate_session(session_id: str):
+def translate_session(session_id: str):
     """
     Translate semua teks dalam session dari English → Bahasa Indonesia.
     Menggunakan OpenRouter AI untuk terjemahan yang akurat.
     Setelah translate, regenerate Word/PDF dengan teks terjemahan.
     """
-    if session_id not in active_sessions:
+    session = session_store.get(session_id)
+    if session is None:
         return {"success": False, "error": "Session not found"}
-    
-    session = active_sessions[session_id]
+
     structured_data = session.get("structured_data", [])
     
     if not structured_data:
@@ -2074,8 +2731,10 @@ Texts to translate:
         
         # Update session
         session["structured_data"] = structured_data
+        session_store.put(session_id, session)
         
         # Regenerate Word/PDF with translated text
+        _wait_for_crops(structured_data)
         result = architect_module.build_report(structured_data, session["original_filename"], lang='id')
         from urllib.parse import quote
         word_url = f"http://127.0.0.1:8000/files/{quote(result['word_file'])}"
@@ -2096,7 +2755,7 @@ Texts to translate:
         return {"success": False, "error": str(e)}
 
 @app.post("/supplement/{session_id}")
-async def supplement_workflow(
+def supplement_workflow(
     session_id: str, 
     files: list[UploadFile] = File(...),
     target_chapter: str = Form(None)
@@ -2106,23 +2765,33 @@ async def supplement_workflow(
     Menggabungkan hasil ekstraksi baru dengan yang lama.
     Mendukung multiple files upload sekaligus.
     """
-    if session_id not in active_sessions:
+    existing_session = session_store.get(session_id)
+    if existing_session is None:
         return {"success": False, "error": "Session ID not found or expired"}
-    
-    existing_session = active_sessions[session_id]
+
     original_data = existing_session["structured_data"]
     base_filename = existing_session["original_filename"]
     
     file_names = [f.filename for f in files]
     logger.info(f"Supplementing Session {session_id} with files: {file_names}, target_chapter: {target_chapter}")
     
-    progress_tracker[session_id].update({
+    # Entry bisa sudah di-purge (_state_janitor / restart) walau session masih ada → buat ulang
+    progress_tracker[session_id] = {
         "status": "processing_supplement",
+        "stage": "supplement",
+        "result_ready": False,     # masih True dari /process → SSE stream langsung tutup
+        "current_page": 0,
+        "total_pages": 0,
+        "percentage": 0,
         "message": f"Processing {len(files)} supplementary file(s)..."
-    })
+    }
+    if not model_loader.is_ready():
+        progress_tracker[session_id]["message"] = "Waiting for OCR models to finish loading..."
 
     supplementary_data = []
     total_new_pages = 0
+    # One index across all uploaded files: repeated pages are scanned once per request
+    dedupe = DuplicatePageIndex() if PAGE_DEDUPE else None
 
     try:
         brain_module = BioBrain() 
@@ -2136,7 +2805,7 @@ async def supplement_workflow(
             # STEP 1: IMAGE CONVERSION (Reuse logic)
             images = []
             if file.filename.lower().endswith('.pdf'):
-                images = convert_pdf_to_images_safe(temp_path)
+                images = PdfPageStream(temp_path)
             else:
                 images = [temp_path]
                 
@@ -2147,20 +2816,19 @@ async def supplement_workflow(
             existing_chapter_ids = set(item.get('chapter_id') for item in original_data + supplementary_data if item.get('chapter_id'))
             supp_lang = 'en' if any(ch.startswith('Chapter') for ch in existing_chapter_ids) else 'id'
             
-            # STEP 2: LOOP & PROCESS
-            for i, img_src in enumerate(images):
-                # Resolve image path
-                page_path = img_src
-                if not isinstance(img_src, str):
-                    page_path = os.path.join(BASE_PATH, f"supp_{session_id}_{file_index}_{i}.png")
-                    img_src.save(page_path, "PNG")
-
-                # A. THE EYE (Scan)
-                if vision_module:
-                    scan_result = vision_module.scan_document(page_path, f"supp_{file.filename}_{i}", lang=supp_lang)
-                else:
-                    scan_result = []
-                
+            # STEP 2: LOOP & PROCESS — pages handed over in memory, rendered lazily
+            scan_tasks = (
+                {
+                    "page_index"   : i,
+                    "image"        : _to_bgr(img_src),
+                    "filename_base": f"supp_{file.filename}_{i}",
+                    "raster_dpi"   : _raster_dpi(images, i),
+                }
+                for i, img_src in enumerate(images)
+            )
+
+            # A. THE EYE (Scan) — parallel when OCR_WORKERS > 1, results in page order
+            for task, scan_result in _iter_scan_results(scan_tasks, supp_lang, dedupe=dedupe):
                 if isinstance(scan_result, list):
                     layout_elements = scan_result
                 else:
@@ -2216,15 +2884,7 @@ async def supplement_workflow(
                         "bbox"          : element.get('bbox'),
                         "highlights"    : highlights,
                     })
-                
-                # Cleanup
-                if not isinstance(img_src, str):
-                     try:
-                         if os.path.exists(page_path):
-                             os.remove(page_path)
-                     except Exception:
-                         pass
-            
+
             # Cleanup temp file
             if os.path.exists(temp_path):
                 os.remove(temp_path)
@@ -2236,11 +2896,13 @@ async def supplement_workflow(
         combined_data = _merge_chopped_paragraphs(combined_data)
         
         # Update session data
-        active_sessions[session_id]["structured_data"] = combined_data
-        active_sessions[session_id]["images_count"] += total_new_pages
+        existing_session["structured_data"] = combined_data
+        existing_session["images_count"] = existing_session.get("images_count", 0) + total_new_pages
+        session_store.put(session_id, existing_session)
         
         # Re-run Architect
         progress_tracker[session_id]["message"] = "Regenerating reports with merged data..."
+        _wait_for_crops(combined_data)
         result = architect_module.build_report(combined_data, base_filename)
         
         from urllib.parse import quote
@@ -2249,6 +2911,9 @@ async def supplement_workflow(
         
         progress_tracker[session_id].update({
             "status": "complete",
+            "stage": "complete",
+            "job_status": "complete",
+            "result_ready": True,
             "message": "Supplementary merge complete!"
         })
         
@@ -2261,13 +2926,24 @@ async def supplement_workflow(
             "results": combined_data,
             "word_url": word_url,
             "pdf_url": pdf_url,
-            "total_pages": active_sessions[session_id]["images_count"],
+            "total_pages": existing_session["images_count"],
             "missing_chapters": list(set(all_ch_final) - set(item['chapter_id'] for item in combined_data))
         }
 
     except Exception as e:
         logger.error(f"Supplement Workflow Failed: {e}")
+        progress_tracker[session_id] = {
+            "status": "failed",
+            "stage": "failed",
+            "job_status": "failed",
+            "result_ready": True,
+            "message": f"Supplement failed: {e}"
+        }
         return {"success": False, "error": str(e)}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+    if UVICORN_WORKERS > 1:
+        # Each worker is a separate process with its own models; shared state via STATE_BACKEND
+        uvicorn.run("main:app", host="127.0.0.1", port=8000, workers=UVICORN_WORKERS)
+    else:
+        uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
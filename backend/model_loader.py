@@ -0,0 +1,180 @@
+"""
+MODEL LOADER — Background warm-up and readiness of the heavy models
+====================================================================
+
+main.py used to build the vision engine at import time: torch + Surya
+imports, FoundationPredictor / LayoutPredictor and PaddleOCR all ran
+before uvicorn could bind the port, and endpoints that never touch OCR
+(/detect-language, /generate_custom_report, /translate) waited with them.
+
+ModelLoader runs registered loaders on one background thread, in order:
+
+    loader = get_model_loader()
+    loader.register("vision_engine", load_fn, required=True)   # load_fn(loader) → object
+    loader.start()                                   # returns at once
+    engine = loader.get("vision_engine")             # blocks only the callers that need it
+    loader.status()                                  # → GET /ready
+
+A loader can report the models it builds through `loader.track(name)`
+(BioVisionHybrid reports surya_layout, tesseract and paddleocr), so
+/ready shows per-model state:
+
+    pending → loading → ready | failed | unavailable (loader returned None)
+
+get() on a model that has not started yet loads it on the calling thread,
+so MODEL_WARMUP=lazy (nothing at startup) still works. A loader registered
+with retry=True (e.g. the vision server connection) that raised is tried
+again by the next get() instead of staying None for the process lifetime.
+
+MODEL_WARMUP:
+  background → start loading at server startup on a daemon thread (default)
+  lazy       → load on the first request that needs a model
+  eager      → load at startup before serving (previous behaviour)
+
+Configuration (.env):
+  MODEL_WARMUP        = background
+  MODEL_READY_TIMEOUT = 600    # seconds a request waits for a model still loading
+
+Updated: March 2026
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger("BioManual.ModelLoader")
+
+MODEL_WARMUP        = os.getenv("MODEL_WARMUP", "background").lower()
+MODEL_READY_TIMEOUT = float(os.getenv("MODEL_READY_TIMEOUT", "600"))
+
+
+class ModelLoader:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaders = {}      # name → (fn, required, retry)
+        self._order = []
+        self._values = {}
+        self._claimed = set()
+        self._done = {}         # name → Event, set once the loader finished (any outcome)
+        self._models = {}       # name → {"state", "load_ms", "error"}
+        self._thread = None
+        self._mode = None
+        self._created = time.time()
+
+    def register(self, name: str, fn, required: bool = False, retry: bool = False):
+        """fn(loader) → model object (None = not available in this setup); retry = load again after a failure."""
+        with self._lock:
+            self._loaders[name] = (fn, required, retry)
+            self._order.append(name)
+            self._done[name] = threading.Event()
+            self._models[name] = {"state": "pending", "required": required}
+
+    # ── state ───────────────────────────────────────────────────
+    def _set(self, name: str, state: str, **extra):
+        with self._lock:
+            entry = self._models.setdefault(name, {})
+            entry["state"] = state
+            entry.update(extra)
+
+    @contextmanager
+    def track(self, name: str):
+        """Record loading → ready / failed (with timing) for one model."""
+        self._set(name, "loading")
+        t0 = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self._set(name, "failed", load_ms=round((time.perf_counter() - t0) * 1000), error=str(e))
+            raise
+        self._set(name, "ready", load_ms=round((time.perf_counter() - t0) * 1000))
+
+    def mark(self, name: str, state: str, error: str = None, **extra):
+        if error:
+            extra["error"] = error
+        self._set(name, state, **extra)
+
+    # ── loading ─────────────────────────────────────────────────
+    def _load(self, name: str):
+        with self._lock:
+            if name in self._claimed:
+                return
+            self._claimed.add(name)
+            if self._done[name].is_set():    # retry after a failed load
+                self._done[name] = threading.Event()
+            done = self._done[name]
+            fn, _, retry = self._loaders[name]
+        try:
+            with self.track(name):
+                value = fn(self)
+            if value is None:
+                self.mark(name, "unavailable")
+            self._values[name] = value
+        except Exception as e:
+            logger.error(f"❌ Model '{name}' failed to load: {e}" + (" — retried on next use" if retry else ""))
+            self._values[name] = None
+            if retry:
+                with self._lock:
+                    self._claimed.discard(name)
+        finally:
+            done.set()
+
+    def _load_all(self):
+        t0 = time.perf_counter()
+        for name in list(self._order):
+            self._load(name)
+        logger.info(f"✓ Model warm-up finished in {time.perf_counter() - t0:.1f}s")
+
+    def start(self, mode: str = None):
+        """Begin warm-up according to MODEL_WARMUP; returns immediately unless mode is 'eager'."""
+        self._mode = mode or MODEL_WARMUP
+        if self._mode == "lazy":
+            logger.info("ℹ️ MODEL_WARMUP=lazy — models load on first use")
+            return
+        if self._mode == "eager":
+            self._load_all()
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._load_all, name="model-warmup", daemon=True)
+            self._thread.start()
+            logger.info(f"🔥 Model warm-up started in background ({', '.join(self._order)})")
+
+    def get(self, name: str, timeout: float = None):
+        """The loaded model (None if unavailable); waits while it is still loading."""
+        if name not in self._done:
+            return None
+        self._load(name)    # no-op unless nobody has started it (lazy mode)
+        timeout = MODEL_READY_TIMEOUT if timeout is None else timeout
+        if not self._done[name].wait(timeout):
+            logger.warning(f"⚠️ Model '{name}' still loading after {timeout:.0f}s")
+            return None
+        return self._values.get(name)
+
+    def is_ready(self, name: str = None) -> bool:
+        """One model finished loading, or (name=None) every required model did."""
+        names = [name] if name else [n for n, (_, req, _) in self._loaders.items() if req]
+        return all(n in self._done and self._done[n].is_set() for n in names)
+
+    def status(self) -> dict:
+        with self._lock:
+            models = {name: dict(entry) for name, entry in self._models.items()}
+        return {
+            "ready": self.is_ready(),
+            "warmup": self._mode or MODEL_WARMUP,
+            "uptime_s": round(time.time() - self._created, 1),
+            "models": models,
+        }
+
+
+_loader = None
+_loader_lock = threading.Lock()
+
+
+def get_model_loader() -> ModelLoader:
+    global _loader
+    with _loader_lock:
+        if _loader is None:
+            _loader = ModelLoader()
+    return _loader
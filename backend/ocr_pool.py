@@ -0,0 +1,150 @@
+"""
+OCR PROCESS POOL — Page-parallel scanning with BioVisionHybrid workers
+======================================================================
+
+Surya + PaddleOCR run on one core per call. With a process pool every
+worker owns its own BioVisionHybrid (models loaded once per worker in the
+pool initializer), so the pages / columns of one document are scanned
+concurrently.
+
+Results are yielded strictly in task order — the caller runs the stateful
+BioBrain.semantic_mapping pass on them afterwards, so chapter context
+(current_context) is identical to the sequential loop.
+
+Configuration (.env):
+  OCR_WORKERS = 0   # 0 or 1 = scan in-process (shared vision engine)
+                    # N > 1  = N worker processes, each with its own models
+                    # Each worker holds a full copy of Surya + PaddleOCR (~1.5-2 GB RAM).
+  OCR_FAST_MODE = true  # scan-mode default of vision_engine (here so the API can read it
+                        # without importing the models)
+
+Updated: March 2026
+"""
+
+import os
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger("BioManual.OCRPool")
+
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0"))
+OCR_FAST_MODE = os.getenv("OCR_FAST_MODE", "true").lower() == "true"
+
+# ──────────────────────────────────────────────
+# Worker-process side
+# ──────────────────────────────────────────────
+_worker_engine = None
+
+
+def _init_worker(mode: str):
+    """Pool initializer: load the vision models once per worker process."""
+    global _worker_engine
+    from vision_engine import create_vision_engine
+    _worker_engine = create_vision_engine(mode=mode)
+    logger.info(f"✓ OCR worker {os.getpid()} ready")
+
+
+def _ping_worker():
+    return os.getpid(), getattr(_worker_engine, "_paddle_signature", None)
+
+
+def _scan_in_worker(task: dict, lang: str, direct_translate: bool):
+    if _worker_engine is None:
+        return {"elements": [], "clean_image_path": None}
+    if task.get("image") is not None:
+        # In-memory page/column (pickled ndarray) — no PNG round-trip
+        result = _worker_engine.scan_image(
+            task["image"], task["filename_base"],
+            lang=lang, direct_translate=direct_translate, raster_dpi=task.get("raster_dpi")
+        )
+    else:
+        result = _worker_engine.scan_document(
+            task["image_path"], task["filename_base"],
+            lang=lang, direct_translate=direct_translate
+        )
+    # The parent cannot see this process's write queue: finish this page's files first
+    if isinstance(result, dict):
+        paths = [result.get("clean_image_path")] + [e.get("crop_local") for e in result.get("elements", [])]
+        _worker_engine.artifacts.wait(paths)
+    return result
+
+
+# ──────────────────────────────────────────────
+# Parent side
+# ──────────────────────────────────────────────
+class OCRProcessPool:
+    """
+    Pool of BioVisionHybrid worker processes.
+    scan_many() keeps at most `prefetch` tasks in flight and yields
+    (task, scan_result) pairs in the original order.
+    """
+
+    def __init__(self, workers: int, mode: str = "hybrid"):
+        self.workers = workers
+        self.prefetch = workers * 2
+        self.paddle_signature = None
+        # spawn: torch / paddle are not fork-safe (and Windows only has spawn)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(mode,),
+        )
+        logger.info(f"✓ OCR Process Pool: {workers} workers (models load on first use)")
+
+    def warm_up(self):
+        """Start the workers now (each loads its models in the initializer) and wait for them."""
+        futures = [self._executor.submit(_ping_worker) for _ in range(self.workers)]
+        answers = [f.result() for f in futures]
+        pids = {pid for pid, _ in answers}
+        # PaddleOCR profile as the workers resolved it (result-cache key in the API)
+        self.paddle_signature = next((sig for _, sig in answers if sig), None)
+        logger.info(f"✓ OCR Process Pool warm: {len(pids)}/{self.workers} worker(s) answered")
+        return self
+
+    def submit(self, task: dict, lang: str = 'id', direct_translate: bool = False):
+        """Schedule one scan; returns a Future resolving to the scan_document result."""
+        return self._executor.submit(_scan_in_worker, task, lang, direct_translate)
+
+    def scan_many(self, tasks, lang: str = 'id', direct_translate: bool = False):
+        pending = deque()
+        task_iter = iter(tasks)
+
+        def _fill():
+            while len(pending) < self.prefetch:
+                task = next(task_iter, None)
+                if task is None:
+                    return
+                pending.append((task, self.submit(task, lang, direct_translate)))
+
+        _fill()
+        while pending:
+            task, future = pending.popleft()
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"OCR worker failed on {task.get('filename_base')}: {e}")
+                result = {"elements": [], "clean_image_path": None}
+            _fill()
+            yield task, result
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_ocr_pool(mode: str = "hybrid"):
+    """Shared pool instance, or None when OCR_WORKERS <= 1 (in-process mode)."""
+    global _pool
+    if OCR_WORKERS <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = OCRProcessPool(OCR_WORKERS, mode=mode)
+    return _pool
@@ -0,0 +1,206 @@
+"""
+PADDLE PROFILE — Named inference profiles for PaddleOCR (CPU tuning)
+=====================================================================
+
+BioVisionHybrid built PaddleOCR with use_gpu=True only. On the CPU-only
+production nodes Paddle silently fell back to its defaults: no oneDNN
+(MKL-DNN), and — because PaddleOCR applies cpu_threads only together with
+oneDNN — the math library's own thread count.
+
+PADDLE_PROFILE picks a named set of PaddleOCR arguments:
+
+  profile        device  oneDNN  det limit      rec batch  models
+  gpu            GPU     -       960 max        6          standard       (previous behaviour)
+  cpu            CPU     on      960 max        6          standard       same output as before, faster
+  cpu-fast       CPU     on      736 max        16         standard       smaller det input, larger rec batches
+  cpu-accurate   CPU     on      1536 max       6          standard       small print on A3 / fold-out pages
+  cpu-slim       CPU     on      736 max        16         slim (int8)    PADDLE_SLIM_DET_DIR / PADDLE_SLIM_REC_DIR
+  auto           → gpu when Paddle is compiled with CUDA and sees a device, else cpu
+
+Every knob can be overridden on top of the profile (PADDLE_CPU_THREADS,
+PADDLE_MKLDNN, ...). The default thread count is the core count divided
+by OCR_WORKERS, so a process pool does not oversubscribe the CPU.
+
+Slim models are the quantized PP-OCR inference models from the PaddleOCR
+model zoo (e.g. en_PP-OCRv3_det_slim_infer / en_PP-OCRv3_rec_slim_infer),
+downloaded and unpacked by hand; without them cpu-slim uses the standard models.
+
+PADDLE_PRECISION=bf16 runs oneDNN in bfloat16 (CPUs with AVX512-BF16 / AMX).
+
+After loading, calibrate() OCRs a synthetic A4 page and logs pages/sec for
+the chosen profile (also shown for "paddleocr" in GET /ready).
+
+Configuration (.env):
+  PADDLE_PROFILE          = auto      # auto | gpu | cpu | cpu-fast | cpu-accurate | cpu-slim
+  PADDLE_CPU_THREADS      = 0         # 0 = cores / OCR_WORKERS
+  PADDLE_MKLDNN           =           # true / false, empty = profile default
+  PADDLE_REC_BATCH        = 0         # 0 = profile default
+  PADDLE_DET_LIMIT_SIDE   = 0         # 0 = profile default
+  PADDLE_DET_LIMIT_TYPE   =           # max | min, empty = profile default
+  PADDLE_PRECISION        = fp32      # fp32 | bf16 (CPU + oneDNN only)
+  PADDLE_DET_MODEL_DIR    =           # custom / slim inference models (override the profile)
+  PADDLE_REC_MODEL_DIR    =
+  PADDLE_SLIM_DET_DIR     =           # models used by cpu-slim
+  PADDLE_SLIM_REC_DIR     =
+  PADDLE_CALIBRATE        = true
+  PADDLE_CALIBRATE_PAGES  = 2
+
+Updated: March 2026
+"""
+
+import os
+import time
+import logging
+
+import cv2
+import numpy as np
+
+from ocr_pool import OCR_WORKERS
+
+logger = logging.getLogger("BioManual.PaddleProfile")
+
+PADDLE_PROFILE         = os.getenv("PADDLE_PROFILE", "auto").lower()
+PADDLE_CPU_THREADS     = int(os.getenv("PADDLE_CPU_THREADS", "0"))
+PADDLE_MKLDNN          = os.getenv("PADDLE_MKLDNN", "").lower()
+PADDLE_REC_BATCH       = int(os.getenv("PADDLE_REC_BATCH", "0"))
+PADDLE_DET_LIMIT_SIDE  = int(os.getenv("PADDLE_DET_LIMIT_SIDE", "0"))
+PADDLE_DET_LIMIT_TYPE  = os.getenv("PADDLE_DET_LIMIT_TYPE", "").lower()
+PADDLE_PRECISION       = os.getenv("PADDLE_PRECISION", "fp32").lower()
+PADDLE_DET_MODEL_DIR   = os.getenv("PADDLE_DET_MODEL_DIR", "")
+PADDLE_REC_MODEL_DIR   = os.getenv("PADDLE_REC_MODEL_DIR", "")
+PADDLE_SLIM_DET_DIR    = os.getenv("PADDLE_SLIM_DET_DIR", "")
+PADDLE_SLIM_REC_DIR    = os.getenv("PADDLE_SLIM_REC_DIR", "")
+PADDLE_CALIBRATE       = os.getenv("PADDLE_CALIBRATE", "true").lower() == "true"
+PADDLE_CALIBRATE_PAGES = max(1, int(os.getenv("PADDLE_CALIBRATE_PAGES", "2")))
+
+PROFILES = {
+    "gpu":          {"use_gpu": True},
+    "cpu":          {"use_gpu": False, "enable_mkldnn": True, "det_limit_side_len": 960,
+                     "det_limit_type": "max", "rec_batch_num": 6},
+    "cpu-fast":     {"use_gpu": False, "enable_mkldnn": True, "det_limit_side_len": 736,
+                     "det_limit_type": "max", "rec_batch_num": 16},
+    "cpu-accurate": {"use_gpu": False, "enable_mkldnn": True, "det_limit_side_len": 1536,
+                     "det_limit_type": "max", "rec_batch_num": 6},
+    "cpu-slim":     {"use_gpu": False, "enable_mkldnn": True, "det_limit_side_len": 736,
+                     "det_limit_type": "max", "rec_batch_num": 16, "slim": True},
+}
+
+# Arguments that change what PaddleOCR reads (part of the OCR cache key); threads / oneDNN do not
+_OUTPUT_KEYS = ("det_limit_side_len", "det_limit_type", "det_model_dir", "rec_model_dir", "precision")
+
+
+def _cuda_available() -> bool:
+    try:
+        import paddle
+        return paddle.device.is_compiled_with_cuda() and paddle.device.cuda.device_count() > 0
+    except Exception:
+        return False
+
+
+def default_cpu_threads() -> int:
+    return max(1, (os.cpu_count() or 1) // max(1, OCR_WORKERS))
+
+
+def resolve_profile(name: str = PADDLE_PROFILE):
+    """(profile name, PaddleOCR keyword arguments) after env overrides."""
+    if name == "auto":
+        name = "gpu" if _cuda_available() else "cpu"
+    if name not in PROFILES:
+        logger.warning(f"⚠️ Unknown PADDLE_PROFILE '{name}' — using 'cpu'")
+        name = "cpu"
+
+    kwargs = dict(PROFILES[name])
+    slim = kwargs.pop("slim", False)
+    if slim:
+        if PADDLE_SLIM_DET_DIR and PADDLE_SLIM_REC_DIR:
+            kwargs["det_model_dir"] = PADDLE_SLIM_DET_DIR
+            kwargs["rec_model_dir"] = PADDLE_SLIM_REC_DIR
+        else:
+            logger.warning("⚠️ cpu-slim without PADDLE_SLIM_DET_DIR / PADDLE_SLIM_REC_DIR — standard models")
+
+    if not kwargs["use_gpu"]:
+        kwargs["cpu_threads"] = PADDLE_CPU_THREADS or default_cpu_threads()
+        if PADDLE_MKLDNN in ("true", "false"):
+            kwargs["enable_mkldnn"] = PADDLE_MKLDNN == "true"
+        if PADDLE_PRECISION == "bf16":
+            if kwargs["enable_mkldnn"]:
+                kwargs["precision"] = "fp16"   # PaddleOCR maps fp16 + oneDNN to enable_mkldnn_bfloat16()
+            else:
+                logger.warning("⚠️ PADDLE_PRECISION=bf16 needs oneDNN — running fp32")
+    if PADDLE_REC_BATCH > 0:
+        kwargs["rec_batch_num"] = PADDLE_REC_BATCH
+    if PADDLE_DET_LIMIT_SIDE > 0:
+        kwargs["det_limit_side_len"] = PADDLE_DET_LIMIT_SIDE
+    if PADDLE_DET_LIMIT_TYPE in ("max", "min"):
+        kwargs["det_limit_type"] = PADDLE_DET_LIMIT_TYPE
+    if PADDLE_DET_MODEL_DIR:
+        kwargs["det_model_dir"] = PADDLE_DET_MODEL_DIR
+    if PADDLE_REC_MODEL_DIR:
+        kwargs["rec_model_dir"] = PADDLE_REC_MODEL_DIR
+    return name, kwargs
+
+
+def profile_signature(name: str, kwargs: dict) -> str:
+    """Short cache-key fragment for the settings that change OCR output."""
+    parts = [name] + [f"{k}={kwargs[k]}" for k in _OUTPUT_KEYS if kwargs.get(k) is not None]
+    return ",".join(str(p) for p in parts)
+
+
+_active = None
+
+
+def active_signature() -> str:
+    """profile_signature() of the profile this process resolves (result cache key)."""
+    global _active
+    if _active is None:
+        _active = profile_signature(*resolve_profile())
+    return _active
+
+
+def describe(name: str, kwargs: dict) -> str:
+    if kwargs.get("use_gpu"):
+        return f"{name} (GPU)"
+    bits = [f"{kwargs.get('cpu_threads')} threads",
+            f"oneDNN {'on' if kwargs.get('enable_mkldnn') else 'off'}",
+            f"det {kwargs.get('det_limit_side_len', 960)} {kwargs.get('det_limit_type', 'max')}",
+            f"rec batch {kwargs.get('rec_batch_num', 6)}"]
+    if kwargs.get("precision") == "fp16":
+        bits.append("bf16")
+    if kwargs.get("det_model_dir") or kwargs.get("rec_model_dir"):
+        bits.append("custom models")
+    return f"{name} ({', '.join(bits)})"
+
+
+_WORDS = ("patient", "monitor", "alarm", "battery", "sensor", "cable", "power", "display", "check",
+          "pressure", "oxygen", "warning", "cleaning", "device", "settings", "menu", "probe", "volume")
+
+
+def synthetic_page(width: int = 2480, height: int = 3508, lines: int = 40) -> np.ndarray:
+    """A4 at 300 DPI with a heading and body lines of text — the calibration workload."""
+    rng = np.random.RandomState(0)
+    page = np.full((height, width, 3), 255, np.uint8)
+    cv2.putText(page, "OPERATION MANUAL", (180, 260), cv2.FONT_HERSHEY_SIMPLEX, 3.0, (0, 0, 0), 6)
+    y = 420
+    step = (height - 600) // lines
+    for _ in range(lines):
+        text = " ".join(rng.choice(_WORDS, size=rng.randint(5, 9)))
+        cv2.putText(page, text.capitalize(), (180, y), cv2.FONT_HERSHEY_SIMPLEX, 1.4, (0, 0, 0), 3)
+        y += step
+    return page
+
+
+def calibrate(ocr_engine, pages: int = PADDLE_CALIBRATE_PAGES) -> dict:
+    """Time full-page OCR of the synthetic page (one untimed warm-up run first)."""
+    page = synthetic_page()
+    ocr_engine.ocr(page, cls=False)        # first call builds oneDNN kernels
+    t0 = time.perf_counter()
+    lines = 0
+    for _ in range(pages):
+        result = ocr_engine.ocr(page, cls=False)
+        lines = len(result[0]) if result and result[0] else 0
+    seconds = (time.perf_counter() - t0) / pages
+    return {
+        "pages_per_sec": round(1.0 / seconds, 2) if seconds > 0 else None,
+        "sec_per_page": round(seconds, 3),
+        "lines": lines,
+    }
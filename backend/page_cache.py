@@ -0,0 +1,172 @@
+"""
+PAGE CACHE — Per-page layout + OCR cache (SQLite)
+==================================================
+
+The whole-document cache (result_cache.py) only helps when the exact same
+file is uploaded again. Pages, however, repeat much more often:
+  - /supplement uploads that contain pages already scanned
+  - re-running a manual after switching X-Language
+  - a revised manual where only a few pages changed
+
+Two tables, both keyed by the SHA-256 of the page pixels:
+  layout  → Surya regions            key = page hash (+ Surya precision / input cap if not default)
+  ocr     → text elements (Stage 2)  key = page hash + lang + OCR engine settings
+
+A hit skips Surya and/or PaddleOCR + Tesseract for that page. Text
+correction, AI classification and crops still run per scan (cheap, and
+the crops are written for the new filename_base).
+
+The database is a single SQLite file (WAL mode), so API threads and OCR
+pool worker processes can share it. Each table keeps at most
+PAGE_CACHE_MAX_ENTRIES rows; least recently used rows are deleted first.
+
+Configuration (.env):
+  PAGE_CACHE             = true
+  PAGE_CACHE_PATH        = page_cache.sqlite   (relative to backend/)
+  PAGE_CACHE_MAX_ENTRIES = 20000
+
+Updated: March 2026
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger("BioManual.PageCache")
+
+PAGE_CACHE_ENABLED     = os.getenv("PAGE_CACHE", "true").lower() == "true"
+PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "20000"))
+
+_TABLES = ("layout", "ocr")
+
+
+def page_image_hash(image) -> str:
+    """SHA-256 of a page image (numpy array) — shape + raw pixels."""
+    sha = hashlib.sha256(f"{image.shape}|{image.dtype}".encode("ascii"))
+    sha.update(memoryview(image if image.flags["C_CONTIGUOUS"] else image.copy()))
+    return sha.hexdigest()
+
+
+def _json_default(obj):
+    # numpy scalars (float32 confidences, int64 coordinates)
+    if hasattr(obj, "item"):
+        return obj.item()
+    return str(obj)
+
+
+class PageCache:
+
+    def __init__(self, path: str, max_entries: int = PAGE_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for table in _TABLES:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "  cache_key TEXT PRIMARY KEY,"
+                "  data      TEXT NOT NULL,"
+                "  created   REAL NOT NULL,"
+                "  last_used REAL NOT NULL)"
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_last_used ON {table}(last_used)")
+        self._conn.commit()
+        logger.info(f"✓ Page Cache: {path}")
+
+    # ─────────────────────────────────────────────
+    # Generic get / put
+    # ─────────────────────────────────────────────
+    def _get(self, table: str, key: str):
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    f"SELECT data FROM {table} WHERE cache_key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                self._conn.execute(
+                    f"UPDATE {table} SET last_used = ? WHERE cache_key = ?", (time.time(), key)
+                )
+                self._conn.commit()
+                return json.loads(row[0])
+            except Exception as e:
+                logger.warning(f"⚠️ Page cache read failed ({table}): {e}")
+                return None
+
+    def _put(self, table: str, key: str, value):
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {table} (cache_key, data, created, last_used) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False, default=_json_default), now, now)
+                )
+                self._writes += 1
+                if self._writes % 100 == 0:
+                    self._evict(table)
+                self._conn.commit()
+            except Exception as e:
+                logger.warning(f"⚠️ Page cache write failed ({table}): {e}")
+
+    def _evict(self, table: str):
+        (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                f"DELETE FROM {table} WHERE cache_key IN "
+                f"(SELECT cache_key FROM {table} ORDER BY last_used ASC LIMIT ?)", (excess,)
+            )
+            logger.info(f"🧹 Page cache: evicted {excess} {table} rows")
+
+    # ─────────────────────────────────────────────
+    # Layout (page hash + Surya runtime) / OCR (page hash + lang + engine settings)
+    # ─────────────────────────────────────────────
+    @staticmethod
+    def layout_key(page_hash: str, runtime_signature: str = "") -> str:
+        return f"{page_hash}|{runtime_signature}" if runtime_signature else page_hash
+
+    def get_layout(self, page_hash: str, runtime_signature: str = ""):
+        return self._get("layout", self.layout_key(page_hash, runtime_signature))
+
+    def put_layout(self, page_hash: str, regions, runtime_signature: str = ""):
+        self._put("layout", self.layout_key(page_hash, runtime_signature), regions)
+
+    @staticmethod
+    def ocr_key(page_hash: str, lang: str, engine_signature: str) -> str:
+        return f"{page_hash}|{lang}|{engine_signature}"
+
+    def get_ocr(self, page_hash: str, lang: str, engine_signature: str):
+        return self._get("ocr", self.ocr_key(page_hash, lang, engine_signature))
+
+    def put_ocr(self, page_hash: str, lang: str, engine_signature: str, elements):
+        self._put("ocr", self.ocr_key(page_hash, lang, engine_signature), elements)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache():
+    """Shared (per process) PageCache, or None when PAGE_CACHE is disabled / unavailable."""
+    global _cache
+    if not PAGE_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            backend_dir = os.path.dirname(os.path.abspath(__file__))
+            path = os.getenv("PAGE_CACHE_PATH") or "page_cache.sqlite"
+            if not os.path.isabs(path):
+                path = os.path.join(backend_dir, path)
+            try:
+                _cache = PageCache(path)
+            except Exception as e:
+                logger.warning(f"⚠️ Page cache disabled: {e}")
+                return None
+    return _cache
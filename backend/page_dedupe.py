@@ -0,0 +1,266 @@
+"""
+PAGE DEDUPE — Near-duplicate pages within one job (perceptual hash)
+====================================================================
+
+Bilingual and multi-model manuals repeat pages verbatim: safety pages,
+warranty cards, identical spec tables. The page cache (page_cache.py)
+only catches byte-identical pixels; a page scanned twice never matches.
+
+DuplicatePageIndex is built per job as pages are rasterized:
+
+    fp = page_fingerprint(page_img)
+    match = index.find(fp)            # (source key, (dx, dy)) or None
+    if match is None:
+        index.add(key, fp)            # scan normally
+    else:
+        result = clone_scan_result(source_result, page_img, filename_base, output_dir, offset)
+
+Matching is two-step:
+  1. 64-bit pHash (DCT of a 32×32 thumbnail) AND dHash (9×8 gradients),
+     both within PAGE_DEDUPE_HASH_DISTANCE bits — cheap, but at that
+     resolution every page of body text looks alike.
+  2. Coarse check on PAGE_DEDUPE_VERIFY_PX thumbnails: align with phase
+     correlation, binarize, and compare ink with a 1 px tolerance. Pages
+     differ if any 32×32 cell has more than PAGE_DEDUPE_MAX_CELL_DIFF of
+     its pixels changed (a different paragraph, figure or layout).
+  3. Fine check on full-resolution ink masks (≤ PAGE_DEDUPE_FINE_PX, kept
+     PNG-compressed in the index): refine the alignment, compare ink with a
+     1 px tolerance and count changed pixels per glyph. One glyph with
+     PAGE_DEDUPE_MIN_DIFF_PX or more changed pixels keeps the pages apart —
+     at 300 DPI a changed digit ("220 V" → "230 V", "5 A" → "8 A",
+     "T1.6A" → "T1.8A") leaves 25+ px, a re-rendered or re-scanned copy ~0.
+     Thumbnails alone cannot see this: the 1 px tolerance swallows a digit.
+
+The clone keeps the source page's elements (text, types, chapters) and
+re-points everything file-related at the duplicate page: its own preview,
+table / figure crops cut from its own pixels, bboxes shifted by the
+measured offset.
+
+Configuration (.env):
+  PAGE_DEDUPE                = true
+  PAGE_DEDUPE_HASH_DISTANCE  = 10      # of 64 bits, for pHash and dHash
+  PAGE_DEDUPE_VERIFY_PX      = 1024
+  PAGE_DEDUPE_MAX_CELL_DIFF  = 0.02
+  PAGE_DEDUPE_FINE_PX        = 3600    # A4 @ 300 DPI is compared at full resolution
+  PAGE_DEDUPE_MIN_DIFF_PX    = 10      # changed px in one glyph
+
+Updated: March 2026
+"""
+
+import os
+import copy
+import logging
+from urllib.parse import quote
+
+import cv2
+import numpy as np
+
+from artifact_writer import get_artifact_writer
+from image_quality import deskew_page
+
+logger = logging.getLogger("BioManual.PageDedupe")
+
+PAGE_DEDUPE               = os.getenv("PAGE_DEDUPE", "true").lower() == "true"
+PAGE_DEDUPE_HASH_DISTANCE = int(os.getenv("PAGE_DEDUPE_HASH_DISTANCE", "10"))
+PAGE_DEDUPE_VERIFY_PX     = int(os.getenv("PAGE_DEDUPE_VERIFY_PX", "1024"))
+PAGE_DEDUPE_MAX_CELL_DIFF = float(os.getenv("PAGE_DEDUPE_MAX_CELL_DIFF", "0.02"))
+PAGE_DEDUPE_FINE_PX       = int(os.getenv("PAGE_DEDUPE_FINE_PX", "3600"))
+PAGE_DEDUPE_MIN_DIFF_PX   = int(os.getenv("PAGE_DEDUPE_MIN_DIFF_PX", "10"))
+
+_CELL = 32
+_MAX_SHIFT = 0.05   # fraction of the thumbnail size; larger offsets are a different layout
+
+
+def dedupe_signature() -> str:
+    """Near-duplicate settings that decide which pages reuse OCR ('' when dedupe is off)."""
+    if not PAGE_DEDUPE:
+        return ""
+    return (f"dedupe={PAGE_DEDUPE_HASH_DISTANCE}/{PAGE_DEDUPE_VERIFY_PX}/{PAGE_DEDUPE_MAX_CELL_DIFF:g}/"
+            f"{PAGE_DEDUPE_FINE_PX}/{PAGE_DEDUPE_MIN_DIFF_PX}")
+
+
+def _bits(mask) -> int:
+    return int("".join("1" if b else "0" for b in mask.ravel()), 2)
+
+
+def phash(gray) -> int:
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].ravel()[1:]   # drop DC
+    return _bits(low > np.median(low))
+
+
+def dhash(gray) -> int:
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    return _bits(small[:, 1:] > small[:, :-1])
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def _resize_max(gray, max_side: int):
+    h, w = gray.shape
+    scale = min(1.0, max_side / max(h, w))
+    if scale >= 1.0:
+        return gray
+    return cv2.resize(gray, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+
+def _ink(gray):
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    return binary
+
+
+def page_fingerprint(image) -> dict:
+    """pHash + dHash + verification thumbnail + fine ink mask (PNG bytes) of a BGR / grayscale page."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    h, w = gray.shape
+    thumb = _resize_max(gray, PAGE_DEDUPE_VERIFY_PX)
+    fine = _resize_max(gray, PAGE_DEDUPE_FINE_PX)
+    # 1-bit PNG: ~40 KB and ~30 ms for an A4 page at 300 DPI (decodes back to 0 / 255)
+    ok, fine_png = cv2.imencode(".png", _ink(fine) // 255,
+                                [cv2.IMWRITE_PNG_BILEVEL, 1, cv2.IMWRITE_PNG_COMPRESSION, 1])
+    return {"phash": phash(thumb), "dhash": dhash(thumb), "thumb": thumb, "shape": (h, w),
+            "scale": thumb.shape[1] / w, "fine": fine_png.tobytes() if ok else None}
+
+
+def _shifted(ink, shift):
+    """Binary ink mask moved by -shift (sub-pixel, re-thresholded)."""
+    h, w = ink.shape
+    M = np.float32([[1, 0, -shift[0]], [0, 1, -shift[1]]])
+    moved = cv2.warpAffine(ink, M, (w, h), flags=cv2.INTER_LINEAR, borderValue=0)
+    return np.where(moved >= 128, 255, 0).astype(np.uint8)
+
+
+def _tolerant_diff(a, b):
+    """Ink present in one mask but not within 1 px of the other."""
+    kernel = np.ones((3, 3), np.uint8)
+    return cv2.bitwise_or(cv2.bitwise_and(a, cv2.bitwise_not(cv2.dilate(b, kernel))),
+                          cv2.bitwise_and(b, cv2.bitwise_not(cv2.dilate(a, kernel))))
+
+
+def _fine_differs(fp, other, coarse_shift) -> bool:
+    """True if any glyph changed between the pages' fine ink masks."""
+    if not fp.get("fine") or not other.get("fine"):
+        return True
+    ref = cv2.imdecode(np.frombuffer(other["fine"], np.uint8), cv2.IMREAD_GRAYSCALE)
+    cur = cv2.imdecode(np.frombuffer(fp["fine"], np.uint8), cv2.IMREAD_GRAYSCALE)
+    if cur.shape != ref.shape:
+        cur = cv2.resize(cur, (ref.shape[1], ref.shape[0]), interpolation=cv2.INTER_NEAREST)
+    # Thumbnail shift scaled up, then refined on the fine masks (text lines are periodic:
+    # an unguided phase correlation can lock onto the neighbouring line)
+    f = ref.shape[1] / other["thumb"].shape[1]
+    shift = (coarse_shift[0] * f, coarse_shift[1] * f)
+    aligned = _shifted(cur, shift)
+    (rx, ry), _ = cv2.phaseCorrelate(ref.astype(np.float32), aligned.astype(np.float32))
+    if abs(rx) < 3 and abs(ry) < 3:
+        aligned = _shifted(cur, (shift[0] + rx, shift[1] + ry))
+    diff = _tolerant_diff(ref, aligned)
+    if not diff.any():
+        return False
+    # Changed pixels per glyph (connected component of either page's ink)
+    n, labels = cv2.connectedComponents(cv2.bitwise_or(ref, aligned), connectivity=8)
+    per_glyph = np.bincount(labels[diff > 0].ravel(), minlength=n)[1:]
+    return per_glyph.max() >= PAGE_DEDUPE_MIN_DIFF_PX
+
+
+def verify_duplicate(fp, other):
+    """
+    (dx, dy) offset in full-resolution pixels of `fp` relative to `other`
+    if the pages carry the same content, else None.
+    """
+    (h1, w1), (h2, w2) = fp["shape"], other["shape"]
+    if abs(h1 / w1 - h2 / w2) > 0.01 * (h2 / w2):
+        return None
+    ref = other["thumb"]
+    th, tw = ref.shape
+    cur = fp["thumb"] if fp["thumb"].shape == ref.shape else cv2.resize(fp["thumb"], (tw, th), interpolation=cv2.INTER_AREA)
+
+    window = cv2.createHanningWindow((tw, th), cv2.CV_32F)
+    (sx, sy), _ = cv2.phaseCorrelate(255.0 - ref.astype(np.float32), 255.0 - cur.astype(np.float32), window)
+    if abs(sx) > tw * _MAX_SHIFT or abs(sy) > th * _MAX_SHIFT:
+        return None
+    diff = _tolerant_diff(_ink(ref), _shifted(_ink(cur), (sx, sy)))
+    # Coarse: changed pixels per 32×32 cell (different paragraph / figure / layout)
+    ch, cw = th // _CELL, tw // _CELL
+    if ch == 0 or cw == 0:
+        return None
+    cells = (diff[:ch * _CELL, :cw * _CELL] > 0).reshape(ch, _CELL, cw, _CELL).sum(axis=(1, 3))
+    if cells.max() > PAGE_DEDUPE_MAX_CELL_DIFF * _CELL * _CELL:
+        return None
+    # Fine: one changed digit or unit is enough to keep the pages apart
+    if _fine_differs(fp, other, (sx, sy)):
+        return None
+    # Thumbnail shift → full-resolution offset of this page against the source
+    full = w2 / tw
+    return int(round(sx * full)), int(round(sy * full))
+
+
+class DuplicatePageIndex:
+    """Fingerprints of the pages scanned so far in one job."""
+
+    def __init__(self, max_distance: int = PAGE_DEDUPE_HASH_DISTANCE):
+        self.max_distance = max_distance
+        self._entries = []    # (key, fingerprint)
+        self.hits = 0
+
+    def find(self, fp):
+        """(key, (dx, dy)) of an earlier page with the same content, or None."""
+        for key, other in self._entries:
+            if (hamming(fp["phash"], other["phash"]) <= self.max_distance
+                    and hamming(fp["dhash"], other["dhash"]) <= self.max_distance):
+                offset = verify_duplicate(fp, other)
+                if offset is not None:
+                    self.hits += 1
+                    return key, offset
+        return None
+
+    def add(self, key, fp):
+        self._entries.append((key, fp))
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _shift(bbox, dx, dy, w, h):
+    if not bbox:
+        return bbox
+    x1, y1, x2, y2 = bbox
+    return [min(max(0, x1 + dx), w), min(max(0, y1 + dy), h), min(max(0, x2 + dx), w), min(max(0, y2 + dy), h)]
+
+
+def clone_scan_result(result, image, filename_base: str, output_dir: str, offset=(0, 0)) -> dict:
+    """
+    scan_document-style result for a duplicate page: the source page's
+    elements with bboxes shifted by `offset` and preview / crops written
+    from the duplicate's own pixels (straightened the same way prepare_image does).
+    """
+    if not isinstance(result, dict):
+        return copy.deepcopy(result)
+    artifacts = get_artifact_writer()
+    page_img, _ = deskew_page(image)
+    h, w = page_img.shape[:2]
+    dx, dy = offset
+
+    preview_path = artifacts.write(os.path.join(output_dir, f"PREVIEW_{filename_base}.jpg"), page_img, kind="preview")
+
+    elements = []
+    for idx, src in enumerate(result.get("elements", [])):
+        elem = copy.deepcopy(src)
+        elem["bbox"] = _shift(elem.get("bbox"), dx, dy, w, h)
+        elem["source_image_local"] = preview_path
+        if elem.get("crop_local") and elem.get("bbox"):
+            x1, y1, x2, y2 = elem["bbox"]
+            pad = 20
+            crop = page_img[max(0, y1 - pad):min(h, y2 + pad), max(0, x1 - pad):min(w, x2 + pad)]
+            if crop.size > 0:
+                crop_path = artifacts.write(
+                    os.path.join(output_dir, f"{filename_base}_crop_{elem['type']}_{idx}.png"), crop, kind="crop"
+                )
+                elem["crop_local"] = crop_path
+                elem["crop_url"] = f"http://127.0.0.1:8000/output/{quote(os.path.basename(crop_path))}"
+        elements.append(elem)
+
+    cloned = dict(result, elements=elements, clean_image_path=preview_path)
+    cloned["duplicate"] = True
+    return cloned
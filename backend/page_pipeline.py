@@ -0,0 +1,210 @@
+"""
+PAGE PIPELINE — Staged execution with bounded queues
+=====================================================
+
+Runs the per-page OCR work as a chain of stages, each on its own thread,
+connected by bounded queues:
+
+    rasterize → split → layout → ocr → normalize → (consumer: report assembly)
+
+Page N+1 rasterizes while page N is in Surya layout and page N-1 is in
+PaddleOCR / Tesseract, instead of every stage waiting for the previous
+page to finish completely. Bounded queues (PIPELINE_QUEUE_SIZE) keep a
+fast stage from running ahead and piling rendered pages up in memory.
+
+Every stage is a single thread, so items leave the pipeline in the same
+order they entered — the consumer can run stateful passes (BioBrain
+semantic mapping) exactly as in the sequential loop.
+
+    pipeline = StagedPipeline([("split", split_fn), ("layout", layout_fn), ...],
+                              source_name="rasterize")
+    for item in pipeline.run(page_iter):
+        ...
+        pipeline.stats()   # per-stage queue depth + throughput
+
+A stage function takes one item and returns a list of output items
+(empty list = drop, several items = fan-out, e.g. one page → N columns).
+A stage declared as (name, fn, batch_size) receives a LIST of up to
+batch_size items instead — whatever is already waiting in its queue, it
+never stalls to fill a batch (used for batched Surya layout).
+
+Configuration (.env):
+  PIPELINE_QUEUE_SIZE = 2   # max items waiting in front of each stage
+
+Updated: March 2026
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+
+logger = logging.getLogger("BioManual.Pipeline")
+
+PIPELINE_QUEUE_SIZE = max(1, int(os.getenv("PIPELINE_QUEUE_SIZE", "2")))
+
+_DONE = object()
+
+
+class _Failure:
+    """Carries an exception from a stage thread to the consumer."""
+    def __init__(self, stage: str, error: Exception):
+        self.stage = stage
+        self.error = error
+
+
+class StagedPipeline:
+
+    def __init__(self, stages, source_name: str = "source", queue_size: int = PIPELINE_QUEUE_SIZE):
+        # (name, fn) or (name, fn, batch_size)
+        self.stages = [(s[0], s[1], max(1, s[2]) if len(s) > 2 else 1) for s in stages]
+        self.source_name = source_name
+        self.queue_size = max(1, queue_size)
+        self._queues = []
+        self._stop = threading.Event()
+        self._started_at = None
+        self._stats = {}
+
+    # ─────────────────────────────────────────────
+    # Queue helpers (never block forever — stop() must be able to unwind threads)
+    # ─────────────────────────────────────────────
+    def _put(self, q, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.2)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    # ─────────────────────────────────────────────
+    # Threads
+    # ─────────────────────────────────────────────
+    def _feed(self, source, out_q):
+        stat = self._stats[self.source_name]
+        try:
+            it = iter(source)
+            while not self._stop.is_set():
+                t0 = time.time()
+                item = next(it, _DONE)
+                stat["busy"] += time.time() - t0
+                if item is _DONE:
+                    break
+                stat["done"] += 1
+                if not self._put(out_q, item):
+                    return
+        except Exception as e:
+            logger.error(f"Pipeline stage '{self.source_name}' failed: {e}")
+            self._put(out_q, _Failure(self.source_name, e))
+        self._put(out_q, _DONE)
+
+    def _work(self, name, fn, batch_size, in_q, out_q):
+        stat = self._stats[name]
+        finished = False
+        while not finished:
+            item = self._get(in_q)
+            if item is _DONE:
+                break
+            if isinstance(item, _Failure):
+                self._put(out_q, item)
+                continue
+
+            batch = [item]
+            # Batched stage: take what is already queued, up to batch_size
+            while len(batch) < batch_size:
+                try:
+                    nxt = in_q.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _DONE:
+                    finished = True
+                    break
+                if isinstance(nxt, _Failure):
+                    self._put(out_q, nxt)
+                    continue
+                batch.append(nxt)
+
+            t0 = time.time()
+            try:
+                outputs = (fn(batch) if batch_size > 1 else fn(item)) or []
+            except Exception as e:
+                logger.error(f"Pipeline stage '{name}' failed: {e}")
+                outputs = [_Failure(name, e)]
+            stat["busy"] += time.time() - t0
+            stat["done"] += len(batch)
+            for out in outputs:
+                if not self._put(out_q, out):
+                    return
+        self._put(out_q, _DONE)
+
+    # ─────────────────────────────────────────────
+    # Public API
+    # ─────────────────────────────────────────────
+    def run(self, source):
+        """Generator: yields final items in input order. Raises the first stage error."""
+        self._stop.clear()
+        self._started_at = time.time()
+        # Queue in front of a batched stage must be able to hold a full batch
+        self._queues = [queue.Queue(maxsize=max(self.queue_size, batch)) for _, _, batch in self.stages]
+        self._queues.append(queue.Queue(maxsize=self.queue_size))
+        self._stats = {self.source_name: {"done": 0, "busy": 0.0}}
+        for name, _, _ in self.stages:
+            self._stats[name] = {"done": 0, "busy": 0.0}
+
+        threads = [threading.Thread(
+            target=self._feed, args=(source, self._queues[0]),
+            name=f"pipe-{self.source_name}", daemon=True
+        )]
+        for idx, (name, fn, batch) in enumerate(self.stages):
+            threads.append(threading.Thread(
+                target=self._work, args=(name, fn, batch, self._queues[idx], self._queues[idx + 1]),
+                name=f"pipe-{name}", daemon=True
+            ))
+        for t in threads:
+            t.start()
+
+        try:
+            while True:
+                item = self._get(self._queues[-1])
+                if item is _DONE:
+                    break
+                if isinstance(item, _Failure):
+                    raise RuntimeError(f"Pipeline stage '{item.stage}' failed: {item.error}") from item.error
+                yield item
+        finally:
+            self._stop.set()
+            for t in threads:
+                t.join(timeout=5)
+
+    def stats(self) -> dict:
+        """Per-stage queue depth (items waiting in front of the stage) and throughput."""
+        elapsed = max(time.time() - (self._started_at or time.time()), 1e-6)
+        names = [self.source_name] + [name for name, _, _ in self.stages]
+        result = {}
+        for idx, name in enumerate(names):
+            stat = self._stats.get(name, {"done": 0, "busy": 0.0})
+            # queue in front of stage idx is _queues[idx - 1]; the source has none
+            q_depth = self._queues[idx - 1].qsize() if idx > 0 and self._queues else 0
+            result[name] = {
+                "queue": q_depth,
+                "done": stat["done"],
+                "per_sec": round(stat["done"] / elapsed, 2),
+                "busy_pct": round(100 * stat["busy"] / elapsed, 1),
+            }
+        return result
+
+    def stats_line(self) -> str:
+        """Compact one-line summary for logs / progress messages."""
+        return " | ".join(
+            f"{name} q={s['queue']} {s['per_sec']}/s"
+            for name, s in self.stats().items()
+        )
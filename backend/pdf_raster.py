@@ -0,0 +1,197 @@
+"""
+PDF RASTER — Streaming page rasterization (pdf2image / poppler)
+================================================================
+
+convert_from_path(path) renders the WHOLE document at PDF_DPI and keeps
+every page as a PIL image in memory (a 200-page manual at 300 DPI is
+several GB). PdfPageStream renders a small window of pages at a time
+using first_page / last_page ranges, so peak memory stays at
+O(PDF_RASTER_WINDOW pages) whatever the document length.
+
+    pages = PdfPageStream(pdf_path)
+    len(pages)              → page count (pdfinfo, no rendering)
+    for img in pages: ...   → PIL images, one window rendered at a time
+    pages.get(page_num)     → single page on demand (0-based, last page cached)
+
+Adaptive DPI (PDF_DPI_MODE=adaptive) — two passes per page:
+  1. render a probe at PDF_PROBE_DPI and measure the text x-height from
+     connected components (median height of character-sized blobs)
+  2. render at the lowest DPI that puts the x-height at PDF_TARGET_XHEIGHT
+     px (OCR sweet spot), clamped to [PDF_MIN_DPI, PDF_DPI]
+  Large-type pages are rendered at a fraction of the pixels; small print
+  and pages without measurable text still get PDF_DPI.
+  pages.page_dpi[page_num] records the DPI used for each page;
+  pages.ocr_sized(page_num) is True when that DPI already put the x-height
+  at the target, so the scanner skips its width-based OCR upscale (a
+  column view of a 150 DPI page would otherwise be upscaled 2x again).
+
+Configuration (.env):
+  PDF_DPI            = 300
+  PDF_RASTER_WINDOW  = 1    # pages rendered per poppler call (fixed mode)
+  PDF_DPI_MODE       = fixed   # fixed | adaptive
+  PDF_PROBE_DPI      = 100
+  PDF_MIN_DPI        = 150
+  PDF_TARGET_XHEIGHT = 20   # px
+
+Updated: March 2026
+"""
+
+import os
+import logging
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger("BioManual.PdfRaster")
+
+PDF_DPI            = int(os.getenv("PDF_DPI", "300"))
+PDF_RASTER_WINDOW  = max(1, int(os.getenv("PDF_RASTER_WINDOW", "1")))
+PDF_DPI_MODE       = os.getenv("PDF_DPI_MODE", "fixed").lower()
+PDF_PROBE_DPI      = int(os.getenv("PDF_PROBE_DPI", "100"))
+PDF_MIN_DPI        = int(os.getenv("PDF_MIN_DPI", "150"))
+PDF_TARGET_XHEIGHT = float(os.getenv("PDF_TARGET_XHEIGHT", "20"))
+
+
+def resolve_poppler_path():
+    """POPPLER_PATH from .env, else common Windows install locations, else None (use PATH)."""
+    poppler = os.environ.get('POPPLER_PATH')
+    if not poppler:
+        for p in [r"C:\poppler\Library\bin", r"C:\poppler\bin"]:
+            if os.path.exists(p):
+                poppler = p
+                break
+    return poppler
+
+
+def _convert_range(path, dpi, first_page, last_page):
+    """Render pages [first_page, last_page] (1-based, inclusive)."""
+    from pdf2image import convert_from_path
+    poppler = resolve_poppler_path()
+    try:
+        return convert_from_path(
+            path, dpi=dpi, first_page=first_page, last_page=last_page, poppler_path=poppler
+        )
+    except Exception:
+        # Fallback without poppler_path if it fails
+        return convert_from_path(path, dpi=dpi, first_page=first_page, last_page=last_page)
+
+
+def count_pdf_pages(path) -> int:
+    """Page count via pdfinfo (no rendering)."""
+    from pdf2image import pdfinfo_from_path
+    poppler = resolve_poppler_path()
+    try:
+        info = pdfinfo_from_path(path, poppler_path=poppler)
+    except Exception:
+        info = pdfinfo_from_path(path)
+    return int(info.get("Pages", 0))
+
+
+def raster_signature(dpi_mode: str = None) -> str:
+    """Rasterization settings that change OCR output — part of the result cache key."""
+    mode = (dpi_mode or PDF_DPI_MODE)
+    if mode == "adaptive":
+        return f"adaptive:{PDF_MIN_DPI}-{PDF_DPI},x{PDF_TARGET_XHEIGHT:g}@{PDF_PROBE_DPI}"
+    return f"fixed:{PDF_DPI}"
+
+
+def estimate_x_height(image):
+    """
+    Typical lowercase letter height (px) of a rendered page, or None if the
+    page has too little text to tell. PIL image or ndarray.
+    """
+    arr = np.asarray(image)
+    gray = cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY) if arr.ndim == 3 else arr
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    n, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    if n <= 1:
+        return None
+    w = stats[1:, cv2.CC_STAT_WIDTH]
+    h = stats[1:, cv2.CC_STAT_HEIGHT]
+    area = stats[1:, cv2.CC_STAT_AREA]
+    # Character-sized blobs: not specks, not rules / figures / merged words
+    glyph = (h >= 3) & (h <= gray.shape[0] * 0.05) & (w <= h * 2) & (area >= 4)
+    if np.count_nonzero(glyph) < 20:
+        return None
+    return float(np.median(h[glyph]))
+
+
+def choose_page_dpi(probe_image, probe_dpi: int = None) -> int:
+    """Lowest DPI (multiple of 25) that keeps x-height ≥ PDF_TARGET_XHEIGHT, within [PDF_MIN_DPI, PDF_DPI]."""
+    probe_dpi = probe_dpi or PDF_PROBE_DPI
+    x_height = estimate_x_height(probe_image)
+    if not x_height:
+        return PDF_DPI
+    dpi = probe_dpi * PDF_TARGET_XHEIGHT / x_height
+    dpi = int(np.ceil(dpi / 25.0) * 25)
+    return max(min(PDF_MIN_DPI, PDF_DPI), min(PDF_DPI, dpi))
+
+
+class PdfPageStream:
+    """
+    Lazy, re-iterable sequence of rendered PDF pages.
+    Only the current window of PIL images is alive at any time.
+    """
+
+    def __init__(self, path, dpi: int = None, window: int = None, dpi_mode: str = None):
+        self.path = path
+        self.dpi = dpi or PDF_DPI
+        self.window = max(1, window or PDF_RASTER_WINDOW)
+        # An explicit dpi always means fixed rendering
+        self.adaptive = dpi is None and (dpi_mode or PDF_DPI_MODE) == "adaptive"
+        self.page_dpi = {}          # page_num (0-based) → DPI used
+        self._count = None
+        self._cached_page = None   # (page_num, PIL image) for get()
+
+    def __len__(self):
+        if self._count is None:
+            self._count = count_pdf_pages(self.path)
+        return self._count
+
+    def __iter__(self):
+        total = len(self)
+        if self.adaptive:
+            for page_num in range(total):
+                yield self._render_adaptive(page_num)
+            return
+        for first in range(1, total + 1, self.window):
+            last = min(total, first + self.window - 1)
+            batch = _convert_range(self.path, self.dpi, first, last)
+            for offset, img in enumerate(batch):
+                self.page_dpi[first - 1 + offset] = self.dpi
+                yield img
+            del batch
+
+    def _render_adaptive(self, page_num: int):
+        """Probe render → x-height → final render (the low-DPI probe is only measured, never returned)."""
+        probe = _convert_range(self.path, PDF_PROBE_DPI, page_num + 1, page_num + 1)
+        if not probe:
+            return None
+        dpi = choose_page_dpi(probe[0])
+        self.page_dpi[page_num] = dpi
+        del probe
+        pages = _convert_range(self.path, dpi, page_num + 1, page_num + 1)
+        if dpi < self.dpi:
+            saved = 1 - (dpi / self.dpi) ** 2
+            logger.info(f"📐 Page {page_num + 1}: {dpi} DPI (adaptive, {saved:.0%} fewer pixels than {self.dpi})")
+        return pages[0] if pages else None
+
+    def ocr_sized(self, page_num: int) -> bool:
+        """Adaptively rendered below PDF_DPI: x-height is at the OCR target already (no upscale needed)."""
+        dpi = self.page_dpi.get(page_num)
+        return self.adaptive and dpi is not None and dpi < self.dpi
+
+    def get(self, page_num: int):
+        """Render a single page (0-based). The last rendered page is cached."""
+        if self._cached_page and self._cached_page[0] == page_num:
+            return self._cached_page[1]
+        if page_num < 0 or page_num >= len(self):
+            return None
+        if self.adaptive:
+            img = self._render_adaptive(page_num)
+        else:
+            pages = _convert_range(self.path, self.dpi, page_num + 1, page_num + 1)
+            img = pages[0] if pages else None
+            self.page_dpi[page_num] = self.dpi
+        self._cached_page = (page_num, img)
+        return img
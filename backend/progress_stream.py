@@ -0,0 +1,210 @@
+"""
+PROGRESS STREAM — Server-Sent Events for /progress/{session_id}/stream
+=======================================================================
+
+Polling /progress every 1.5 s means a steady flood of requests and
+updates that arrive up to one interval late. Instead, every write to
+progress_tracker is pushed to the subscribed SSE clients as it happens.
+
+  progress_tracker = ProgressTracker(progress_hub)
+      behaves like the old dict — progress_tracker[sid] = {...},
+      progress_tracker[sid].update({...}) and progress_tracker[sid]["x"] = y
+      all publish a snapshot of the entry to the hub.
+
+  ProgressHub
+      subscribe(sid)   → asyncio.Queue of snapshots (called on the event loop)
+      publish(sid, snapshot)   thread-safe (JobEngine / pipeline threads)
+
+Backpressure: each subscriber queue holds PROGRESS_STREAM_QUEUE snapshots.
+When a slow client falls behind, the OLDEST snapshot is dropped — progress
+is a state, not a log, so the client always ends on the latest state and
+the worker thread never blocks on a network write.
+
+Multi-worker: an optional state store (state_backend.py) receives every
+snapshot too, so workers that did not run the job can still answer
+/progress and stream it. The store write (SQLite upsert + commit) is
+write-behind: ProgressPersister keeps the latest snapshot per session and
+one background thread writes them, so a progress update made on the event
+loop (e.g. the cache-hit path of /process) never waits on disk. Updates
+arriving while a write is in flight collapse into one; at most
+PROGRESS_PERSIST_INTERVAL seconds pass before the newest one is stored.
+
+Cleanup: the stream closes once the entry reports result_ready (set by
+JobEngine after the result is stored) or the client disconnects; the
+session's subscriber list is removed with the last subscriber.
+
+Configuration (.env):
+  PROGRESS_STREAM_QUEUE     = 32
+  PROGRESS_STREAM_KEEPALIVE = 15   # seconds between SSE keep-alive comments
+  PROGRESS_PERSIST_INTERVAL = 0.2  # seconds, max delay of the shared-state write
+
+Updated: March 2026
+"""
+
+import os
+import json
+import time
+import atexit
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger("BioManual.ProgressStream")
+
+PROGRESS_STREAM_QUEUE     = max(1, int(os.getenv("PROGRESS_STREAM_QUEUE", "32")))
+PROGRESS_STREAM_KEEPALIVE = float(os.getenv("PROGRESS_STREAM_KEEPALIVE", "15"))
+PROGRESS_PERSIST_INTERVAL = max(0.0, float(os.getenv("PROGRESS_PERSIST_INTERVAL", "0.2")))
+
+
+class ProgressHub:
+    """Fan-out of progress snapshots to asyncio subscriber queues."""
+
+    def __init__(self, queue_size: int = PROGRESS_STREAM_QUEUE):
+        self.queue_size = queue_size
+        self._subs = {}    # session_id → [(loop, queue)]
+        self._lock = threading.Lock()
+
+    def subscribe(self, session_id: str) -> asyncio.Queue:
+        q = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subs.setdefault(session_id, []).append((asyncio.get_running_loop(), q))
+        return q
+
+    def unsubscribe(self, session_id: str, q: asyncio.Queue):
+        with self._lock:
+            subs = [s for s in self._subs.get(session_id, []) if s[1] is not q]
+            if subs:
+                self._subs[session_id] = subs
+            else:
+                self._subs.pop(session_id, None)
+
+    def subscriber_count(self, session_id: str = None) -> int:
+        with self._lock:
+            if session_id is not None:
+                return len(self._subs.get(session_id, []))
+            return sum(len(v) for v in self._subs.values())
+
+    def publish(self, session_id: str, snapshot: dict):
+        with self._lock:
+            subs = list(self._subs.get(session_id, []))
+        for loop, q in subs:
+            try:
+                loop.call_soon_threadsafe(self._offer, q, snapshot)
+            except RuntimeError:
+                # Event loop already closed (shutdown) — nothing to deliver to
+                pass
+
+    @staticmethod
+    def _offer(q: asyncio.Queue, snapshot: dict):
+        # Runs on the subscriber's event loop: drop oldest when full
+        if q.full():
+            try:
+                q.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        q.put_nowait(snapshot)
+
+
+class ProgressPersister:
+    """Write-behind of progress snapshots to the state store (latest per session wins)."""
+
+    def __init__(self, state, interval: float = PROGRESS_PERSIST_INTERVAL):
+        self._state = state
+        self._interval = interval
+        self._pending = {}    # session_id → newest snapshot not yet written
+        self._cond = threading.Condition()
+        self._busy = False
+        self._thread = threading.Thread(target=self._run, name="progress-persist", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def submit(self, session_id: str, snapshot: dict):
+        """Non-blocking: replaces any snapshot of the session still waiting."""
+        with self._cond:
+            self._pending[session_id] = snapshot
+            self._cond.notify_all()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything submitted so far is written (shutdown, tests)."""
+        deadline = time.time() + timeout
+        with self._cond:
+            while self._pending or self._busy:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                batch, self._pending = self._pending, {}
+                self._busy = True
+            for session_id, snapshot in batch.items():
+                try:
+                    self._state.save_progress(session_id, snapshot)
+                except Exception as e:
+                    logger.warning(f"⚠️ Progress persist failed ({session_id}): {e}")
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+            if self._interval:
+                time.sleep(self._interval)
+
+
+class ProgressEntry(dict):
+    """One session's progress dict; every write publishes a snapshot."""
+
+    def __init__(self, session_id: str, hub: ProgressHub, data=None, persister=None):
+        super().__init__(data or {})
+        self._session_id = session_id
+        self._hub = hub
+        self._persister = persister
+        self.updated_at = time.time()
+
+    def _publish(self):
+        self.updated_at = time.time()
+        snapshot = dict(self)
+        self._hub.publish(self._session_id, snapshot)
+        if self._persister is not None:
+            self._persister.submit(self._session_id, snapshot)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._publish()
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._publish()
+
+
+class ProgressTracker(dict):
+    """session_id → ProgressEntry. Plain dicts assigned to it are wrapped."""
+
+    def __init__(self, hub: ProgressHub, state=None):
+        super().__init__()
+        self.hub = hub
+        self.state = state if state is not None and getattr(state, "shared", False) else None
+        self.persister = ProgressPersister(self.state) if self.state is not None else None
+
+    def __setitem__(self, session_id, value):
+        if not isinstance(value, ProgressEntry):
+            value = ProgressEntry(session_id, self.hub, value, persister=self.persister)
+        super().__setitem__(session_id, value)
+        value._publish()
+
+    def purge(self, max_age_seconds: float, keep=()) -> int:
+        """Drop entries not updated for max_age_seconds, except sessions in `keep` (jobs still running)."""
+        cutoff = time.time() - max_age_seconds
+        stale = [sid for sid, entry in list(self.items())
+                 if sid not in keep and getattr(entry, "updated_at", 0) < cutoff]
+        for sid in stale:
+            self.pop(sid, None)
+        return len(stale)
+
+
+def sse_event(data: dict, event: str = "progress") -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
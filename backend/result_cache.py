@@ -0,0 +1,208 @@
+"""
+RESULT CACHE — Content-addressed whole-document cache for /process
+===================================================================
+
+Users re-upload the same manual all the time (retry, changed a frontend
+setting, ...). Every upload used to re-run OCR + AI + report building.
+
+The cache key is SHA-256 of the uploaded bytes + X-Language +
+X-Direct-Translate + PIPELINE_VERSION, so a different document, a
+different language / mode, or a pipeline change never hits a stale entry.
+
+Each entry is a directory:
+    <RESULT_CACHE_DIR>/<key>/result.json   → /process payload + artifact map
+    <RESULT_CACHE_DIR>/<key>/files/...     → copies of report / crop / preview files
+
+On a hit the artifacts are restored to their original locations (the
+/files and /output URLs in the payload keep working even if a later
+upload with the same filename overwrote them). Entries are evicted in
+LRU order (result.json mtime) once the total exceeds RESULT_CACHE_MAX_MB.
+
+Configuration (.env):
+  RESULT_CACHE        = true
+  RESULT_CACHE_MAX_MB = 2048
+  RESULT_CACHE_DIR    = result_cache   (relative to backend/, not served over HTTP)
+
+Updated: March 2026
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger("BioManual.ResultCache")
+
+# Bump whenever pipeline output changes (OCR, correction, report layout, ...)
+PIPELINE_VERSION = "v7.5"
+
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE", "true").lower() == "true"
+RESULT_CACHE_MAX_MB  = int(os.getenv("RESULT_CACHE_MAX_MB", "2048"))
+
+
+def cache_key(file_hash: str, lang: str, direct_translate: bool, version: str = PIPELINE_VERSION) -> str:
+    raw = f"{file_hash}|lang={lang}|direct={int(bool(direct_translate))}|{version}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.path.getsize(os.path.join(root, f))
+            except OSError:
+                pass
+    return total
+
+
+def _copy_file(src: str, dest: str):
+    # Real copy, not a hard link: cv2.imwrite / python-docx rewrite files in place,
+    # which would silently change the cached copy through a shared inode.
+    if os.path.exists(dest):
+        os.remove(dest)
+    shutil.copy2(src, dest)
+
+
+class DocumentCache:
+    """Size-bounded LRU cache of /process results + their artifact files."""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sizes = {}   # key → bytes on disk
+        os.makedirs(self.root, exist_ok=True)
+        for key in os.listdir(self.root):
+            entry = os.path.join(self.root, key)
+            if ".tmp" in key:   # interrupted put()
+                shutil.rmtree(entry, ignore_errors=True)
+                continue
+            if os.path.isfile(os.path.join(entry, "result.json")):
+                self._sizes[key] = _dir_size(entry)
+        logger.info(
+            f"✓ Result Cache: {len(self._sizes)} entries, "
+            f"{sum(self._sizes.values()) / 1e6:.1f}/{self.max_bytes / 1e6:.0f} MB"
+        )
+
+    # ─────────────────────────────────────────────
+    # Lookup
+    # ─────────────────────────────────────────────
+    def get(self, key: str):
+        """Cached payload (artifacts restored on disk), or None."""
+        entry = os.path.join(self.root, key)
+        meta_path = os.path.join(entry, "result.json")
+        with self._lock:
+            if not os.path.exists(meta_path):
+                self._sizes.pop(key, None)
+                return None
+            if key not in self._sizes:
+                # Written by another worker process — adopt it
+                self._sizes[key] = _dir_size(entry)
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                for item in meta.get("artifacts", []):
+                    src = os.path.join(entry, "files", item["name"])
+                    dest = item["dest"]
+                    if not os.path.exists(src):
+                        raise FileNotFoundError(src)
+                    # copy2 keeps mtime: same size + mtime = still our file
+                    if os.path.exists(dest):
+                        s, d = os.stat(src), os.stat(dest)
+                        if s.st_size == d.st_size and int(s.st_mtime) == int(d.st_mtime):
+                            continue
+                    os.makedirs(os.path.dirname(dest), exist_ok=True)
+                    _copy_file(src, dest)
+                os.utime(meta_path, None)   # LRU: mark as recently used
+            except Exception as e:
+                logger.warning(f"⚠️ Cache entry {key[:12]} unusable, dropping: {e}")
+                self._drop(key)
+                return None
+        return meta["payload"]
+
+    # ─────────────────────────────────────────────
+    # Store
+    # ─────────────────────────────────────────────
+    def put(self, key: str, payload: dict, artifact_paths):
+        """Store payload + copies of every existing artifact file, then evict LRU entries."""
+        entry = os.path.join(self.root, key)
+        tmp = f"{entry}.tmp{threading.get_ident()}"
+        try:
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.makedirs(os.path.join(tmp, "files"))
+            artifacts = []
+            for idx, path in enumerate(dict.fromkeys(p for p in artifact_paths if p)):
+                if not os.path.isfile(path):
+                    continue
+                name = f"{idx}_{os.path.basename(path)}"
+                _copy_file(path, os.path.join(tmp, "files", name))
+                artifacts.append({"name": name, "dest": os.path.abspath(path)})
+
+            with open(os.path.join(tmp, "result.json"), "w", encoding="utf-8") as f:
+                json.dump({"created": time.time(), "payload": payload, "artifacts": artifacts}, f, ensure_ascii=False)
+
+            with self._lock:
+                self._drop(key)
+                os.replace(tmp, entry)
+                self._sizes[key] = _dir_size(entry)
+                self._evict(keep=key)
+            logger.info(f"💾 Cached result {key[:12]} ({len(artifacts)} files, {self._sizes[key] / 1e6:.1f} MB)")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not cache result: {e}")
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    # ─────────────────────────────────────────────
+    # Eviction (caller holds _lock)
+    # ─────────────────────────────────────────────
+    def _drop(self, key: str):
+        self._sizes.pop(key, None)
+        shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+
+    def _evict(self, keep: str = None):
+        total = sum(self._sizes.values())
+        if total <= self.max_bytes:
+            return
+
+        def _last_used(k):
+            try:
+                return os.path.getmtime(os.path.join(self.root, k, "result.json"))
+            except OSError:
+                return 0
+
+        for key in sorted(self._sizes, key=_last_used):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self._sizes.get(key, 0)
+            self._drop(key)
+            logger.info(f"🧹 Evicted cached result {key[:12]}")
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._sizes),
+            "bytes": sum(self._sizes.values()),
+            "max_bytes": self.max_bytes,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_document_cache(base_dir: str):
+    """Shared cache instance, or None when RESULT_CACHE is disabled."""
+    global _cache
+    if not RESULT_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            root = os.getenv("RESULT_CACHE_DIR") or os.path.join(base_dir, "result_cache")
+            if not os.path.isabs(root):
+                root = os.path.join(base_dir, root)
+            _cache = DocumentCache(root, RESULT_CACHE_MAX_MB * 1024 * 1024)
+    return _cache
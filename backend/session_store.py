@@ -0,0 +1,319 @@
+"""
+SESSION STORE — Bounded, persistent session storage with TTL
+=============================================================
+
+active_sessions used to be a module-level dict: every /process left its
+full structured_data in memory forever, and a restart lost everything.
+
+Two interchangeable backends (SESSION_STORE in .env):
+
+  memory  → MemorySessionStore: LRU capped by an estimated byte size
+            (SESSION_MEMORY_MB) — least recently used sessions are dropped.
+  sqlite  → SQLiteSessionStore: survives restarts. Layout follows
+            example_schema.sql: one `sessions` row per upload and one
+            `manual_content` row per structured_data item, so
+            structured_data is only read from disk when an endpoint
+            (/translate, /supplement, /generate_custom_report) needs it.
+
+Both expire sessions SESSION_TTL_HOURS after their last use.
+
+    store = create_session_store(base_dir)
+    store.put(sid, {"original_filename": ..., "structured_data": [...], "images_count": N})
+    session = store.get(sid)            # None if unknown / expired
+    session["structured_data"]          # loaded lazily (sqlite)
+    store.purge_expired()
+
+Configuration (.env):
+  SESSION_STORE      = sqlite   # sqlite | memory
+  SESSION_TTL_HOURS  = 24
+  SESSION_MEMORY_MB  = 512      # memory backend only
+  SESSION_DB_PATH    = sessions.sqlite   (relative to backend/)
+
+Updated: March 2026
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger("BioManual.SessionStore")
+
+SESSION_STORE     = os.getenv("SESSION_STORE", "sqlite").lower()
+SESSION_TTL_HOURS = float(os.getenv("SESSION_TTL_HOURS", "24"))
+SESSION_MEMORY_MB = int(os.getenv("SESSION_MEMORY_MB", "512"))
+
+
+def _estimate_bytes(session: dict) -> int:
+    try:
+        return len(json.dumps(session, ensure_ascii=False, default=str))
+    except Exception:
+        return 1024
+
+
+class SessionStore:
+    """Interface shared by the backends."""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl = ttl_seconds
+
+    def get(self, session_id: str):
+        raise NotImplementedError
+
+    def put(self, session_id: str, session: dict):
+        raise NotImplementedError
+
+    def delete(self, session_id: str):
+        raise NotImplementedError
+
+    def purge_expired(self) -> int:
+        raise NotImplementedError
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+
+# ══════════════════════════════════════════════
+# In-memory LRU (byte-capped)
+# ══════════════════════════════════════════════
+class MemorySessionStore(SessionStore):
+
+    def __init__(self, ttl_seconds: float, max_bytes: int):
+        super().__init__(ttl_seconds)
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()   # sid → (session, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str):
+        with self._lock:
+            entry = self._items.get(session_id)
+            if entry is None:
+                return None
+            session, size, expires_at = entry
+            if expires_at < time.time():
+                self._remove(session_id)
+                return None
+            self._items[session_id] = (session, size, time.time() + self.ttl)
+            self._items.move_to_end(session_id)
+            return session
+
+    def put(self, session_id: str, session: dict):
+        size = _estimate_bytes(session)
+        with self._lock:
+            self._remove(session_id)
+            self._items[session_id] = (session, size, time.time() + self.ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._items) > 1:
+                old_sid = next(iter(self._items))
+                self._remove(old_sid)
+                logger.info(f"🧹 Session evicted (memory cap): {old_sid}")
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._remove(session_id)
+
+    def _remove(self, session_id: str):
+        entry = self._items.pop(session_id, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, (_, _, exp) in self._items.items() if exp < now]
+            for sid in expired:
+                self._remove(sid)
+        return len(expired)
+
+
+# ══════════════════════════════════════════════
+# SQLite (persistent, lazy structured_data)
+# ══════════════════════════════════════════════
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id        TEXT PRIMARY KEY,
+    original_filename TEXT,
+    images_count      INTEGER DEFAULT 0,
+    item_count        INTEGER DEFAULT 0,
+    extra             TEXT,
+    created_at        REAL NOT NULL,
+    updated_at        REAL NOT NULL,
+    expires_at        REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS manual_content (
+    content_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id      TEXT NOT NULL REFERENCES sessions(session_id) ON DELETE CASCADE,
+    chapter_id      TEXT,
+    sequence_number INTEGER NOT NULL,
+    content_type    TEXT,
+    content_text    TEXT,
+    image_path      TEXT,
+    lang            TEXT DEFAULT 'id',
+    item_json       TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_manual_content_session ON manual_content(session_id, sequence_number);
+CREATE INDEX IF NOT EXISTS idx_manual_content_chapter ON manual_content(session_id, chapter_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at);
+"""
+
+_META_KEYS = ("original_filename", "images_count")
+
+
+class StoredSession:
+    """
+    Session record from SQLite. Behaves like the old session dict;
+    'structured_data' is read from manual_content on first access.
+    """
+
+    def __init__(self, store, session_id: str, meta: dict):
+        self._store = store
+        self.session_id = session_id
+        self._data = dict(meta)
+
+    def _load(self, key):
+        if key == "structured_data" and key not in self._data:
+            self._data[key] = self._store.load_structured_data(self.session_id)
+
+    def __getitem__(self, key):
+        self._load(key)
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+
+    def __contains__(self, key):
+        return key == "structured_data" or key in self._data
+
+    def get(self, key, default=None):
+        self._load(key)
+        return self._data.get(key, default)
+
+    def to_dict(self) -> dict:
+        self._load("structured_data")
+        return dict(self._data)
+
+
+class SQLiteSessionStore(SessionStore):
+
+    def __init__(self, ttl_seconds: float, path: str):
+        super().__init__(ttl_seconds)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        logger.info(f"✓ Session Store: SQLite ({path}), TTL={ttl_seconds / 3600:.0f}h")
+
+    def get(self, session_id: str):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT original_filename, images_count, extra, expires_at FROM sessions WHERE session_id = ?",
+                (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[3] < now:
+                self._delete(session_id)
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE sessions SET expires_at = ? WHERE session_id = ?", (now + self.ttl, session_id)
+            )
+            self._conn.commit()
+        meta = json.loads(row[2]) if row[2] else {}
+        meta.update({"original_filename": row[0], "images_count": row[1]})
+        return StoredSession(self, session_id, meta)
+
+    def load_structured_data(self, session_id: str) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item_json FROM manual_content WHERE session_id = ? ORDER BY sequence_number",
+                (session_id,)
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def put(self, session_id: str, session):
+        if isinstance(session, StoredSession):
+            session = session.to_dict()
+        now = time.time()
+        items = session.get("structured_data") or []
+        extra = {k: v for k, v in session.items() if k not in _META_KEYS and k != "structured_data"}
+        rows = [
+            (
+                session_id,
+                item.get("chapter_id"),
+                seq,
+                item.get("type"),
+                item.get("normalized") or item.get("original") or "",
+                item.get("crop_local"),
+                item.get("lang") or "id",
+                json.dumps(item, ensure_ascii=False, default=str),
+            )
+            for seq, item in enumerate(items)
+        ]
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, original_filename, images_count, item_count, extra,"
+                " created_at, updated_at, expires_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(session_id) DO UPDATE SET original_filename = excluded.original_filename,"
+                " images_count = excluded.images_count, item_count = excluded.item_count,"
+                " extra = excluded.extra, updated_at = excluded.updated_at, expires_at = excluded.expires_at",
+                (session_id, session.get("original_filename"), session.get("images_count", 0), len(items),
+                 json.dumps(extra, default=str), now, now, now + self.ttl)
+            )
+            self._conn.execute("DELETE FROM manual_content WHERE session_id = ?", (session_id,))
+            self._conn.executemany(
+                "INSERT INTO manual_content (session_id, chapter_id, sequence_number, content_type,"
+                " content_text, image_path, lang, item_json) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._delete(session_id)
+            self._conn.commit()
+
+    def _delete(self, session_id: str):
+        self._conn.execute("DELETE FROM manual_content WHERE session_id = ?", (session_id,))
+        self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [r[0] for r in self._conn.execute(
+                "SELECT session_id FROM sessions WHERE expires_at < ?", (now,)
+            ).fetchall()]
+            for sid in expired:
+                self._delete(sid)
+            self._conn.commit()
+        return len(expired)
+
+
+def create_session_store(base_dir: str, shared: bool = False) -> SessionStore:
+    """
+    Backend selected by SESSION_STORE (falls back to memory if SQLite cannot open).
+    shared=True (multi-worker state) always uses SQLite so every worker sees the sessions.
+    """
+    ttl = SESSION_TTL_HOURS * 3600
+    if shared and SESSION_STORE != "sqlite":
+        logger.warning("⚠️ SESSION_STORE=memory is per worker — using SQLite for shared state")
+    if SESSION_STORE == "sqlite" or shared:
+        path = os.getenv("SESSION_DB_PATH") or "sessions.sqlite"
+        if not os.path.isabs(path):
+            path = os.path.join(base_dir, path)
+        try:
+            return SQLiteSessionStore(ttl, path)
+        except Exception as e:
+            logger.warning(f"⚠️ SQLite session store unavailable ({e}) — using memory store")
+    logger.info(f"✓ Session Store: memory (cap {SESSION_MEMORY_MB} MB, TTL={SESSION_TTL_HOURS:.0f}h)")
+    return MemorySessionStore(ttl, SESSION_MEMORY_MB * 1024 * 1024)
@@ -0,0 +1,94 @@
+"""
+SPATIAL INDEX — Grid-bucket index for bbox overlap queries
+===========================================================
+
+The vision pipeline filtered boxes with all-pairs loops: every PaddleOCR
+line against every table/figure box, every Tesseract block against every
+existing element, every bordered box against every Surya region, and in
+direct_reader every element against every table. Dense spec-sheet pages
+have thousands of lines, so those loops were quadratic.
+
+BBoxIndex buckets [x1, y1, x2, y2] boxes into square grid cells; a query
+only looks at boxes sharing a cell with it.
+
+    index = BBoxIndex(visual_bboxes)
+    index.overlaps(line_bbox, 0.40)      # any box covering > 40% of line_bbox?
+    index.covered_by(table_bbox, 0.5)    # ids of boxes > 50% inside table_bbox
+    i = index.insert(bbox); index.remove(i)
+
+Box ids are insertion order, so they line up with a list built alongside.
+Overlap ratios match the old loops: intersection / area of the box being
+tested (area 0 counts as 1), strictly greater than the threshold.
+
+Updated: March 2026
+"""
+
+DEFAULT_CELL = 128   # px at 300 DPI ≈ one text line pitch × 3; use ~32 for 72 DPI PDF points
+
+
+def overlap_ratio(box, other) -> float:
+    """Intersection of box and other divided by the area of box."""
+    ox1 = max(box[0], other[0])
+    oy1 = max(box[1], other[1])
+    ox2 = min(box[2], other[2])
+    oy2 = min(box[3], other[3])
+    if ox2 <= ox1 or oy2 <= oy1:
+        return 0.0
+    area = (box[2] - box[0]) * (box[3] - box[1]) or 1
+    return (ox2 - ox1) * (oy2 - oy1) / area
+
+
+class BBoxIndex:
+
+    def __init__(self, bboxes=(), cell: float = DEFAULT_CELL):
+        self.cell = cell
+        self._boxes = []      # id → bbox (None once removed)
+        self._cells = {}      # (cx, cy) → [ids]
+        for bbox in bboxes:
+            self.insert(bbox)
+
+    def _cell_range(self, bbox):
+        c = self.cell
+        return (range(int(bbox[0] // c), int(bbox[2] // c) + 1),
+                range(int(bbox[1] // c), int(bbox[3] // c) + 1))
+
+    def insert(self, bbox) -> int:
+        idx = len(self._boxes)
+        self._boxes.append(bbox)
+        xs, ys = self._cell_range(bbox)
+        for cx in xs:
+            for cy in ys:
+                self._cells.setdefault((cx, cy), []).append(idx)
+        return idx
+
+    def remove(self, idx: int):
+        bbox = self._boxes[idx]
+        if bbox is None:
+            return
+        self._boxes[idx] = None
+        xs, ys = self._cell_range(bbox)
+        for cx in xs:
+            for cy in ys:
+                bucket = self._cells.get((cx, cy))
+                if bucket:
+                    bucket.remove(idx)
+
+    def candidates(self, bbox) -> list:
+        """Ids of live boxes sharing at least one grid cell with bbox (ascending)."""
+        xs, ys = self._cell_range(bbox)
+        found = set()
+        for cx in xs:
+            for cy in ys:
+                found.update(self._cells.get((cx, cy), ()))
+        return sorted(found)
+
+    def overlaps(self, bbox, threshold: float) -> bool:
+        """True if some indexed box covers more than `threshold` of bbox's area."""
+        return any(overlap_ratio(bbox, self._boxes[i]) > threshold for i in self.candidates(bbox))
+
+    def covered_by(self, bbox, threshold: float) -> list:
+        """Ids of indexed boxes with more than `threshold` of their own area inside bbox."""
+        return [i for i in self.candidates(bbox) if overlap_ratio(self._boxes[i], bbox) > threshold]
+
+    def __len__(self):
+        return sum(1 for b in self._boxes if b is not None)
@@ -0,0 +1,149 @@
+"""
+STATE BACKEND — Shared job state for multi-worker deployments
+==============================================================
+
+With `uvicorn --workers N` every worker is a separate process. Progress
+entries and job results used to live only in the memory of the worker
+that ran the job, so a /progress, /result or /translate call routed to
+another worker answered "Session not found".
+
+StateStore is the interface main.py uses for cross-worker state:
+
+  save_progress(sid, snapshot) / load_progress(sid)
+  save_result(sid, payload)    / load_result(sid)
+  purge(max_age_seconds)
+
+  LocalStateStore   → no-op: single process, in-memory state is enough (default)
+  SQLiteStateStore  → one SQLite file (WAL) shared by all workers on the
+                      machine; no external services needed.
+
+What else is shared between workers:
+  - sessions     → session_store.py (SQLite backend, forced when STATE_BACKEND=sqlite)
+  - artifacts    → files in backend/ and output_results/ (same disk)
+  - result cache → result_cache.py entries on disk, adopted by any worker
+  - page cache   → page_cache.py (SQLite)
+Per-worker by design: the vision models (each worker loads its own) and
+the OpenRouter client (configuration only, no session state).
+
+Configuration (.env):
+  UVICORN_WORKERS = 1
+  STATE_BACKEND   = local    # local | sqlite  (default: sqlite when UVICORN_WORKERS > 1)
+  STATE_DB_PATH   = shared_state.sqlite   (relative to backend/)
+
+Updated: March 2026
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger("BioManual.StateBackend")
+
+UVICORN_WORKERS = max(1, int(os.getenv("UVICORN_WORKERS", "1")))
+STATE_BACKEND   = (os.getenv("STATE_BACKEND") or ("sqlite" if UVICORN_WORKERS > 1 else "local")).lower()
+
+
+class StateStore:
+    """Single-process implementation: nothing to share."""
+
+    shared = False
+
+    def save_progress(self, session_id: str, snapshot: dict):
+        pass
+
+    def load_progress(self, session_id: str):
+        return None
+
+    def save_result(self, session_id: str, payload: dict):
+        pass
+
+    def load_result(self, session_id: str):
+        return None
+
+    def purge(self, max_age_seconds: float) -> int:
+        return 0
+
+
+LocalStateStore = StateStore
+
+
+class SQLiteStateStore(StateStore):
+
+    shared = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS progress ("
+            "  session_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS job_results ("
+            "  session_id TEXT PRIMARY KEY, data TEXT NOT NULL, finished_at REAL NOT NULL);"
+        )
+        self._conn.commit()
+        logger.info(f"✓ Shared State: SQLite ({path})")
+
+    def _upsert(self, table: str, ts_col: str, session_id: str, data: dict):
+        payload = json.dumps(data, ensure_ascii=False, default=str)
+        with self._lock:
+            try:
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {table} (session_id, data, {ts_col}) VALUES (?, ?, ?)",
+                    (session_id, payload, time.time())
+                )
+                self._conn.commit()
+            except Exception as e:
+                logger.warning(f"⚠️ Shared state write failed ({table}): {e}")
+
+    def _select(self, table: str, ts_col: str, session_id: str):
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    f"SELECT data, {ts_col} FROM {table} WHERE session_id = ?", (session_id,)
+                ).fetchone()
+            except Exception as e:
+                logger.warning(f"⚠️ Shared state read failed ({table}): {e}")
+                return None
+        if row is None:
+            return None
+        data = json.loads(row[0])
+        if table == "progress":
+            data["_updated_at"] = row[1]
+        return data
+
+    def save_progress(self, session_id: str, snapshot: dict):
+        self._upsert("progress", "updated_at", session_id, snapshot)
+
+    def load_progress(self, session_id: str):
+        return self._select("progress", "updated_at", session_id)
+
+    def save_result(self, session_id: str, payload: dict):
+        self._upsert("job_results", "finished_at", session_id, payload)
+
+    def load_result(self, session_id: str):
+        return self._select("job_results", "finished_at", session_id)
+
+    def purge(self, max_age_seconds: float) -> int:
+        cutoff = time.time() - max_age_seconds
+        with self._lock:
+            n = self._conn.execute("DELETE FROM progress WHERE updated_at < ?", (cutoff,)).rowcount
+            n += self._conn.execute("DELETE FROM job_results WHERE finished_at < ?", (cutoff,)).rowcount
+            self._conn.commit()
+        return n
+
+
+def create_state_store(base_dir: str) -> StateStore:
+    if STATE_BACKEND == "sqlite":
+        path = os.getenv("STATE_DB_PATH") or "shared_state.sqlite"
+        if not os.path.isabs(path):
+            path = os.path.join(base_dir, path)
+        return SQLiteStateStore(path)
+    if UVICORN_WORKERS > 1:
+        logger.warning("⚠️ UVICORN_WORKERS > 1 with STATE_BACKEND=local — progress/results are per worker")
+    return LocalStateStore()
@@ -0,0 +1,160 @@
+"""
+SURYA RUNTIME — CPU precision, threads and input size for Surya layout
+=======================================================================
+
+On the CPU nodes Surya's LayoutPredictor is the most expensive call per
+page: a full fp32 transformer, torch's default thread pools and the page at
+whatever resolution prepare_image produced (up-scaled for OCR).
+
+build_layout_predictor() loads FoundationPredictor + LayoutPredictor with:
+
+  SURYA_PRECISION
+    fp32  → unchanged (default)
+    bf16  → model weights in bfloat16 (fast on CPUs with AVX512-BF16 / AMX)
+    int8  → torch dynamic quantization of every nn.Linear (int8 weights,
+            activations quantized per call) — no calibration data needed
+    Reduced precision applies on CPU only; on CUDA Surya keeps its own dtype.
+
+  SURYA_TORCH_THREADS / SURYA_TORCH_INTEROP_THREADS
+    torch.set_num_threads / set_interop_threads, set once before loading
+    (0 = cores / OCR_WORKERS for intra-op, torch default for inter-op).
+
+layout_context() wraps each LayoutPredictor call in torch.inference_mode().
+
+cap_image() scales a page down so its longer side is at most
+SURYA_MAX_SIDE before it goes to Surya; bboxes are scaled back by the
+caller. 0 = no cap.
+
+Labels drive the table / figure decisions (SURYA_LABEL_MAP), so check a
+reduced-precision setting against fp32 on real pages before enabling it:
+
+    python check_surya_precision.py samples/*.png --precision int8 --max-side 1600
+
+layout_signature() is part of the page layout cache key whenever the
+precision or the cap differs from the default.
+
+Configuration (.env):
+  SURYA_PRECISION             = fp32    # fp32 | bf16 | int8
+  SURYA_TORCH_THREADS         = 0
+  SURYA_TORCH_INTEROP_THREADS = 0
+  SURYA_INFERENCE_MODE        = true
+  SURYA_MAX_SIDE              = 0       # px, longer page side fed to Surya (0 = no cap)
+
+Updated: March 2026
+"""
+
+import os
+import logging
+from contextlib import nullcontext
+
+import cv2
+
+from ocr_pool import OCR_WORKERS
+
+logger = logging.getLogger("BioManual.SuryaRuntime")
+
+SURYA_PRECISION             = os.getenv("SURYA_PRECISION", "fp32").lower()
+SURYA_TORCH_THREADS         = int(os.getenv("SURYA_TORCH_THREADS", "0"))
+SURYA_TORCH_INTEROP_THREADS = int(os.getenv("SURYA_TORCH_INTEROP_THREADS", "0"))
+SURYA_INFERENCE_MODE        = os.getenv("SURYA_INFERENCE_MODE", "true").lower() == "true"
+SURYA_MAX_SIDE              = int(os.getenv("SURYA_MAX_SIDE", "0"))
+
+PRECISIONS = ("fp32", "bf16", "int8")
+
+_threads_configured = False
+
+
+def configure_torch_threads(threads: int = SURYA_TORCH_THREADS, interop: int = SURYA_TORCH_INTEROP_THREADS):
+    """Set torch's intra-op / inter-op pools once per process (inter-op can only be set before first use)."""
+    global _threads_configured
+    if _threads_configured:
+        return
+    import torch
+    _threads_configured = True
+    torch.set_num_threads(threads or max(1, (os.cpu_count() or 1) // max(1, OCR_WORKERS)))
+    if interop:
+        try:
+            torch.set_interop_threads(interop)
+        except RuntimeError as e:    # parallel work already started in this process
+            logger.warning(f"⚠️ torch inter-op threads not set: {e}")
+    logger.info(f"✓ torch threads: {torch.get_num_threads()} intra-op, {torch.get_num_interop_threads()} inter-op")
+
+
+def _on_cpu(foundation) -> bool:
+    try:
+        return next(foundation.model.parameters()).device.type == "cpu"
+    except Exception:
+        return True
+
+
+def _load_foundation(checkpoint, precision: str):
+    import torch
+    from surya.foundation import FoundationPredictor
+
+    if precision == "bf16":
+        try:
+            return FoundationPredictor(checkpoint=checkpoint, dtype=torch.bfloat16)
+        except TypeError:    # Surya without the dtype argument
+            foundation = FoundationPredictor(checkpoint=checkpoint)
+            if _on_cpu(foundation):
+                foundation.model = foundation.model.to(dtype=torch.bfloat16)
+            return foundation
+    if precision == "int8":
+        try:
+            return FoundationPredictor(checkpoint=checkpoint, dtype=torch.float32)
+        except TypeError:
+            return FoundationPredictor(checkpoint=checkpoint)
+    return FoundationPredictor(checkpoint=checkpoint)
+
+
+def build_layout_predictor(precision: str = SURYA_PRECISION, checkpoint=None):
+    """(FoundationPredictor, LayoutPredictor) with the requested CPU precision."""
+    import torch
+    from surya.layout import LayoutPredictor
+    from surya.settings import settings as surya_settings
+
+    if precision not in PRECISIONS:
+        logger.warning(f"⚠️ Unknown SURYA_PRECISION '{precision}' — using fp32")
+        precision = "fp32"
+    configure_torch_threads()
+
+    foundation = _load_foundation(checkpoint or surya_settings.LAYOUT_MODEL_CHECKPOINT, precision)
+    if precision != "fp32" and not _on_cpu(foundation):
+        logger.info(f"ℹ️ SURYA_PRECISION={precision} ignored — Surya runs on GPU")
+    elif precision == "int8":
+        foundation.model.eval()
+        foundation.model = torch.ao.quantization.quantize_dynamic(
+            foundation.model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+        logger.info("✓ Surya layout: int8 dynamic quantization (nn.Linear)")
+    elif precision == "bf16":
+        logger.info("✓ Surya layout: bfloat16 weights")
+    return foundation, LayoutPredictor(foundation)
+
+
+def layout_context():
+    """torch.inference_mode() around a LayoutPredictor call (no-op when disabled)."""
+    if not SURYA_INFERENCE_MODE:
+        return nullcontext()
+    import torch
+    return torch.inference_mode()
+
+
+def cap_image(image, max_side: int = SURYA_MAX_SIDE):
+    """(image scaled so max(h, w) <= max_side, scale factor); unchanged when no cap applies."""
+    h, w = image.shape[:2]
+    if max_side <= 0 or max(h, w) <= max_side:
+        return image, 1.0
+    scale = max_side / max(h, w)
+    resized = cv2.resize(image, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+    return resized, scale
+
+
+def layout_signature(precision: str = SURYA_PRECISION, max_side: int = SURYA_MAX_SIDE) -> str:
+    """'' for the default runtime (existing layout cache entries stay valid), else e.g. 'int8,max=1600'."""
+    parts = []
+    if precision in PRECISIONS and precision != "fp32":
+        parts.append(precision)
+    if max_side > 0:
+        parts.append(f"max={max_side}")
+    return ",".join(parts)
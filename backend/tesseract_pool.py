@@ -0,0 +1,194 @@
+"""
+TESSERACT POOL — Long-lived Tesseract engines for Indonesian OCR
+=================================================================
+
+pytesseract.image_to_data() starts a new `tesseract` process for every
+call: the 'ind' traineddata is reloaded and the image goes through temp
+files each time — Stage 2.55 (the Indonesian full-page pass, run when
+OCR_FAST_MODE=false) paid that on every page.
+
+TesseractPool keeps TESSERACT_WORKERS engines alive and hands them out to
+threads:
+
+  tesserocr  → one PyTessBaseAPI per worker, language data loaded once;
+               the image is passed in memory and Recognize() releases the
+               GIL, so pages are OCR'd concurrently inside the process.
+  cli        → fallback when tesserocr is not installed: pytesseract calls
+               (still one process per call) run on the pool's threads.
+
+    pool = get_tesseract_pool()
+    data = pool.image_to_data(img_bgr, psm=3)           # pytesseract-style DICT
+    future = pool.submit(img_bgr, psm=3)                # run beside PaddleOCR
+    future = pool.submit(img_bgr, preprocess=fn)        # fn(img) runs on the pool thread first
+
+Configuration (.env):
+  TESSERACT_WORKERS = 0          # 0 = min(4, CPU count)
+  TESSERACT_BACKEND = auto       # auto | tesserocr | cli
+  TESSERACT_LANG    = ind
+
+Updated: March 2026
+"""
+
+import os
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+logger = logging.getLogger("BioManual.TesseractPool")
+
+TESSERACT_WORKERS = int(os.getenv("TESSERACT_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+TESSERACT_BACKEND = os.getenv("TESSERACT_BACKEND", "auto").lower()
+TESSERACT_LANG    = os.getenv("TESSERACT_LANG", "ind")
+
+try:
+    from tesserocr import PyTessBaseAPI, RIL, OEM, iterate_level
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+try:
+    import pytesseract
+    PYTESSERACT_AVAILABLE = True
+except ImportError:
+    PYTESSERACT_AVAILABLE = False
+
+from PIL import Image
+
+_DATA_KEYS = ("level", "block_num", "par_num", "line_num", "word_num",
+              "left", "top", "width", "height", "conf", "text")
+
+
+def _to_pil(image):
+    """BGR / grayscale ndarray (or PIL image) → PIL image for Tesseract."""
+    if isinstance(image, Image.Image):
+        return image
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return Image.fromarray(image)
+
+
+class TesseractPool:
+
+    def __init__(self, workers: int = TESSERACT_WORKERS, lang: str = TESSERACT_LANG,
+                 backend: str = TESSERACT_BACKEND):
+        if backend == "auto":
+            backend = "tesserocr" if TESSEROCR_AVAILABLE else "cli"
+        if backend == "tesserocr" and not TESSEROCR_AVAILABLE:
+            logger.warning("⚠️ TESSERACT_BACKEND=tesserocr but tesserocr is not installed — using cli")
+            backend = "cli"
+        self.backend = backend
+        self.lang = lang
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tesseract")
+        # Idle engines (tesserocr); created lazily up to `workers`
+        self._apis = queue.Queue()
+        self._created = 0
+        self._create_lock = threading.Lock()
+        self._closed = False
+        logger.info(f"✓ Tesseract Pool: {self.workers} workers ({backend}, lang={lang})")
+        if backend == "cli":
+            logger.info("   (pip install tesserocr keeps the engines loaded between calls)")
+
+    # ── engine checkout (tesserocr) ──────────────────────────────
+    def _acquire(self):
+        try:
+            return self._apis.get_nowait()
+        except queue.Empty:
+            pass
+        with self._create_lock:
+            if self._created < self.workers:
+                self._created += 1
+                return PyTessBaseAPI(lang=self.lang, oem=OEM.DEFAULT)
+        return self._apis.get()
+
+    def _release(self, api):
+        if self._closed:
+            api.End()
+        else:
+            self._apis.put(api)
+
+    # ── recognition ─────────────────────────────────────────────
+    def image_to_data(self, image, psm: int = 3) -> dict:
+        """
+        Word-level boxes + confidences, same keys as
+        pytesseract.image_to_data(output_type=Output.DICT).
+        Runs on the calling thread.
+        """
+        pil_img = _to_pil(image)
+        if self.backend == "cli":
+            return pytesseract.image_to_data(
+                pil_img, lang=self.lang, config=f'--oem 3 --psm {psm}',
+                output_type=pytesseract.Output.DICT
+            )
+
+        api = self._acquire()
+        try:
+            api.SetPageSegMode(psm)
+            api.SetImage(pil_img)
+            api.Recognize()
+            return self._collect_words(api)
+        finally:
+            api.Clear()
+            self._release(api)
+
+    @staticmethod
+    def _collect_words(api) -> dict:
+        data = {k: [] for k in _DATA_KEYS}
+        it = api.GetIterator()
+        if it is None:
+            return data
+        block = par = line = word = 0
+        for r in iterate_level(it, RIL.WORD):
+            if r.IsAtBeginningOf(RIL.BLOCK):
+                block, par, line, word = block + 1, 0, 0, 0
+            if r.IsAtBeginningOf(RIL.PARA):
+                par, line, word = par + 1, 0, 0
+            if r.IsAtBeginningOf(RIL.TEXTLINE):
+                line, word = line + 1, 0
+            word += 1
+            box = r.BoundingBox(RIL.WORD)
+            if box is None:
+                continue
+            x1, y1, x2, y2 = box
+            for key, value in zip(_DATA_KEYS, (5, block, par, line, word, x1, y1,
+                                               x2 - x1, y2 - y1, r.Confidence(RIL.WORD),
+                                               r.GetUTF8Text(RIL.WORD) or "")):
+                data[key].append(value)
+        return data
+
+    def submit(self, image, psm: int = 3, preprocess=None):
+        """image_to_data() on a pool thread → Future. `preprocess(image)` runs on that thread too."""
+        if preprocess is None:
+            return self._executor.submit(self.image_to_data, image, psm)
+        return self._executor.submit(lambda: self.image_to_data(preprocess(image), psm))
+
+    def close(self):
+        self._closed = True
+        self._executor.shutdown(wait=True)
+        while True:
+            try:
+                self._apis.get_nowait().End()
+            except queue.Empty:
+                break
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_tesseract_pool():
+    """Shared pool, or None when neither tesserocr nor pytesseract is usable."""
+    global _pool
+    if not (TESSEROCR_AVAILABLE or PYTESSERACT_AVAILABLE):
+        return None
+    with _pool_lock:
+        if _pool is None:
+            try:
+                _pool = TesseractPool()
+            except Exception as e:
+                logger.warning(f"⚠️ Tesseract pool unavailable: {e}")
+                return None
+    return _pool
@@ -0,0 +1,79 @@
+"""
+Regression test: blank / figure-only page pre-check (blank_page.py)
+===================================================================
+
+classify_page decides which pages skip Surya + PaddleOCR, so a wrong
+verdict either wastes a full scan or drops text. A white (or lightly
+noisy) page must be "empty", a page holding one drawing must be "figure",
+and pages with text must come back "sparse" or "content".
+
+    python -m pytest test_blank_page.py      (or: python test_blank_page.py)
+
+Updated: March 2026
+"""
+
+import cv2
+import numpy as np
+
+from blank_page import SKIPPED_KINDS, classify_page
+
+PAGE_W, PAGE_H = 2480, 3508   # A4 @ 300 DPI
+
+
+def blank(noise=0.0, seed=0):
+    page = np.full((PAGE_H, PAGE_W, 3), 255, np.uint8)
+    if noise:
+        rng = np.random.default_rng(seed)
+        page = np.clip(page.astype(np.int16) + rng.normal(0, noise, page.shape), 0, 255).astype(np.uint8)
+    return page
+
+
+def write(page, lines, top=200):
+    for i, text in enumerate(lines):
+        cv2.putText(page, text, (150, top + i * 80), cv2.FONT_HERSHEY_SIMPLEX,
+                    1.3, (0, 0, 0), 3, cv2.LINE_AA)
+    return page
+
+
+def test_blank_pages_are_empty():
+    assert classify_page(blank())["kind"] == "empty"
+    assert classify_page(blank(noise=6.0, seed=1))["kind"] == "empty"
+    # Gray scanner-bed edge in the margin is not ink
+    page = blank()
+    page[:, :40] = 90
+    assert classify_page(page)["kind"] == "empty"
+    assert classify_page(blank()[:, :, 0])["kind"] == "empty"   # grayscale input
+
+
+def test_figure_only_page():
+    page = blank()
+    # Instrument schematic: one connected outline with filled parts
+    cv2.rectangle(page, (500, 900), (2000, 2400), (0, 0, 0), 12)
+    cv2.circle(page, (1250, 1650), 400, (0, 0, 0), 12)
+    cv2.line(page, (500, 1650), (2000, 1650), (0, 0, 0), 12)
+    cv2.rectangle(page, (1150, 1550), (1350, 1750), (40, 40, 40), -1)
+    verdict = classify_page(page)
+    assert verdict["kind"] == "figure", verdict
+    assert verdict["kind"] in SKIPPED_KINDS
+    x1, y1, x2, y2 = verdict["ink_bbox"]
+    assert abs(x1 - 500) < 40 and abs(y1 - 900) < 40
+    assert abs(x2 - 2000) < 40 and abs(y2 - 2400) < 40
+
+
+def test_text_pages_are_read():
+    # A section-divider page: two short lines in the middle of the page
+    sparse = classify_page(write(blank(), ["Section 4  Maintenance", "Cleaning and storage"], top=1700))
+    assert sparse["kind"] == "sparse", sparse
+    assert sparse["kind"] not in SKIPPED_KINDS
+
+    lines = [f"Step {i:02d}  Check the sample holder and close the lid before start" for i in range(40)]
+    content = classify_page(write(blank(), lines))
+    assert content["kind"] == "content", content
+    assert content["kind"] not in SKIPPED_KINDS
+
+
+if __name__ == "__main__":
+    test_blank_pages_are_empty()
+    test_figure_only_page()
+    test_text_pages_are_read()
+    print("ok")
@@ -0,0 +1,57 @@
+"""
+Regression test: vectorized column-gap detection (column_detect.py)
+===================================================================
+
+gap_runs / find_column_gaps replaced the per-pixel `for x in range(w)`
+loop of main.py and direct_reader. They must return exactly what the old
+loop returned — on 1-, 2- and 3-column pages and on random masks,
+including runs that touch the left or right edge.
+
+    python -m pytest test_column_detect.py      (or: python test_column_detect.py)
+
+Updated: March 2026
+"""
+
+import numpy as np
+
+from bench_column_gaps import legacy_find_column_gaps, synthetic_page
+from column_detect import find_column_gaps, gap_runs
+
+
+def legacy_gap_runs(is_gap):
+    """Run boundaries as the old loop saw them: a run closes only at a non-gap pixel."""
+    runs = []
+    in_gap = False
+    gap_start = 0
+    for x in range(len(is_gap)):
+        if is_gap[x] and not in_gap:
+            gap_start = x
+            in_gap = True
+        elif not is_gap[x] and in_gap:
+            runs.append((gap_start, x))
+            in_gap = False
+    return runs
+
+
+def test_gap_runs_matches_loop():
+    rng = np.random.default_rng(0)
+    masks = [np.zeros(50, bool), np.ones(50, bool), np.array([True]), np.array([False])]
+    masks += [rng.random(int(rng.integers(1, 400))) < p for p in (0.1, 0.5, 0.9) for _ in range(30)]
+    for mask in masks:
+        starts, ends = gap_runs(mask)
+        assert list(zip(starts.tolist(), ends.tolist())) == legacy_gap_runs(mask)
+
+
+def test_find_column_gaps_matches_loop():
+    for num_cols in (1, 2, 3):
+        for seed in (0, 1):
+            page = synthetic_page(num_cols, seed=seed)
+            gaps = find_column_gaps(page)
+            assert gaps == legacy_find_column_gaps(page)
+            assert len(gaps) == num_cols - 1, f"{num_cols}-col page: {gaps}"
+
+
+if __name__ == "__main__":
+    test_gap_runs_matches_loop()
+    test_find_column_gaps_matches_loop()
+    print("ok")
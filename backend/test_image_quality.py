@@ -0,0 +1,71 @@
+"""
+Regression test: page skew estimation and deskew (image_quality.py)
+===================================================================
+
+A text page rotated by a known angle must be measured back to that angle
+(estimate_page_skew returns the correction, i.e. the opposite sign), and
+deskew_page must leave a page whose remaining skew is negligible. Straight
+and empty pages must not be rotated at all.
+
+    python -m pytest test_image_quality.py      (or: python test_image_quality.py)
+
+Updated: March 2026
+"""
+
+import cv2
+import numpy as np
+
+from image_quality import deskew_page, estimate_page_skew, needs_deskew
+
+PAGE_W, PAGE_H = 2480, 3508   # A4 @ 300 DPI
+TOLERANCE = 0.3               # degrees — the same threshold needs_deskew uses
+
+ANGLES = [-3.5, -2.0, -0.8, 1.2, 2.0, 4.0]
+
+
+def render_page():
+    page = np.full((PAGE_H, PAGE_W, 3), 255, np.uint8)
+    for i in range(40):
+        cv2.putText(page, f"Step {i:02d}  Check the sample holder and close the lid before start",
+                    (150, 200 + i * 80), cv2.FONT_HERSHEY_SIMPLEX, 1.3, (0, 0, 0), 3, cv2.LINE_AA)
+    return page
+
+
+def rotate(page, angle):
+    M = cv2.getRotationMatrix2D((PAGE_W / 2, PAGE_H / 2), angle, 1.0)
+    return cv2.warpAffine(page, M, (PAGE_W, PAGE_H), flags=cv2.INTER_CUBIC,
+                          borderMode=cv2.BORDER_CONSTANT, borderValue=(255, 255, 255))
+
+
+def test_estimate_recovers_known_angle():
+    page = render_page()
+    for angle in ANGLES:
+        measured = estimate_page_skew(rotate(page, angle))
+        assert abs(measured + angle) <= TOLERANCE, f"rotated {angle}°, measured {measured}°"
+
+
+def test_straight_and_empty_pages_stay_untouched():
+    page = render_page()
+    assert not needs_deskew(estimate_page_skew(page))
+    straight, angle = deskew_page(page)
+    assert straight is page
+
+    blank = np.full((PAGE_H, PAGE_W, 3), 255, np.uint8)
+    assert estimate_page_skew(blank) == 0.0
+    assert deskew_page(blank)[0] is blank
+
+
+def test_deskew_page_straightens():
+    page = render_page()
+    for angle in (-2.5, 3.0):
+        straight, applied = deskew_page(rotate(page, angle))
+        assert straight.shape == page.shape
+        assert abs(applied + angle) <= TOLERANCE
+        assert abs(estimate_page_skew(straight)) <= TOLERANCE
+
+
+if __name__ == "__main__":
+    test_estimate_recovers_known_angle()
+    test_straight_and_empty_pages_stay_untouched()
+    test_deskew_page_straightens()
+    print("ok")
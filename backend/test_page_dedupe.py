@@ -0,0 +1,73 @@
+"""
+Regression test: near-duplicate page verification (page_dedupe.py)
+==================================================================
+
+Two renderings of a 40-line spec page must match when they only differ by
+a small shift and scan noise, and must NOT match when a single value
+changes ("220 V" → "230 V", "T1.6A" → "T1.8A", ...) — otherwise the
+second page would silently get the first page's text.
+
+    python -m pytest test_page_dedupe.py      (or: python test_page_dedupe.py)
+
+Updated: March 2026
+"""
+
+import cv2
+import numpy as np
+
+from page_dedupe import DuplicatePageIndex, page_fingerprint
+
+PAGE_W, PAGE_H = 2480, 3508   # A4 @ 300 DPI
+
+BASE_LINES = [f"Item {i:02d}  Rated voltage 220 V  Current 5 A  Fuse T1.6A  Supply AC  Mode {i % 4}"
+              for i in range(40)]
+
+# (line index, old, new) — one changed value each
+SINGLE_CHANGES = [
+    (17, "220 V", "230 V"),
+    (5, "5 A", "8 A"),
+    (31, "T1.6A", "T1.8A"),
+    (22, "220", "120"),
+    (9, "AC", "DC"),
+]
+
+
+def render(lines, dx=0, dy=0, noise=0.0, seed=0):
+    page = np.full((PAGE_H, PAGE_W, 3), 255, np.uint8)
+    for i, text in enumerate(lines):
+        cv2.putText(page, text, (150 + dx, 200 + i * 80 + dy), cv2.FONT_HERSHEY_SIMPLEX,
+                    1.3, (0, 0, 0), 3, cv2.LINE_AA)
+    if noise:
+        rng = np.random.default_rng(seed)
+        page = np.clip(page.astype(np.int16) + rng.normal(0, noise, page.shape), 0, 255).astype(np.uint8)
+    return page
+
+
+def _match(a, b):
+    index = DuplicatePageIndex()
+    index.add("a", page_fingerprint(a))
+    return index.find(page_fingerprint(b))
+
+
+def test_identical_and_shifted_pages_match():
+    base = render(BASE_LINES)
+    assert _match(base, render(BASE_LINES)) is not None
+    match = _match(base, render(BASE_LINES, dx=6, dy=-9, noise=6.0, seed=1))
+    assert match is not None
+    _, (dx, dy) = match
+    assert abs(dx - 6) <= 2 and abs(dy + 9) <= 2
+
+
+def test_single_value_change_is_not_a_duplicate():
+    base = render(BASE_LINES)
+    for line_idx, old, new in SINGLE_CHANGES:
+        lines = list(BASE_LINES)
+        assert old in lines[line_idx]
+        lines[line_idx] = lines[line_idx].replace(old, new, 1)
+        assert _match(base, render(lines)) is None, f"{old!r} → {new!r} accepted as duplicate"
+
+
+if __name__ == "__main__":
+    test_identical_and_shifted_pages_match()
+    test_single_value_change_is_not_a_duplicate()
+    print("ok")
@@ -0,0 +1,104 @@
+"""
+Regression test: staged page pipeline (page_pipeline.py)
+========================================================
+
+The consumer of StagedPipeline runs stateful passes (BioBrain semantic
+mapping, report assembly) that assume pages arrive in document order, so
+items must leave in input order even when stages take uneven time, fan
+out, drop items or batch. A stage exception must reach the consumer as a
+RuntimeError naming the stage, not hang the pipeline or vanish.
+
+    python -m pytest test_page_pipeline.py      (or: python test_page_pipeline.py)
+
+Updated: March 2026
+"""
+
+import random
+import time
+
+from page_pipeline import StagedPipeline
+
+
+def _jitter(seed):
+    rng = random.Random(seed)
+
+    def sleep():
+        time.sleep(rng.random() * 0.004)
+    return sleep
+
+
+def test_output_keeps_input_order():
+    slow_a, slow_b = _jitter(1), _jitter(2)
+
+    def split(n):
+        slow_a()
+        if n % 7 == 3:
+            return []                          # dropped page
+        return [(n, 0), (n, 1)] if n % 5 == 0 else [(n, 0)]   # fan-out: page → columns
+
+    def layout(batch):
+        slow_b()
+        return [(n, col, "L") for n, col in batch]
+
+    def ocr(item):
+        slow_a()
+        return [item + ("O",)]
+
+    pipeline = StagedPipeline([("split", split), ("layout", layout, 4), ("ocr", ocr)],
+                              source_name="rasterize", queue_size=2)
+    out = list(pipeline.run(range(60)))
+
+    expected = []
+    for n in range(60):
+        if n % 7 == 3:
+            continue
+        expected += [(n, 0, "L", "O"), (n, 1, "L", "O")] if n % 5 == 0 else [(n, 0, "L", "O")]
+    assert out == expected
+
+    stats = pipeline.stats()
+    assert list(stats) == ["rasterize", "split", "layout", "ocr"]
+    assert stats["rasterize"]["done"] == 60 and stats["layout"]["done"] == len(expected)
+
+
+def test_stage_error_reaches_consumer():
+    def layout(n):
+        if n == 5:
+            raise ValueError("surya crashed on page 5")
+        return [n]
+
+    pipeline = StagedPipeline([("layout", layout), ("ocr", lambda n: [n])], queue_size=1)
+    seen = []
+    try:
+        for item in pipeline.run(range(20)):
+            seen.append(item)
+    except RuntimeError as e:
+        assert "'layout'" in str(e) and "page 5" in str(e)
+        assert isinstance(e.__cause__, ValueError)
+    else:
+        raise AssertionError("stage error was swallowed")
+    assert seen == [0, 1, 2, 3, 4]
+
+
+def test_source_error_reaches_consumer():
+    def pages():
+        yield 0
+        yield 1
+        raise OSError("poppler died")
+
+    pipeline = StagedPipeline([("ocr", lambda n: [n])], source_name="rasterize")
+    seen = []
+    try:
+        for item in pipeline.run(pages()):
+            seen.append(item)
+    except RuntimeError as e:
+        assert "'rasterize'" in str(e) and isinstance(e.__cause__, OSError)
+    else:
+        raise AssertionError("source error was swallowed")
+    assert seen == [0, 1]
+
+
+if __name__ == "__main__":
+    test_output_keeps_input_order()
+    test_stage_error_reaches_consumer()
+    test_source_error_reaches_consumer()
+    print("ok")
@@ -0,0 +1,84 @@
+"""
+Regression test: grid-bucket bbox index (spatial_index.py)
+==========================================================
+
+BBoxIndex replaced all-pairs overlap loops in vision_engine and
+direct_reader, so overlaps() / covered_by() must give exactly the answer
+of a brute-force O(n²) scan over the live boxes — for random boxes of
+every size (text lines, table blocks, boxes spanning many cells, zero
+area), for several cell sizes, and after boxes are removed.
+
+    python -m pytest test_spatial_index.py      (or: python test_spatial_index.py)
+
+Updated: March 2026
+"""
+
+import random
+
+from spatial_index import BBoxIndex, overlap_ratio
+
+PAGE_W, PAGE_H = 2480, 3508   # A4 @ 300 DPI
+THRESHOLDS = (0.0, 0.1, 0.4, 0.5, 0.8)
+
+
+def random_box(rng, integer=True):
+    kind = rng.random()
+    if kind < 0.6:
+        w, h = rng.uniform(40, 900), rng.uniform(20, 60)      # text line
+    elif kind < 0.9:
+        w, h = rng.uniform(200, 2000), rng.uniform(200, 1800)  # table / figure block
+    else:
+        w, h = rng.choice([(0, 0), (0, 30), (30, 0), (1, 1)])  # degenerate
+    x1, y1 = rng.uniform(0, PAGE_W - w), rng.uniform(0, PAGE_H - h)
+    box = [x1, y1, x1 + w, y1 + h]
+    return [int(v) for v in box] if integer else box
+
+
+def brute_overlaps(boxes, bbox, threshold):
+    return any(overlap_ratio(bbox, b) > threshold for b in boxes if b is not None)
+
+
+def brute_covered_by(boxes, bbox, threshold):
+    return [i for i, b in enumerate(boxes) if b is not None and overlap_ratio(b, bbox) > threshold]
+
+
+def _check(index, boxes, queries):
+    for q in queries:
+        for t in THRESHOLDS:
+            assert index.overlaps(q, t) == brute_overlaps(boxes, q, t), (q, t)
+            assert index.covered_by(q, t) == brute_covered_by(boxes, q, t), (q, t)
+    assert len(index) == sum(b is not None for b in boxes)
+
+
+def test_matches_brute_force():
+    rng = random.Random(0)
+    for cell, integer in ((128, True), (32, True), (500, False)):
+        boxes = [random_box(rng, integer) for _ in range(300)]
+        queries = [random_box(rng, integer) for _ in range(150)] + boxes[:30]
+        _check(BBoxIndex(boxes, cell=cell), boxes, queries)
+
+
+def test_matches_brute_force_after_remove():
+    rng = random.Random(1)
+    boxes = [random_box(rng) for _ in range(300)]
+    index = BBoxIndex(boxes)
+    queries = [random_box(rng) for _ in range(150)]
+
+    for i in rng.sample(range(len(boxes)), 120):
+        index.remove(i)
+        boxes[i] = None
+    index.remove(next(i for i, b in enumerate(boxes) if b is None))   # second remove is a no-op
+    _check(index, boxes, queries)
+
+    # Ids keep following insertion order after removals
+    for _ in range(50):
+        bbox = random_box(rng)
+        assert index.insert(bbox) == len(boxes)
+        boxes.append(bbox)
+    _check(index, boxes, queries)
+
+
+if __name__ == "__main__":
+    test_matches_brute_force()
+    test_matches_brute_force_after_remove()
+    print("ok")
@@ -0,0 +1,306 @@
+"""
+TILED OCR — Full-page PaddleOCR on overlapping tiles for very large pages
+==========================================================================
+
+Stage 2B runs PaddleOCR on the whole page. For 300 DPI A3 fold-out
+schematics (~5000 × 3500 px) that is one huge detection tensor, run by a
+single engine on one call — and with det_limit_type=max the page is
+shrunk to the profile's det limit first, so small print on the schematic
+is lost.
+
+Pages above OCR_TILE_TRIGGER_MP megapixels are cut into OCR_TILE_SIZE
+squares overlapping by OCR_TILE_OVERLAP px and read concurrently:
+
+    tiled = TiledOCR(engine_factory)      # engine_factory(workers) → PaddleOCR
+    if tiled.should_tile(page):
+        result = tiled.ocr(page)          # same shape as PaddleOCR.ocr(page, cls=False)
+
+  - OCR_TILE_WORKERS engines (created on the first large page), each with
+    det_limit_side_len = OCR_TILE_SIZE (tiles are detected at full
+    resolution) and cpu_threads split between them. Paddle releases the
+    GIL, so tiles run on separate cores. At most one tile per engine is in
+    flight, so peak memory is bounded by workers × tile size, not by the page.
+  - Lines come back in page coordinates. A line in an overlap band is read
+    by two (or four) tiles: duplicates are dropped when IoU ≥ OCR_TILE_IOU
+    or one box lies ≥ 80% inside the other, keeping the copy that is not
+    cut by a tile edge, then the more confident one.
+  - A line longer than the overlap that crosses a vertical seam is cut in
+    both tiles; the two pieces are stitched — words left of the seam from
+    the left tile, the words after them from the right tile.
+
+The result then goes through the usual line filter and line-merge step.
+
+Configuration (.env):
+  OCR_TILING           = true
+  OCR_TILE_TRIGGER_MP  = 12      # page megapixels (A4 @ 300 DPI ≈ 8.7, A3 ≈ 17.4)
+  OCR_TILE_SIZE        = 1536    # px
+  OCR_TILE_OVERLAP     = 256     # px, > tallest text line and longest word
+  OCR_TILE_WORKERS     = 0       # 0 = min(4, cores / OCR_WORKERS); 1 on GPU
+  OCR_TILE_IOU         = 0.5
+
+Updated: March 2026
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ocr_pool import OCR_WORKERS
+from spatial_index import BBoxIndex, overlap_ratio
+
+logger = logging.getLogger("BioManual.TiledOCR")
+
+OCR_TILING          = os.getenv("OCR_TILING", "true").lower() == "true"
+OCR_TILE_TRIGGER_MP = float(os.getenv("OCR_TILE_TRIGGER_MP", "12"))
+OCR_TILE_SIZE       = max(256, int(os.getenv("OCR_TILE_SIZE", "1536")))
+OCR_TILE_OVERLAP    = max(0, int(os.getenv("OCR_TILE_OVERLAP", "256")))
+OCR_TILE_WORKERS    = int(os.getenv("OCR_TILE_WORKERS", "0"))
+OCR_TILE_IOU        = float(os.getenv("OCR_TILE_IOU", "0.5"))
+
+_CONTAINED = 0.8   # a box this much inside another is the same line read twice
+_EDGE_PX = 4       # a line this close to an inner tile edge was cut by it (x: at least one line height)
+
+
+def tile_signature() -> str:
+    """Tiling settings that change OCR output ('' when tiling is off)."""
+    if not OCR_TILING:
+        return ""
+    return f"tile={OCR_TILE_SIZE}/{OCR_TILE_OVERLAP}/{OCR_TILE_TRIGGER_MP:g}/{OCR_TILE_IOU:g}"
+
+
+def default_tile_workers(use_gpu: bool = False) -> int:
+    if OCR_TILE_WORKERS > 0:
+        return OCR_TILE_WORKERS
+    if use_gpu:
+        return 1
+    return max(1, min(4, (os.cpu_count() or 1) // max(1, OCR_WORKERS)))
+
+
+def tile_engine_kwargs(paddle_kwargs: dict, workers: int) -> dict:
+    """PaddleOCR kwargs for a tile engine: full-resolution detection, threads split between engines."""
+    kwargs = dict(paddle_kwargs, det_limit_side_len=OCR_TILE_SIZE, det_limit_type="max")
+    if not kwargs.get("use_gpu") and kwargs.get("cpu_threads"):
+        kwargs["cpu_threads"] = max(1, kwargs["cpu_threads"] // max(1, workers))
+    return kwargs
+
+
+def _axis(length: int, size: int, overlap: int) -> list:
+    """Tile start offsets along one axis; the last tile ends at the page edge."""
+    if length <= size:
+        return [0]
+    step = max(1, size - overlap)
+    starts = list(range(0, length - size, step))
+    starts.append(length - size)
+    return starts
+
+
+def plan_tiles(h: int, w: int, size: int = OCR_TILE_SIZE, overlap: int = OCR_TILE_OVERLAP) -> list:
+    """[(x1, y1, x2, y2)] tiles covering an h × w page, row by row."""
+    return [(x, y, min(w, x + size), min(h, y + size))
+            for y in _axis(h, size, overlap) for x in _axis(w, size, overlap)]
+
+
+def _bbox(points):
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return [min(xs), min(ys), max(xs), max(ys)]
+
+
+def _iou(a, b) -> float:
+    ix = min(a[2], b[2]) - max(a[0], b[0])
+    iy = min(a[3], b[3]) - max(a[1], b[1])
+    if ix <= 0 or iy <= 0:
+        return 0.0
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _collect(tiles, tile_results, h, w) -> list:
+    """Tile-local PaddleOCR lines → page-coordinate lines with their tile and cut edges."""
+    lines = []
+    for t, ((tx1, ty1, tx2, ty2), result) in enumerate(zip(tiles, tile_results)):
+        if not result or not result[0]:
+            continue
+        for points, (text, conf) in result[0]:
+            pts = [[float(p[0]) + tx1, float(p[1]) + ty1] for p in points]
+            bbox = _bbox(pts)
+            # The edge may fall in the space between two words: allow about one line height
+            gap = max(_EDGE_PX, bbox[3] - bbox[1])
+            cut = {
+                "left":   tx1 > 0 and bbox[0] <= tx1 + gap,
+                "right":  tx2 < w and bbox[2] >= tx2 - gap,
+                "top":    ty1 > 0 and bbox[1] <= ty1 + _EDGE_PX,
+                "bottom": ty2 < h and bbox[3] >= ty2 - _EDGE_PX,
+            }
+            lines.append({"points": pts, "bbox": bbox, "text": text, "conf": float(conf),
+                          "tile": t, "cut": cut})
+    return lines
+
+
+def _same_line(line, other, iou: float) -> bool:
+    """line is a second reading of other (not the missing half of a line other was cut from)."""
+    lb, ob = line["bbox"], other["bbox"]
+    if ((other["cut"]["left"] and lb[0] < ob[0] - _EDGE_PX)
+            or (other["cut"]["right"] and lb[2] > ob[2] + _EDGE_PX)):
+        return False    # line carries text beyond other's cut edge — stitched, not dropped
+    return _iou(lb, ob) >= iou or overlap_ratio(lb, ob) >= _CONTAINED
+
+
+def _dedupe(lines, iou: float):
+    """Greedy NMS across tiles: uncut copies first, then by confidence × length."""
+    order = sorted(lines, key=lambda l: (any(l["cut"].values()), -l["conf"] * len(l["text"])))
+    index = BBoxIndex()
+    kept = []
+    for line in order:
+        duplicate = False
+        for i in index.candidates(line["bbox"]):
+            other = kept[i]
+            if other["tile"] != line["tile"] and _same_line(line, other, iou):
+                duplicate = True
+                break
+        if not duplicate:
+            index.insert(line["bbox"])
+            kept.append(line)
+    return kept, len(lines) - len(kept)
+
+
+def _words_by_x(line):
+    """(word, estimated x start, x end) — characters spread evenly over the line's width."""
+    text = line["text"]
+    x1, x2 = line["bbox"][0], line["bbox"][2]
+    per_char = (x2 - x1) / max(1, len(text))
+    words, pos = [], 0
+    for word in text.split(" "):
+        if word:
+            words.append((word, x1 + pos * per_char, x1 + (pos + len(word)) * per_char))
+        pos += len(word) + 1
+    return words
+
+
+def _join_at_seam(a, b, seam: float) -> str:
+    """Words of `a` centred left of the seam, then the words of `b` after the last of them."""
+    left = [wd for wd in _words_by_x(a) if (wd[1] + wd[2]) / 2 < seam]
+    boundary = left[-1][2] if left else seam
+    right = [wd for wd in _words_by_x(b) if (wd[1] + wd[2]) / 2 > boundary]
+    return " ".join(wd[0] for wd in left + right)
+
+
+def _right_piece(a, rights, tiles, used):
+    """The piece continuing `a` in the right-hand neighbour tile, or None."""
+    ta = tiles[a["edge_tile"]]
+    ab = a["bbox"]
+    for b in rights:
+        if id(b) in used or b is a:
+            continue
+        tb = tiles[b["tile"]]
+        if not (ta[0] < tb[0] < ta[2] and ta[1] == tb[1]):    # same tile row, next tile
+            continue
+        bb = b["bbox"]
+        y_overlap = min(ab[3], bb[3]) - max(ab[1], bb[1])
+        if y_overlap >= 0.5 * min(ab[3] - ab[1], bb[3] - bb[1]) and bb[0] <= ab[2]:
+            return b
+    return None
+
+
+def _stitch(lines, tiles) -> list:
+    """Join the pieces of a line cut by vertical seams (left piece cut right, right piece cut left)."""
+    rights = [l for l in lines if l["cut"]["left"]]
+    used = set()
+    for a in sorted((l for l in lines if l["cut"]["right"]), key=lambda l: l["bbox"][0]):
+        if id(a) in used:
+            continue
+        a["edge_tile"] = a["tile"]
+        while a["cut"]["right"]:
+            b = _right_piece(a, rights, tiles, used)
+            if b is None:
+                break
+            ta, tb = tiles[a["edge_tile"]], tiles[b["tile"]]
+            seam = (tb[0] + ta[2]) / 2
+            ab, bb = a["bbox"], b["bbox"]
+            x1, y1 = min(ab[0], bb[0]), min(ab[1], bb[1])
+            x2, y2 = max(ab[2], bb[2]), max(ab[3], bb[3])
+            a.update(points=[[x1, y1], [x2, y1], [x2, y2], [x1, y2]], bbox=[x1, y1, x2, y2],
+                     text=_join_at_seam(a, b, seam), conf=min(a["conf"], b["conf"]),
+                     cut=dict(a["cut"], right=b["cut"]["right"]), edge_tile=b["tile"])
+            used.add(id(b))
+    return [l for l in lines if id(l) not in used]
+
+
+def merge_tile_results(tiles, tile_results, h: int, w: int, iou: float = OCR_TILE_IOU):
+    """Per-tile PaddleOCR results → one page result in PaddleOCR's format, plus duplicates dropped."""
+    lines = _collect(tiles, tile_results, h, w)
+    lines, dropped = _dedupe(lines, iou)
+    lines = _stitch(lines, tiles)
+    lines.sort(key=lambda l: (l["bbox"][1], l["bbox"][0]))
+    return [[[l["points"], (l["text"], l["conf"])] for l in lines]], dropped
+
+
+class TiledOCR:
+
+    def __init__(self, engine_factory, workers: int = None, use_gpu: bool = False,
+                 size: int = OCR_TILE_SIZE, overlap: int = OCR_TILE_OVERLAP):
+        self.engine_factory = engine_factory   # factory(workers) → PaddleOCR for one tile at a time
+        self.workers = workers or default_tile_workers(use_gpu)
+        self.size = size
+        self.overlap = min(overlap, size // 2)
+        self._engines = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def should_tile(self, image) -> bool:
+        h, w = image.shape[:2]
+        return OCR_TILING and h * w > OCR_TILE_TRIGGER_MP * 1e6 and max(h, w) > self.size
+
+    def _start(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ocr-tile")
+
+    def _ocr_tile(self, tile_img):
+        try:
+            engine = self._engines.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.workers
+                if create:
+                    self._created += 1
+            if create:
+                t0 = time.perf_counter()
+                try:
+                    engine = self.engine_factory(self.workers)
+                except Exception:
+                    with self._lock:
+                        self._created -= 1    # let a later tile retry instead of waiting forever
+                    raise
+                logger.info(f"✓ Tile OCR engine {self._created}/{self.workers} ready ({time.perf_counter() - t0:.1f}s)")
+            else:
+                engine = self._engines.get()
+        try:
+            return engine.ocr(tile_img, cls=False)
+        finally:
+            self._engines.put(engine)
+
+    def ocr(self, image):
+        """PaddleOCR.ocr(image, cls=False)-style result, read tile by tile."""
+        self._start()
+        h, w = image.shape[:2]
+        tiles = plan_tiles(h, w, self.size, self.overlap)
+        t0 = time.perf_counter()
+        # Tiles are views into the page — no copies beyond what each engine allocates
+        futures = [self._executor.submit(self._ocr_tile, image[y1:y2, x1:x2]) for x1, y1, x2, y2 in tiles]
+        tile_results = []
+        for future in futures:
+            try:
+                tile_results.append(future.result())
+            except Exception as e:
+                logger.warning(f"⚠️ Tile OCR failed: {e}")
+                tile_results.append(None)
+        result, dropped = merge_tile_results(tiles, tile_results, h, w)
+        logger.info(f"🧩 Tiled OCR: {w}x{h} px as {len(tiles)} tiles of {self.size} px on {self.workers} engine(s) "
+                    f"in {time.perf_counter() - t0:.1f}s — {len(result[0])} lines, {dropped} overlap duplicates")
+        return result
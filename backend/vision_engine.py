@@ -30,7 +30,10 @@ import numpy as np
 import logging
 import json
 import re
+import time
 import base64
+import threading
+from contextlib import nullcontext
 
 # ── NumPy 2.0 compatibility shim ──
 # PaddleOCR uses np.sctypes which was removed in NumPy 2.0.
@@ -95,12 +98,44 @@ except ImportError:
     TESSERACT_AVAILABLE = False
     logging.warning("⚠️ pytesseract not installed — will use PaddleOCR fallback")
 
+# Persistent Tesseract engines (tesserocr) / threaded pytesseract fallback
+from tesseract_pool import get_tesseract_pool, TESSEROCR_AVAILABLE
+TESSERACT_AVAILABLE = TESSERACT_AVAILABLE or TESSEROCR_AVAILABLE
+
 # Import OpenRouter Smart Client
 from openrouter_client import get_openrouter_client
 
 # Import Language Filter (enforce target language on all output)
 from language_filter import enforce_language, get_language_instruction, clean_text
 
+# Per-page layout / OCR cache (page pixel hash)
+from page_cache import get_page_cache, page_image_hash
+
+# Quality-gated OCR preprocessing (which cleanup steps a page needs)
+from image_quality import (OCR_PREPROCESS, plan_for, describe, record_step, skipped_cost_ms,
+                           watermark_mask, estimate_skew, needs_deskew, deskew_page)
+
+# Blank / figure-only page pre-check (skips Surya + OCR)
+from blank_page import BLANK_PAGE_CHECK, SKIPPED_KINDS, classify_page, is_left_blank_text
+
+# Write-behind preview / crop encoding
+from artifact_writer import get_artifact_writer
+
+# Surya CPU runtime (precision, torch threads, inference mode, input cap)
+from surya_runtime import (SURYA_PRECISION, build_layout_predictor, cap_image as cap_surya_image,
+                           layout_context as surya_layout_context, layout_signature as surya_layout_signature)
+
+# PaddleOCR inference profile (CPU threads, oneDNN, det/rec limits, slim models)
+from paddle_profile import (PADDLE_CALIBRATE, resolve_profile as resolve_paddle_profile,
+                            describe as describe_paddle_profile, profile_signature,
+                            calibrate as calibrate_paddle)
+
+# Overlapping-tile full-page OCR for very large pages (Stage 2B)
+from tiled_ocr import TiledOCR, tile_engine_kwargs, tile_signature
+
+# Grid-bucket index for the bbox overlap filters (Stage 1 bordered boxes, 2B, 2.55)
+from spatial_index import BBoxIndex
+
 # Import Text Corrector (OCR post-processor)
 try:
     from text_corrector import correct_ocr_text
@@ -113,6 +148,14 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Pages / columns per Surya LayoutPredictor call (scan_documents + page pipeline)
+SURYA_BATCH_SIZE = max(1, int(os.getenv("SURYA_BATCH_SIZE", "4")))
+
+# Default scan mode for every caller (page pipeline, OCR pool, vision server).
+# false = thorough: Stage 2.55 Tesseract full-page pass for Indonesian (on the
+# Tesseract pool) and the 1200 px instead of 1000 px OCR upscale threshold.
+from ocr_pool import OCR_FAST_MODE
+
 # Initialize OpenRouter (for chapter classification only)
 openrouter = get_openrouter_client()
 AI_AVAILABLE = openrouter.is_available
@@ -124,43 +167,93 @@ else:
 
 
 class BioVisionHybrid:
-    def __init__(self):
+    def __init__(self, tracker=None):
         """
         Initialize the 3-stage hybrid pipeline:
         1. Surya         → layout detection (replaces PPStructure)
         2. PaddleOCR     → text extraction
         3. AI            → chapter classification (text-only)
+
+        tracker: optional ModelLoader — each model's load state / time is
+        reported to it (shown by GET /ready).
         """
+        track = tracker.track if tracker is not None else (lambda name: nullcontext())
+
+        # Model calls are not thread-safe. Separate locks let the page pipeline
+        # run Surya on page N while PaddleOCR works on page N-1.
+        self._layout_lock = threading.Lock()
+        self._ocr_lock = threading.Lock()
+
+        # Per-page layout/OCR cache (None = disabled)
+        self.page_cache = get_page_cache()
+        self._layout_signature = surya_layout_signature()
+
+        # Previews / crops are encoded on background threads
+        self.artifacts = get_artifact_writer()
+
         # ── Stage 1: Surya Layout Engine ──
         if SURYA_AVAILABLE:
             logger.info("Initializing Surya Layout Predictor...")
-            self._surya_foundation = FoundationPredictor(
-                checkpoint=surya_settings.LAYOUT_MODEL_CHECKPOINT
-            )
-            self.layout_engine = LayoutPredictor(self._surya_foundation)
-            logger.info("✓ Surya Layout Predictor: Ready")
+            with track("surya_layout"):
+                # SURYA_PRECISION (fp32 / bf16 / int8 on CPU) + torch thread pools
+                self._surya_foundation, self.layout_engine = build_layout_predictor()
+            logger.info(f"✓ Surya Layout Predictor: Ready ({SURYA_PRECISION})")
         else:
             logger.warning("⚠️ Surya not available — layout detection will be limited")
             self.layout_engine = None
+            if tracker is not None:
+                tracker.mark("surya_layout", "unavailable")
 
         # ── Stage 2: OCR Engines ──
         # INDONESIAN: Tesseract OCR (lang pack 'ind')
-        if TESSERACT_AVAILABLE:
+        with track("tesseract"):
+            self.tesseract = get_tesseract_pool() if TESSERACT_AVAILABLE else None
+        if self.tesseract is not None:
             logger.info("✓ Tesseract OCR: Ready (Indonesian)")
         else:
             logger.info("⚠️ Tesseract unavailable — PaddleOCR will be used as fallback for Indonesian")
+            if tracker is not None:
+                tracker.mark("tesseract", "unavailable")
 
         # ENGLISH: PaddleOCR (lang 'en')
-        logger.info("Initializing PaddleOCR: Ready (English)...")
-        self.ocr_engine = PaddleOCR(
-            use_angle_cls=False,  # Matikan untuk menghemat waktu (overhead berkurang signifikan)
-            lang='en',
-            use_gpu=True,         # Gunakan GPU jika tersedia, fallback ke CPU secara otomatis
-            show_log=False
+        self.paddle_profile, paddle_kwargs = resolve_paddle_profile()
+        logger.info(f"Initializing PaddleOCR (English), profile {describe_paddle_profile(self.paddle_profile, paddle_kwargs)}...")
+        with track("paddleocr"):
+            self.ocr_engine = PaddleOCR(
+                use_angle_cls=False,  # Matikan untuk menghemat waktu (overhead berkurang signifikan)
+                lang='en',
+                show_log=False,
+                **paddle_kwargs       # PADDLE_PROFILE: device, threads, oneDNN, det/rec limits, models
+            )
+        self._paddle_signature = profile_signature(self.paddle_profile, paddle_kwargs)
+        if tracker is not None:
+            # The API's result-cache key uses the profile resolved here (auto → this device)
+            tracker.mark("paddleocr", "ready", profile=self.paddle_profile, signature=self._paddle_signature)
+
+        # Very large pages (A3 fold-outs): full-page OCR on overlapping tiles, own engines (lazy)
+        self.tiled_ocr = TiledOCR(
+            lambda workers: PaddleOCR(use_angle_cls=False, lang='en', show_log=False,
+                                      **tile_engine_kwargs(paddle_kwargs, workers)),
+            use_gpu=bool(paddle_kwargs.get("use_gpu")),
         )
+        if PADDLE_CALIBRATE:
+            try:
+                calib = calibrate_paddle(self.ocr_engine)
+                logger.info(f"⚡ PaddleOCR profile {self.paddle_profile}: {calib['pages_per_sec']} pages/s "
+                            f"({calib['sec_per_page']}s per A4 page, {calib['lines']} lines)")
+                if tracker is not None:
+                    tracker.mark("paddleocr", "ready", profile=self.paddle_profile, **calib)
+            except Exception as e:
+                logger.warning(f"⚠️ PaddleOCR calibration failed: {e}")
 
         logger.info("✓ Hybrid Vision Pipeline v7 (Surya + Tesseract/PaddleOCR) Ready")
 
+    def _ocr_signature(self, fast_mode=OCR_FAST_MODE):
+        """OCR engine settings that change Stage 2 output — part of the page OCR cache key."""
+        tess = self.tesseract.backend if self.tesseract is not None else 0
+        tiles = f",{tile_signature()}" if tile_signature() else ""
+        return f"paddle:en,cls=0,{self._paddle_signature}{tiles}|tesseract:{tess},pre={OCR_PREPROCESS}|fast:{int(fast_mode)}"
+
     # ═══════════════════════════════════════════════════════════════
     # HELPER: Detect Bordered Boxes (letterheads, company headers)
     # ═══════════════════════════════════════════════════════════════
@@ -368,25 +461,65 @@ class BioVisionHybrid:
         Returns list of {"type": str, "bbox": [x1,y1,x2,y2], "position": int}
         Types: heading, paragraph, table, figure
         """
-        h, w = image_cv.shape[:2]
+        return self._detect_layout_batch([image_cv])[0]
+
+    def _detect_layout_batch(self, images_cv, batch_size=None):
+        """
+        Batched Surya inference: one LayoutPredictor call per `batch_size` images
+        instead of one call per page. Post-processing stays per page
+        (_regions_from_prediction). Returns one region list per input image.
+        """
+        if not images_cv:
+            return []
 
         if not SURYA_AVAILABLE or self.layout_engine is None:
             logger.warning("⚠️ Surya not available — returning full-page as single region")
-            return [{"type": "paragraph", "bbox": [0, 0, w, h], "position": 0}]
+            results = []
+            for image_cv in images_cv:
+                h, w = image_cv.shape[:2]
+                results.append([{"type": "paragraph", "bbox": [0, 0, w, h], "position": 0}])
+            return results
 
-        try:
-            # Convert cv2 (BGR numpy) → PIL Image (RGB) for Surya
-            rgb = cv2.cvtColor(image_cv, cv2.COLOR_BGR2RGB)
-            pil_img = PILImage.fromarray(rgb)
+        batch_size = max(1, batch_size or SURYA_BATCH_SIZE)
+        results = []
+        for start in range(0, len(images_cv), batch_size):
+            chunk = images_cv[start:start + batch_size]
+            try:
+                # SURYA_MAX_SIDE: Surya sees at most that many px; bboxes are scaled back below
+                capped = [cap_surya_image(img) for img in chunk]
+                scales = [scale for _, scale in capped]
+
+                # Convert cv2 (BGR numpy) → PIL Image (RGB) for Surya
+                pil_imgs = [PILImage.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB)) for img, _ in capped]
+
+                # Run Surya layout prediction
+                with self._layout_lock, surya_layout_context():
+                    predictions = self.layout_engine(pil_imgs, batch_size=len(pil_imgs))
+                if len(chunk) > 1:
+                    logger.info(f"📐 Surya batch: {len(chunk)} images in one call")
+            except Exception as e:
+                logger.error(f"Layout detection failed: {e}")
+                results.extend([] for _ in chunk)
+                continue
 
-            # Run Surya layout prediction
-            predictions = self.layout_engine([pil_img])
+            predictions = list(predictions or [])
+            for idx, image_cv in enumerate(chunk):
+                page_pred = predictions[idx] if idx < len(predictions) else None
+                results.append(self._regions_from_prediction(image_cv, page_pred, scales[idx]))
+        return results
 
-            if not predictions or len(predictions) == 0:
+    def _regions_from_prediction(self, image_cv, page_pred, scale=1.0):
+        """
+        Per-page post-processing of one Surya prediction (labels, figure checks, bordered tables).
+        scale: size of the image Surya saw relative to image_cv (SURYA_MAX_SIDE cap).
+        """
+        h, w = image_cv.shape[:2]
+
+        try:
+            if page_pred is None:
                 logger.warning("⚠️ Surya returned no predictions")
                 return []
 
-            page_pred = predictions[0]  # First (only) image
             bboxes = page_pred.bboxes if hasattr(page_pred, 'bboxes') else []
 
             if not bboxes:
@@ -405,7 +538,7 @@ class BioVisionHybrid:
                 if bbox is None:
                     continue
 
-                x1, y1, x2, y2 = [int(v) for v in bbox]
+                x1, y1, x2, y2 = [int(v / scale) for v in bbox]
                 x1, y1 = max(0, x1), max(0, y1)
                 x2, y2 = min(w, x2), min(h, y2)
 
@@ -464,20 +597,11 @@ class BioVisionHybrid:
             if bordered_boxes:
                 final_regions = []
                 covered_indices = set()
+                region_index = BBoxIndex([r['bbox'] for r in regions])
 
                 for bx1, by1, bx2, by2 in bordered_boxes:
-                    inside = []
-                    for idx, region in enumerate(regions):
-                        rx1, ry1, rx2, ry2 = region['bbox']
-                        ox1 = max(bx1, rx1)
-                        oy1 = max(by1, ry1)
-                        ox2 = min(bx2, rx2)
-                        oy2 = min(by2, ry2)
-                        if ox2 > ox1 and oy2 > oy1:
-                            overlap_area = (ox2 - ox1) * (oy2 - oy1)
-                            region_area  = (rx2 - rx1) * (ry2 - ry1) or 1
-                            if overlap_area / region_area > 0.40:
-                                inside.append(idx)
+                    # Surya regions with > 40% of their area inside the bordered box
+                    inside = region_index.covered_by([bx1, by1, bx2, by2], 0.40)
 
                     if inside:
                         is_real_table = self._has_grid_lines(
@@ -514,210 +638,125 @@ class BioVisionHybrid:
             return regions
 
         except Exception as e:
-            logger.error(f"Layout detection failed: {e}")
+            logger.error(f"Layout post-processing failed: {e}")
             return []
 
 
     # ═══════════════════════════════════════════════════════════════
     # PREPROCESSING: Watermark Removal + Denoising (for OCR)
     # ═══════════════════════════════════════════════════════════════
-    def _preprocess_for_ocr(self, crop, region_type: str = 'paragraph'):
+    def _preprocess_for_ocr(self, crop, region_type: str = 'paragraph', plan=None):
         """
         Clean an image crop before OCR:
         1. Remove red/pink watermarks (common in medical device manuals)
-        2. CLAHE contrast enhancement (adaptive — better than flat sharpen)
+        2. Denoise (bilateral) + CLAHE contrast enhancement (adaptive — better than flat sharpen)
         3. Gentle unsharp mask for edge crispness WITHOUT destroying thin strokes
         4. Deskew: straighten slightly-rotated text (common in scanned docs)
+
+        `plan` (image_quality) says which steps run — normally one plan per
+        page from _preprocess_plan(). None → plan for the crop itself in the
+        configured OCR_PREPROCESS mode ('full' = every step, like before).
         """
         if crop is None or crop.size == 0:
             return crop
+        if plan is None:
+            plan = plan_for(crop)
+            if plan is None:        # OCR_PREPROCESS=off
+                return crop
 
         try:
             h, w = crop.shape[:2]
+            mp = h * w / 1e6
+            t_start = time.perf_counter()
+            clean = crop
+
+            def _timed(step, fn):
+                t0 = time.perf_counter()
+                out = fn()
+                record_step(step, (time.perf_counter() - t0) * 1000, mp)
+                return out
 
             # 1. Remove red/pink watermarks using HSV color masking
-            hsv = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
-            mask1 = cv2.inRange(hsv, np.array([0,  30,  30]), np.array([10,  255, 255]))
-            mask2 = cv2.inRange(hsv, np.array([160, 30, 30]), np.array([180, 255, 255]))
-            mask3 = cv2.inRange(hsv, np.array([10,  50, 50]), np.array([25,  255, 255]))
-            watermark_mask = mask1 + mask2 + mask3
-            kernel = np.ones((3, 3), np.uint8)
-            watermark_mask = cv2.dilate(watermark_mask, kernel, iterations=2)
-            clean = crop.copy()
-            clean[watermark_mask > 0] = (255, 255, 255)
+            if plan['watermark']:
+                def _unwatermark():
+                    watermark = watermark_mask(crop)
+                    kernel = np.ones((3, 3), np.uint8)
+                    watermark = cv2.dilate(watermark, kernel, iterations=2)
+                    out = crop.copy()
+                    out[watermark > 0] = (255, 255, 255)
+                    return out
+                clean = _timed('watermark', _unwatermark)
 
             # 2. Denoise (bilateral: preserves edges, removes noise)
-            clean = cv2.bilateralFilter(clean, 7, 50, 50)
+            if plan['denoise']:
+                clean = _timed('denoise', lambda: cv2.bilateralFilter(clean, 7, 50, 50))
 
             # 3. CLAHE contrast enhancement (adaptive histogram eq. per tile)
             #    Works much better than flat sharpen for low-contrast / faded text
-            lab = cv2.cvtColor(clean, cv2.COLOR_BGR2LAB)
-            l, a, b = cv2.split(lab)
-            clahe = cv2.createCLAHE(clipLimit=2.5, tileGridSize=(8, 8))
-            l = clahe.apply(l)
-            lab = cv2.merge([l, a, b])
-            clean = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
+            if plan['clahe']:
+                def _clahe():
+                    lab = cv2.cvtColor(clean, cv2.COLOR_BGR2LAB)
+                    l, a, b = cv2.split(lab)
+                    clahe = cv2.createCLAHE(clipLimit=2.5, tileGridSize=(8, 8))
+                    l = clahe.apply(l)
+                    return cv2.cvtColor(cv2.merge([l, a, b]), cv2.COLOR_LAB2BGR)
+                clean = _timed('clahe', _clahe)
 
             # 4. Gentle unsharp mask (SAFER than hard sharpen kernel)
             #    gaussian_blur subtracted from original = sharpened edges only
-            blur = cv2.GaussianBlur(clean, (0, 0), sigmaX=1.5)
-            clean = cv2.addWeighted(clean, 1.5, blur, -0.5, 0)
+            if plan['sharpen']:
+                def _sharpen():
+                    blur = cv2.GaussianBlur(clean, (0, 0), sigmaX=1.5)
+                    return cv2.addWeighted(clean, 1.5, blur, -0.5, 0)
+                clean = _timed('sharpen', _sharpen)
 
             # 5. Deskew — straighten slight text rotation (scanned docs)
-            #    Only applied if crop is wide enough to measure skew reliably
-            if w > 80 and h > 20:
+            #    Only applied if crop is wide enough to measure skew reliably.
+            #    Page plans carry the page angle; 'full' measures each crop.
+            if plan['deskew'] and w > 80 and h > 20:
                 try:
-                    gray_d = cv2.cvtColor(clean, cv2.COLOR_BGR2GRAY)
-                    _, binary_d = cv2.threshold(
-                        gray_d, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU
-                    )
-                    coords = np.column_stack(np.where(binary_d > 0))
-                    if len(coords) > 50:
-                        angle = cv2.minAreaRect(coords)[-1]
-                        # minAreaRect returns angle in [-90, 0]
-                        if angle < -45:
-                            angle = 90 + angle
-                        # Only correct small angles (< 5°) to avoid false deskew
-                        if abs(angle) < 5.0 and abs(angle) > 0.3:
-                            M = cv2.getRotationMatrix2D(
-                                (w // 2, h // 2), angle, 1.0
-                            )
-                            clean = cv2.warpAffine(
-                                clean, M, (w, h),
-                                flags=cv2.INTER_CUBIC,
-                                borderMode=cv2.BORDER_REPLICATE
-                            )
+                    angle = plan.get('skew_angle')
+                    if angle is None:
+                        angle = estimate_skew(cv2.cvtColor(clean, cv2.COLOR_BGR2GRAY))
+                    if needs_deskew(angle):
+                        M = cv2.getRotationMatrix2D(
+                            (w // 2, h // 2), angle, 1.0
+                        )
+                        clean = _timed('deskew', lambda: cv2.warpAffine(
+                            clean, M, (w, h),
+                            flags=cv2.INTER_CUBIC,
+                            borderMode=cv2.BORDER_REPLICATE
+                        ))
                 except Exception:
                     pass  # Deskew is best-effort
 
+            plan['spent_ms'] += (time.perf_counter() - t_start) * 1000
+            plan['saved_ms'] += skipped_cost_ms(plan, mp)
             return clean
         except Exception as e:
             logger.warning(f"Preprocessing failed, using original: {e}")
             return crop
 
-    # ═══════════════════════════════════════════════════════════════
-    # STAGE 2: Text Extraction
-    #   Indonesian → Tesseract OCR (lang pack 'ind')
-    #   English    → PaddleOCR (lang 'en')
-    # ═══════════════════════════════════════════════════════════════
-    def _extract_text(self, image_cv, bbox, lang='en'):
-        """
-        Extract text from a specific region.
-        OCR engine is selected STRICTLY based on language (NO fallback):
-          'en' → PaddleOCR (English model)
-          'id' → Tesseract OCR (Indonesian lang pack 'ind')
+    def _preprocess_plan(self, image_cv):
+        """One preprocessing plan for a whole page (None = OCR_PREPROCESS=off)."""
+        plan = plan_for(image_cv)
+        if plan is not None:
+            logger.info(f"🧪 OCR preprocess plan — {describe(plan)}"
+                        + (f" [assessed in {plan['assess_ms']:.0f} ms]" if 'assess_ms' in plan else ""))
+        return plan
 
-        Region is padded slightly on all sides before OCR to catch
-        characters at the very edge of the detected bbox.
+    def _preprocess_page(self, image_cv, plan, label):
         """
-        x1, y1, x2, y2 = bbox
-        h_img, w_img = image_cv.shape[:2]
-
-        # ── Pad bbox slightly to avoid clipping edge characters ──────
-        pad_x = max(4, int((x2 - x1) * 0.02))   # 2% of region width
-        pad_y = max(4, int((y2 - y1) * 0.05))   # 5% of region height
-        x1p = max(0, x1 - pad_x)
-        y1p = max(0, y1 - pad_y)
-        x2p = min(w_img, x2 + pad_x)
-        y2p = min(h_img, y2 + pad_y)
-
-        crop = image_cv[y1p:y2p, x1p:x2p]
-
-        if crop.size == 0:
-            return "", 0.0
-
-        # Preprocess: clean watermark + CLAHE + deskew
-        clean_crop = self._preprocess_for_ocr(crop)
-
-        # Determine best Tesseract PSM based on region shape
-        region_h = y2p - y1p
-        region_w = x2p - x1p
-        aspect = region_w / max(region_h, 1)
-        if region_h < 40:               # Single line (very short region)
-            psm = 7
-        elif aspect > 5 and region_h < 80:
-            psm = 7                     # Single short wide line
-        elif aspect > 3:
-            psm = 6                     # Uniform text block (wide paragraph)
-        else:
-            psm = 4                     # Multi-column / mixed layout
-
-        # ════════════════════════════════════════════════════
-        # ENGLISH → PaddleOCR (STRICT)
-        # ════════════════════════════════════════════════════
-        if lang == 'en':
-            try:
-                ocr_result = self.ocr_engine.ocr(clean_crop, cls=False)
-                if ocr_result and ocr_result[0]:
-                    lines, confidences = [], []
-                    for line in ocr_result[0]:
-                        text = clean_text(line[1][0])  # Enforce Latin-only
-                        conf = line[1][1]
-                        if conf > 0.35 and text:   # balanced threshold
-                            lines.append(text)
-                            confidences.append(conf)
-                    if lines:
-                        avg_conf = sum(confidences) / len(confidences)
-                        return " ".join(lines), avg_conf
-            except Exception as e:
-                logger.warning(f"PaddleOCR (en) failed: {e}")
-
-            return "", 0.0
-
-        # ════════════════════════════════════════════════════
-        # INDONESIAN → Tesseract OCR (STRICT, lang pack 'ind')
-        # ════════════════════════════════════════════════════
-        if TESSERACT_AVAILABLE:
-            try:
-                rgb = cv2.cvtColor(clean_crop, cv2.COLOR_BGR2RGB)
-                pil_img = Image.fromarray(rgb)
-
-                config = f'--oem 3 --psm {psm}'
-                data = pytesseract.image_to_data(
-                    pil_img, lang='ind', config=config,
-                    output_type=pytesseract.Output.DICT
-                )
-
-                words = []
-                confidences = []
-                for i, txt in enumerate(data['text']):
-                    txt = txt.strip()
-                    conf = int(data['conf'][i])
-                    # Threshold: 25 (balanced)
-                    if txt and conf > 25:
-                        words.append(txt)
-                        confidences.append(conf / 100.0)
-
-                if words:
-                    avg_conf = sum(confidences) / len(confidences)
-                    return ' '.join(words), avg_conf
-
-                # Tesseract found nothing with PSM N → retry with PSM 11
-                # (sparse text — finds individual words anywhere)
-                if psm != 11:
-                    data2 = pytesseract.image_to_data(
-                        pil_img, lang='ind',
-                        config='--oem 3 --psm 11',
-                        output_type=pytesseract.Output.DICT
-                    )
-                    words2, confs2 = [], []
-                    for i, txt in enumerate(data2['text']):
-                        txt = txt.strip()
-                        conf = int(data2['conf'][i])
-                        if txt and conf > 25:
-                            words2.append(txt)
-                            confs2.append(conf / 100.0)
-                    if words2:
-                        avg_conf = sum(confs2) / len(confs2)
-                        logger.debug(f"PSM 11 rescue (ind): found {len(words2)} words")
-                        return ' '.join(words2), avg_conf
-
-            except Exception as e:
-                logger.warning(f"Tesseract (ind) failed: {e}")
-        else:
-            logger.warning("⚠️ Tesseract not available for Indonesian")
-
-        return "", 0.0
+        Full-page OCR input (2B PaddleOCR, 2.55 Tesseract) cleaned by the page's
+        plan. Deskew stays off here — OCR boxes must keep the page's coordinates.
+        """
+        if plan is None:
+            return image_cv
+        plan = dict(plan, deskew=False, spent_ms=0.0, saved_ms=0.0)
+        clean = self._preprocess_for_ocr(image_cv, plan=plan)
+        logger.info(f"🧪 Preprocess ({label}): {plan['spent_ms']:.0f} ms, "
+                    f"~{plan['saved_ms']:.0f} ms saved by skipped steps")
+        return clean
 
     # ═══════════════════════════════════════════════════════════════
     # STAGE 3: AI Chapter Classification (TEXT-ONLY — no image!)
@@ -798,7 +837,7 @@ Output ONLY the JSON array, nothing else."""
     # ═══════════════════════════════════════════════════════════════
     # MAIN ENTRY POINT: scan_document
     # ═══════════════════════════════════════════════════════════════
-    def scan_document(self, image_path, filename_base, session_id=None, lang='id', direct_translate=False, fast_mode=True):
+    def scan_document(self, image_path, filename_base, session_id=None, lang='id', direct_translate=False, fast_mode=OCR_FAST_MODE):
         """
         Main entry point for the hybrid pipeline.
 
@@ -808,21 +847,100 @@ Output ONLY the JSON array, nothing else."""
           3. AI (optional) → classify text into chapters
           4. Post-process → crop tables/figures from original image
 
+        The work is split into page stages (prepare → layout → text → finalize)
+        so a staged pipeline can run them on different threads for
+        consecutive pages; scan_document simply runs them back to back.
+
         Returns:
           {"elements": [...], "clean_image_path": str}
         """
+        page = self.prepare_page(image_path, filename_base, fast_mode=fast_mode)
+        return self._scan_prepared(page, lang, direct_translate, fast_mode)
+
+    def scan_image(self, image, filename_base, lang='id', direct_translate=False, fast_mode=OCR_FAST_MODE, raster_dpi=None):
+        """
+        scan_document for an image already in memory (BGR ndarray, e.g. a column
+        view of a rasterized page) — no PNG round-trip through disk.
+        """
+        page = self.prepare_image(image, filename_base, fast_mode=fast_mode, raster_dpi=raster_dpi)
+        return self._scan_prepared(page, lang, direct_translate, fast_mode)
+
+    def _scan_prepared(self, page, lang, direct_translate, fast_mode):
+        if page is None:
+            return {"elements": [], "clean_image_path": None}
+        self.detect_page_layout(page)
+        self.extract_page_text(page, lang=lang, direct_translate=direct_translate, fast_mode=fast_mode)
+        return self.finalize_page(page, lang=lang, direct_translate=direct_translate)
+
+    def scan_documents(self, items, lang='id', direct_translate=False, fast_mode=OCR_FAST_MODE, batch_size=None):
+        """
+        Batch version of scan_document.
+
+        items: list of (image_path, filename_base)
+        Layout runs once per SURYA_BATCH_SIZE pages; OCR and post-processing
+        stay per page. Only one batch of page images is held in memory at a time.
+
+        Returns a list of scan_document results, in input order.
+        """
+        batch_size = max(1, batch_size or SURYA_BATCH_SIZE)
+        results = []
+        for start in range(0, len(items), batch_size):
+            pages = [
+                self.prepare_page(image_path, filename_base, fast_mode=fast_mode)
+                for image_path, filename_base in items[start:start + batch_size]
+            ]
+            ready = [p for p in pages if p is not None]
+            if ready:
+                self.detect_page_layouts(ready, batch_size=batch_size)
+
+            for page in pages:
+                if page is None:
+                    results.append({"elements": [], "clean_image_path": None})
+                    continue
+                self.extract_page_text(page, lang=lang, direct_translate=direct_translate, fast_mode=fast_mode)
+                results.append(self.finalize_page(page, lang=lang, direct_translate=direct_translate))
+        return results
+
+    # ═══════════════════════════════════════════════════════════════
+    # PAGE STAGES (used by scan_document and the staged page pipeline)
+    # A "page" is a dict carrying images + intermediate results between stages.
+    # ═══════════════════════════════════════════════════════════════
+    def prepare_page(self, image_path, filename_base, fast_mode=OCR_FAST_MODE):
+        """Load image from disk, then prepare_image. Returns page dict or None."""
         logger.info(f"🔍 Scanning: {os.path.basename(image_path)}")
 
+        # Load image
+        original_img = cv2.imread(image_path)
+        if original_img is None:
+            logger.error(f"Failed to load image: {image_path}")
+            return None
+        return self.prepare_image(original_img, filename_base, fast_mode=fast_mode)
+
+    def prepare_image(self, original_img, filename_base, fast_mode=OCR_FAST_MODE, raster_dpi=None):
+        """
+        Deskew page, decide OCR upscale, save preview (the only file the frontend needs). Returns page dict or None.
+        raster_dpi: DPI adaptive PDF rasterization chose for this page's x-height
+        (PdfPageStream.ocr_sized) — the page is OCR-sized already, no upscale.
+        """
+        if original_img is None or original_img.size == 0:
+            return None
+
         # Setup output directory
         backend_dir = os.path.dirname(os.path.abspath(__file__))
         output_dir = os.path.join(backend_dir, "output_results")
         os.makedirs(output_dir, exist_ok=True)
 
-        # Load image
-        original_img = cv2.imread(image_path)
-        if original_img is None:
-            logger.error(f"Failed to load image: {image_path}")
-            return {"elements": [], "clean_image_path": None}
+        # ── Page deskew: skew diukur SEKALI per halaman, sebelum layout ──
+        # Surya sees straight text lines; region crops then skip their own deskew.
+        original_img, skew_angle = deskew_page(original_img)
+        if needs_deskew(skew_angle):
+            logger.info(f"📐 Page deskew: {skew_angle:+.1f}°")
+
+        # ── Blank pre-check: halaman kosong / hanya gambar tidak perlu Surya + OCR ──
+        blank = classify_page(original_img) if BLANK_PAGE_CHECK else None
+        if blank and blank['kind'] != "content":
+            logger.info(f"⬜ Page pre-check: {blank['kind']} (ink={blank['ink_ratio']:.2%}, "
+                        f"{blank['components']} components, {blank['ms']:.0f} ms)")
 
         h, w = original_img.shape[:2]
 
@@ -835,7 +953,11 @@ Output ONLY the JSON array, nothing else."""
         ocr_scale = 1.0
         upscale_threshold = 1000 if fast_mode else 1200
         
-        if w < upscale_threshold:
+        if blank and blank['kind'] in SKIPPED_KINDS:
+            pass   # never OCR'd — no upscale needed
+        elif raster_dpi:
+            logger.info(f"✓ Rendered at {raster_dpi} DPI for OCR x-height: {w}x{h} — tidak perlu upscale")
+        elif w < upscale_threshold:
             scale_factor = min(2.0, upscale_threshold / w)   # max 2x upscale
             new_w = int(w * scale_factor)
             new_h = int(h * scale_factor)
@@ -850,25 +972,116 @@ Output ONLY the JSON array, nothing else."""
 
         # Save preview (original image for frontend display)
         preview_fname = f"PREVIEW_{filename_base}.jpg"
-        preview_path = os.path.join(output_dir, preview_fname)
-        cv2.imwrite(preview_path, original_img, [cv2.IMWRITE_JPEG_QUALITY, 90])
-
-        # ── STAGE 1: Layout Detection ─────────────────────────────
-        logger.info("📐 Stage 1: Layout detection (Surya)...")
-        regions = self._detect_layout(ocr_img)   # Gunakan ocr_img (sudah upscale jika perlu)
+        # Encoded in the background; the final path (format from .env) is known now
+        preview_path = self.artifacts.write(os.path.join(output_dir, preview_fname), original_img, kind="preview")
 
-        # Scale-down bbox jika gambar di-upscale agar bbox sesuai original_img
-        if ocr_scale != 1.0:
-            for r in regions:
-                r['bbox'] = [int(v / ocr_scale) for v in r['bbox']]
+        return {
+            "filename_base": filename_base,
+            "output_dir": output_dir,
+            "page_hash": self._page_hash(original_img, native=bool(raster_dpi) and w < upscale_threshold),
+            "original_img": original_img,
+            "ocr_img": ocr_img,
+            "ocr_scale": ocr_scale,
+            "skew_angle": skew_angle,
+            "blank": blank,
+            "preview_path": preview_path,
+            "regions": [],
+            "elements": [],
+        }
 
-        # Fallback: if Surya finds nothing, OCR the full page
-        if not regions:
-            logger.warning("⚠️ No layout regions detected — OCR-ing full page")
-            regions = [{"type": "paragraph", "bbox": [0, 0, w, h]}]
+    def _page_hash(self, image, native=False):
+        """Page cache key; pages kept at native size (raster_dpi) must not share the upscaled pages' layout / OCR."""
+        if not self.page_cache:
+            return None
+        return page_image_hash(image) + (":native" if native else "")
+
+    def detect_page_layout(self, page):
+        """STAGE 1 — Surya layout regions (in original_img coordinates) → page['regions']."""
+        return self.detect_page_layouts([page])[0]
+
+    def detect_page_layouts(self, pages, batch_size=None):
+        """STAGE 1 for several pages — one batched Surya call per `batch_size` pages."""
+        # ── Page cache: pages seen before skip Surya entirely ──
+        # Blank / figure-only pages never reach Surya either.
+        todo = []
+        for page in pages:
+            if self._blank_regions(page):
+                continue
+            cached = self.page_cache.get_layout(page['page_hash'], self._layout_signature) if page.get('page_hash') else None
+            if cached is not None:
+                page['regions'] = cached
+                logger.info(f"⚡ Layout cache hit: {page['filename_base']}")
+            else:
+                todo.append(page)
+        if not todo:
+            return [p['regions'] for p in pages]
 
-        # NOTE: Visual-box heuristic is applied inside _detect_layout()
+        # ── STAGE 1: Layout Detection ─────────────────────────────
+        logger.info(f"📐 Stage 1: Layout detection (Surya, {len(todo)} page(s))...")
+        # Gunakan ocr_img (sudah upscale jika perlu)
+        batch_regions = self._detect_layout_batch([p['ocr_img'] for p in todo], batch_size=batch_size)
+
+        for page, regions in zip(todo, batch_regions):
+            ocr_scale = page['ocr_scale']
+            h, w = page['original_img'].shape[:2]
+
+            # Scale-down bbox jika gambar di-upscale agar bbox sesuai original_img
+            if ocr_scale != 1.0:
+                for r in regions:
+                    r['bbox'] = [int(v / ocr_scale) for v in r['bbox']]
+
+            # Fallback: if Surya finds nothing, OCR the full page
+            if not regions:
+                logger.warning("⚠️ No layout regions detected — OCR-ing full page")
+                regions = [{"type": "paragraph", "bbox": [0, 0, w, h]}]
+
+            # NOTE: Visual-box heuristic is applied inside _detect_layout()
+            page['regions'] = regions
+            if page.get('page_hash'):
+                self.page_cache.put_layout(page['page_hash'], regions, self._layout_signature)
+        return [p['regions'] for p in pages]
+
+    def _blank_regions(self, page):
+        """Regions for pages the blank pre-check settled without Surya; False for normal pages."""
+        blank = page.get('blank')
+        if not blank or blank['kind'] not in SKIPPED_KINDS:
+            # sparse pages still get Surya: a heading + line drawing + caption needs its figure region
+            return False
+        if blank['kind'] == "empty":
+            page['regions'] = []
+        else:
+            # figure-only → one figure at the ink
+            page['regions'] = [{"type": "figure", "bbox": blank['ink_bbox']}]
+        return True
+
+    def extract_page_text(self, page, lang='id', direct_translate=False, fast_mode=OCR_FAST_MODE):
+        """STAGE 2 — tables/figures + OCR text (PaddleOCR, Tesseract 2.55) → page['elements']."""
+        blank_kind = (page.get('blank') or {}).get('kind')
+        if blank_kind in SKIPPED_KINDS:
+            # Nothing to read: empty → no elements, figure-only → the figure itself
+            elements = [{"type": r['type'], "text": f"[{r['type'].upper()}]", "bbox": r['bbox'], "confidence": 0.95}
+                        for r in page['regions']]
+            logger.info(f"⬜ Stage 2 skipped ({blank_kind} page): {page['filename_base']}")
+            page['elements'] = elements
+            return elements
+
+        original_img = page['original_img']
+        ocr_img = page['ocr_img']
+        ocr_scale = page['ocr_scale']
+        regions = page['regions']
+        h, w = original_img.shape[:2]
 
+        # ── Page cache: same pixels + lang + engine settings → reuse Stage 2 text ──
+        # (direct-translate output comes from the AI model and is never cached)
+        page_hash = page.get('page_hash')
+        use_cache = bool(page_hash) and not direct_translate
+        ocr_signature = self._ocr_signature(fast_mode)
+        if use_cache:
+            cached = self.page_cache.get_ocr(page_hash, lang, ocr_signature)
+            if cached is not None:
+                logger.info(f"⚡ OCR cache hit: {page['filename_base']} ({len(cached)} elements)")
+                page['elements'] = cached
+                return cached
 
         # ── STAGE 2: Text Extraction ──
         elements = []
@@ -936,6 +1149,20 @@ Output ONLY the JSON array, nothing else."""
             # We collect table/figure bboxes, and run PaddleOCR on the
             # full page to capture ALL text lines, then filter out those inside table/figure areas.
             logger.info(f"📝 Stage 2: Extracting tables/figures from Surya + full-page OCR for text...")
+
+            # Image quality is measured once per page; the plan (OCR_PREPROCESS) says
+            # which cleanup steps the full-page OCR inputs get — none on clean pages.
+            plan = self._preprocess_plan(original_img)
+
+            # Stage 2.55 input does not depend on 2A/2B — start Tesseract now so it
+            # runs on a pool thread while PaddleOCR reads the page.
+            # Gunakan ocr_img (sudah upscale) untuk Tesseract juga; cleanup steps
+            # run on the same pool thread.
+            tess_future = None
+            if lang == 'id' and self.tesseract is not None and not fast_mode:
+                tess_future = self.tesseract.submit(
+                    ocr_img, psm=3, preprocess=lambda img: self._preprocess_page(img, plan, "Tesseract page")
+                )
             
             # ── 2A: Collect table/figure regions from Surya ──
             visual_bboxes = []  # bboxes of table/figure regions (to exclude from text)
@@ -954,12 +1181,19 @@ Output ONLY the JSON array, nothing else."""
                     logger.info(f"📦 Surya {rtype}: bbox={bbox}")
 
             logger.info(f"📐 Found {len(visual_bboxes)} table/figure regions from Surya")
+            visual_index = BBoxIndex(visual_bboxes)
 
             # ── 2B: Full-page OCR for ALL text ──
             # This replaces both the old per-region OCR (Stage 2) and orphan recovery (Stage 2.5)
             text_line_count = 0
             try:
-                full_page_result = self.ocr_engine.ocr(original_img, cls=False)
+                paddle_input = self._preprocess_page(original_img, plan, "PaddleOCR page")
+                if self.tiled_ocr.should_tile(paddle_input):
+                    # Tiles run on the tiled engines — the shared engine stays free
+                    full_page_result = self.tiled_ocr.ocr(paddle_input)
+                else:
+                    with self._ocr_lock:
+                        full_page_result = self.ocr_engine.ocr(paddle_input, cls=False)
 
                 if full_page_result and full_page_result[0]:
                     # Collect all text lines with their positions
@@ -983,21 +1217,7 @@ Output ONLY the JSON array, nothing else."""
                             continue
 
                         # Check if this text line is INSIDE a table/figure region
-                        is_inside_visual = False
-                        for vx1, vy1, vx2, vy2 in visual_bboxes:
-                            # Compute overlap
-                            ox1 = max(lx1, vx1)
-                            oy1 = max(ly1, vy1)
-                            ox2 = min(lx2, vx2)
-                            oy2 = min(ly2, vy2)
-                            if ox2 > ox1 and oy2 > oy1:
-                                overlap_area = (ox2 - ox1) * (oy2 - oy1)
-                                line_area = (lx2 - lx1) * (ly2 - ly1) or 1
-                                if overlap_area / line_area > 0.40:
-                                    is_inside_visual = True
-                                    break
-
-                        if not is_inside_visual:
+                        if not visual_index.overlaps([lx1, ly1, lx2, ly2], 0.40):
                             raw_lines.append({
                                 "text": text,
                                 "bbox": [lx1, ly1, lx2, ly2],
@@ -1097,26 +1317,16 @@ Output ONLY the JSON array, nothing else."""
             # Khusus dokumen ID: jalankan Tesseract pada seluruh halaman untuk menangkap
             # teks yang PaddleOCR miss. Ini sangat efektif tapi lambat.
             # Pada mode fast_mode, kita skip langkah tesseract ini untuk menghemat waktu besar.
-            if lang == 'id' and TESSERACT_AVAILABLE and not fast_mode:
+            if tess_future is not None:
                 try:
                     logger.info("🔎 Stage 2.55: Tesseract full-page Indonesian pass (PSM 3)...")
-                    from PIL import Image as PILImage
-
-                    # Gunakan ocr_img (sudah upscale) untuk Tesseract juga
-                    rgb_full = cv2.cvtColor(ocr_img, cv2.COLOR_BGR2RGB)
-                    pil_full = PILImage.fromarray(rgb_full)
-
-                    data_full = pytesseract.image_to_data(
-                        pil_full, lang='ind',
-                        config='--oem 3 --psm 3',
-                        output_type=pytesseract.Output.DICT
-                    )
+                    data_full = tess_future.result()
 
                     # Collect bboxes dari elemen yang sudah ada (untuk overlap check)
-                    existing_bboxes_t = [
+                    existing_bboxes_t = BBoxIndex([
                         e['bbox'] for e in elements
                         if e.get('type') not in ('table', 'figure')
-                    ]
+                    ])
 
                     tess_orphan_count = 0
                     # Kelompokkan per block_num — setiap block = satu area teks Tesseract
@@ -1158,20 +1368,7 @@ Output ONLY the JSON array, nothing else."""
                         bx1, by1, bx2, by2 = blk['x1'], blk['y1'], blk['x2'], blk['y2']
 
                         # Cek overlap dengan elemen yang sudah ada
-                        is_covered = False
-                        for ex1, ey1, ex2, ey2 in existing_bboxes_t:
-                            ox1 = max(bx1, ex1)
-                            oy1 = max(by1, ey1)
-                            ox2 = min(bx2, ex2)
-                            oy2 = min(by2, ey2)
-                            if ox2 > ox1 and oy2 > oy1:
-                                overlap_area = (ox2 - ox1) * (oy2 - oy1)
-                                blk_area = (bx2 - bx1) * (by2 - by1) or 1
-                                if overlap_area / blk_area > 0.40:
-                                    is_covered = True
-                                    break
-
-                        if not is_covered:
+                        if not existing_bboxes_t.overlaps([bx1, by1, bx2, by2], 0.40):
                             elements.append({
                                 'type': 'paragraph',
                                 'text': text_out,
@@ -1179,7 +1376,7 @@ Output ONLY the JSON array, nothing else."""
                                 'confidence': round(avg_conf, 2),
                                 '_tess_recovery': True
                             })
-                            existing_bboxes_t.append([bx1, by1, bx2, by2])
+                            existing_bboxes_t.insert([bx1, by1, bx2, by2])
                             tess_orphan_count += 1
 
                     if tess_orphan_count > 0:
@@ -1192,6 +1389,28 @@ Output ONLY the JSON array, nothing else."""
                 except Exception as e:
                     logger.warning(f"⚠️ Stage 2.55 Tesseract recovery gagal (non-fatal): {e}")
 
+        # Sparse page whose only text is "intentionally left blank" → empty page
+        if blank_kind == "sparse" and elements and all(
+            e['type'] not in ('table', 'figure') and is_left_blank_text(e['text']) for e in elements
+        ):
+            logger.info(f"⬜ '{elements[0]['text']}' — treating {page['filename_base']} as empty")
+            elements = []
+
+        if use_cache:
+            self.page_cache.put_ocr(page_hash, lang, ocr_signature, elements)
+        page['elements'] = elements
+        return elements
+
+    def finalize_page(self, page, lang='id', direct_translate=False):
+        """STAGE 2.6 correction + STAGE 3 AI classification + STAGE 4 crops → scan result."""
+        original_img = page['original_img']
+        output_dir = page['output_dir']
+        filename_base = page['filename_base']
+        preview_path = page['preview_path']
+        elements = page['elements']
+        h, w = original_img.shape[:2]
+
+        if not direct_translate:
             # ── STAGE 2.6: Text Correction (SymSpell + Context + Entity) ──
             if TEXT_CORRECTOR_AVAILABLE:
                 try:
@@ -1264,9 +1483,11 @@ Output ONLY the JSON array, nothing else."""
                 crop_visual = original_img[py1:py2, px1:px2]
 
                 if crop_visual.size > 0:
-                    crop_fname = f"{filename_base}_crop_{elem['type']}_{idx}.png"
-                    crop_path = os.path.join(output_dir, crop_fname)
-                    cv2.imwrite(crop_path, crop_visual)
+                    crop_path = self.artifacts.write(
+                        os.path.join(output_dir, f"{filename_base}_crop_{elem['type']}_{idx}.png"),
+                        crop_visual, kind="crop"
+                    )
+                    crop_fname = os.path.basename(crop_path)
 
                     from urllib.parse import quote
                     crop_url = f"http://127.0.0.1:8000/output/{quote(crop_fname)}"
@@ -1285,10 +1506,15 @@ Output ONLY the JSON array, nothing else."""
                 "source_image_local": preview_path
             })
 
+        page_kind = (page.get('blank') or {}).get('kind') or "content"
+        if page_kind == "sparse" and not final_elements:
+            page_kind = "empty"
+
         logger.info(f"✅ Hybrid scan complete: {len(final_elements)} elements")
         return {
             "elements": final_elements,
-            "clean_image_path": preview_path
+            "clean_image_path": preview_path,
+            "page_kind": page_kind,
         }
 
     # ═══════════════════════════════════════════════════════════════
@@ -1326,4 +1552,4 @@ Requirements:
 
 # Factory Function
 def create_vision_engine(**kwargs):
-    return BioVisionHybrid()
+    return BioVisionHybrid(tracker=kwargs.get("tracker"))
@@ -0,0 +1,367 @@
+"""
+VISION SERVER — Long-lived BioVisionHybrid daemon with shared-memory IPC
+=========================================================================
+
+Every API restart (code reload, crash, deploy) reloaded Surya + PaddleOCR,
+and every uvicorn worker / OCR pool worker held its own copy of them.
+
+The vision server is a separate local process that owns ONE BioVisionHybrid
+and keeps it warm; API workers only send pages:
+
+    python vision_server.py                # start the daemon (models load in background)
+
+    client = get_vision_client()           # in the API (VISION_SERVER=true)
+    future = client.submit(task, lang="id")           # same interface as OCRProcessPool
+    for task, result in client.scan_many(tasks, lang="id"): ...
+
+Transport:
+  image  → multiprocessing.shared_memory: the client copies the page into a
+           segment and sends only its name / shape / dtype. The server copies
+           it out (the engine's write-behind preview/crop encoding may outlive
+           the request) and the client unlinks the segment after the reply.
+  control → multiprocessing.connection over 127.0.0.1 (authkey handshake):
+           {"op": "scan" | "ping"} requests, scan_document-style result dicts back.
+
+Authkey: requests are pickles, so whoever holds the key can run code in the
+daemon. There is no built-in key: VISION_SERVER_AUTHKEY if set, otherwise
+the daemon generates a random key into VISION_SERVER_KEY_FILE (mode 0600,
+reused across restarts) and the API reads it from there — both must run as
+the same user.
+
+Unavailable daemon: the API's connection is retried by the next job that
+needs it (model_loader retry). A job that finds no daemon, or whose daemon
+has no engine, fails with VisionServerUnavailable instead of returning
+empty pages.
+
+Each client connection is served on its own thread; BioVisionHybrid's
+layout / OCR locks let several pages from several API workers overlap
+(Surya on one page while PaddleOCR reads another). The server waits for a
+page's preview and crops to be on disk before replying — the API serves
+them from output_results/.
+
+Configuration (.env):
+  VISION_SERVER             = false            # true = API scans through the daemon
+  VISION_SERVER_ADDRESS     = 127.0.0.1:8765
+  VISION_SERVER_AUTHKEY     =                  # empty = random key in VISION_SERVER_KEY_FILE
+  VISION_SERVER_KEY_FILE    = vision_server.key   (relative to backend/)
+  VISION_SERVER_CONCURRENCY = 2                # in-flight pages per API process
+  VISION_SERVER_WAIT        = 600              # seconds the API waits for the daemon's models
+
+Updated: March 2026
+"""
+
+import os
+import sys
+import time
+import secrets
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger("BioManual.VisionServer")
+
+VISION_SERVER             = os.getenv("VISION_SERVER", "false").lower() == "true"
+_host, _, _port           = os.getenv("VISION_SERVER_ADDRESS", "127.0.0.1:8765").rpartition(":")
+VISION_SERVER_ADDRESS     = (_host or "127.0.0.1", int(_port))
+VISION_SERVER_AUTHKEY     = os.getenv("VISION_SERVER_AUTHKEY", "").encode("utf-8")
+VISION_SERVER_KEY_FILE    = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                         os.getenv("VISION_SERVER_KEY_FILE", "vision_server.key"))
+VISION_SERVER_CONCURRENCY = max(1, int(os.getenv("VISION_SERVER_CONCURRENCY", "2")))
+VISION_SERVER_WAIT        = float(os.getenv("VISION_SERVER_WAIT", "600"))
+
+_EMPTY_RESULT = {"elements": [], "clean_image_path": None}
+
+# Former built-in default — published in the repository, never accepted as a key
+_PUBLIC_KEY = b"biomanual-vision"
+
+
+class VisionServerUnavailable(ConnectionError):
+    """The daemon cannot be reached, rejects the authkey, or has no vision engine."""
+
+
+def load_authkey(create: bool = False) -> bytes:
+    """
+    VISION_SERVER_AUTHKEY, else the key in VISION_SERVER_KEY_FILE. With
+    create=True (the daemon) a missing file is created with a random key.
+    """
+    if VISION_SERVER_AUTHKEY:
+        if VISION_SERVER_AUTHKEY == _PUBLIC_KEY:
+            raise ValueError("VISION_SERVER_AUTHKEY is the old public default — set a secret or leave it empty")
+        return VISION_SERVER_AUTHKEY
+    try:
+        with open(VISION_SERVER_KEY_FILE, "rb") as f:
+            key = f.read().strip()
+        if key:
+            if create:
+                os.chmod(VISION_SERVER_KEY_FILE, 0o600)
+            return key
+    except FileNotFoundError:
+        if not create:
+            raise FileNotFoundError(f"no vision server key at {VISION_SERVER_KEY_FILE} "
+                                    f"(start vision_server.py or set VISION_SERVER_AUTHKEY)") from None
+    if not create:
+        raise ValueError(f"vision server key file {VISION_SERVER_KEY_FILE} is empty")
+
+    key = secrets.token_hex(32).encode("ascii")
+    fd = os.open(VISION_SERVER_KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    os.chmod(VISION_SERVER_KEY_FILE, 0o600)    # O_CREAT mode does not apply to an existing file
+    logger.info(f"🔑 Vision server key written to {VISION_SERVER_KEY_FILE}")
+    return key
+
+
+def _attach(name: str):
+    """Open an existing segment without letting this process's resource tracker own it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)    # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == "posix":
+            # Otherwise the tracker unlinks the client's segment when the server exits
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+# ═══════════════════════════════════════════════════════════════
+# Server side
+# ═══════════════════════════════════════════════════════════════
+class VisionServer:
+
+    def __init__(self, address=VISION_SERVER_ADDRESS, authkey=None):
+        from model_loader import get_model_loader
+        self.address = address
+        self.authkey = authkey or load_authkey(create=True)
+        self.loader = get_model_loader()
+        self.loader.register("vision_engine", self._load_engine, required=True)
+        self._served = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load_engine(tracker):
+        from vision_engine import create_vision_engine
+        return create_vision_engine(mode=os.getenv("VISION_MODE", "hybrid"), tracker=tracker)
+
+    def serve_forever(self):
+        self.loader.start("background")
+        with Listener(self.address, authkey=self.authkey) as listener:
+            logger.info(f"✓ Vision server listening on {self.address[0]}:{self.address[1]} (pid {os.getpid()})")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:    # failed handshake (wrong authkey) etc.
+                    logger.warning(f"⚠️ Rejected connection: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = self._dispatch(request)
+                except VisionServerUnavailable as e:
+                    reply = {"error": str(e), "unavailable": True}
+                except Exception as e:
+                    logger.error(f"❌ {request.get('op')} failed: {e}")
+                    reply = {"error": str(e)}
+                try:
+                    conn.send(reply)
+                except (EOFError, OSError):
+                    return
+
+    def _dispatch(self, request: dict) -> dict:
+        op = request.get("op")
+        if op == "ping":
+            status = self.loader.status()
+            status.update({"pid": os.getpid(), "served": self._served})
+            return status
+        if op == "scan":
+            return {"result": self._scan(request)}
+        raise ValueError(f"unknown op: {op}")
+
+    def _scan(self, request: dict):
+        engine = self.loader.get("vision_engine")
+        if engine is None:
+            raise VisionServerUnavailable("vision engine failed to load on the server (see its GET /ready models)")
+        kwargs = {"lang": request.get("lang", "id"), "direct_translate": request.get("direct_translate", False)}
+
+        if request.get("shm"):
+            shm = _attach(request["shm"])
+            try:
+                view = np.ndarray(request["shape"], dtype=request["dtype"], buffer=shm.buf)
+                image = view.copy()    # preview / crop encoding may run after the reply
+                del view
+            finally:
+                shm.close()
+            result = engine.scan_image(image, request["filename_base"], raster_dpi=request.get("raster_dpi"), **kwargs)
+        else:
+            result = engine.scan_document(request["image_path"], request["filename_base"], **kwargs)
+
+        # The API process serves these files — they must exist before it gets the URLs
+        if isinstance(result, dict):
+            paths = [result.get("clean_image_path")] + [e.get("crop_local") for e in result.get("elements", [])]
+            engine.artifacts.wait(paths)
+        with self._lock:
+            self._served += 1
+        return result
+
+
+# ═══════════════════════════════════════════════════════════════
+# Client side (API process)
+# ═══════════════════════════════════════════════════════════════
+class VisionClient:
+    """
+    Scans pages on the vision server. Mirrors OCRProcessPool (submit /
+    scan_many / workers), so the page pipeline treats both the same way.
+    """
+
+    def __init__(self, address=VISION_SERVER_ADDRESS, authkey=None,
+                 concurrency: int = VISION_SERVER_CONCURRENCY):
+        self.address = address
+        self.authkey = authkey
+        self.workers = concurrency
+        self.prefetch = concurrency * 2
+        self._local = threading.local()     # one connection per executor thread
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="vision-client")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Key read per connection: a restarted daemon may have written a new key file
+            try:
+                conn = Client(self.address, authkey=self.authkey or load_authkey())
+            except AuthenticationError as e:
+                raise VisionServerUnavailable(f"vision server rejected the authkey: {e}") from e
+            self._local.conn = conn
+        return conn
+
+    def _request(self, request: dict) -> dict:
+        try:
+            conn = self._conn()
+            conn.send(request)
+            reply = conn.recv()
+        except VisionServerUnavailable:
+            raise
+        except (EOFError, OSError):
+            # Server restarted: reconnect once (models there are warm again or loading)
+            self._local.conn = None
+            try:
+                conn = self._conn()
+                conn.send(request)
+                reply = conn.recv()
+            except (EOFError, OSError) as e:
+                self._local.conn = None
+                raise VisionServerUnavailable(
+                    f"vision server at {self.address[0]}:{self.address[1]} unreachable: {e}") from e
+        if "error" in reply:
+            if reply.get("unavailable"):
+                raise VisionServerUnavailable(f"vision server: {reply['error']}")
+            raise RuntimeError(f"vision server: {reply['error']}")
+        return reply
+
+    def ping(self) -> dict:
+        return self._request({"op": "ping"})
+
+    def wait_ready(self, timeout: float = VISION_SERVER_WAIT, tracker=None) -> dict:
+        """Block until the server answers and its models are loaded (mirrored into tracker)."""
+        deadline = time.time() + timeout
+        while True:
+            try:
+                status = self.ping()
+                if status.get("ready"):
+                    if tracker is not None:
+                        for name, entry in status.get("models", {}).items():
+                            extra = {k: v for k, v in entry.items() if k not in ("state", "error")}
+                            tracker.mark(f"server:{name}", entry.get("state"), entry.get("error"), **extra)
+                    return status
+            except (ConnectionRefusedError, OSError, EOFError):
+                pass
+            if time.time() > deadline:
+                raise TimeoutError(f"vision server at {self.address[0]}:{self.address[1]} not ready after {timeout:.0f}s")
+            time.sleep(1.0)
+
+    def _scan(self, task: dict, lang: str, direct_translate: bool):
+        request = {"op": "scan", "filename_base": task["filename_base"],
+                   "lang": lang, "direct_translate": direct_translate}
+        image = task.get("image")
+        if image is None:
+            request["image_path"] = task["image_path"]
+            return self._request(request)["result"]
+
+        shm = shared_memory.SharedMemory(create=True, size=max(1, image.nbytes))
+        try:
+            np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)[...] = image   # column views too
+            request.update({"shm": shm.name, "shape": image.shape, "dtype": image.dtype.str,
+                            "raster_dpi": task.get("raster_dpi")})
+            return self._request(request)["result"]
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def submit(self, task: dict, lang: str = 'id', direct_translate: bool = False):
+        """Schedule one scan; returns a Future resolving to the scan_document result."""
+        return self._executor.submit(self._scan, task, lang, direct_translate)
+
+    def scan_many(self, tasks, lang: str = 'id', direct_translate: bool = False):
+        pending = deque()
+        task_iter = iter(tasks)
+
+        def _fill():
+            while len(pending) < self.prefetch:
+                task = next(task_iter, None)
+                if task is None:
+                    return
+                pending.append((task, self.submit(task, lang, direct_translate)))
+
+        _fill()
+        while pending:
+            task, future = pending.popleft()
+            try:
+                result = future.result()
+            except VisionServerUnavailable:
+                raise
+            except Exception as e:
+                logger.error(f"Vision server failed on {task.get('filename_base')}: {e}")
+                result = dict(_EMPTY_RESULT)
+            _fill()
+            yield task, result
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_vision_client():
+    """Shared client, or None when VISION_SERVER=false."""
+    global _client
+    if not VISION_SERVER:
+        return None
+    with _client_lock:
+        if _client is None:
+            _client = VisionClient()
+            logger.info(f"✓ Vision client → {VISION_SERVER_ADDRESS[0]}:{VISION_SERVER_ADDRESS[1]} "
+                        f"({VISION_SERVER_CONCURRENCY} in flight)")
+    return _client
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - [VisionServer] - %(message)s',
+                        stream=sys.stdout)
+    VisionServer().serve_forever()
@@ -123,8 +123,56 @@ class _ManbookHomeState extends State<ManbookHome> {
     setState(() => _engineStatus = "Engine Offline - Please start backend");
   }
 
-  /// Poll backend /progress/{session_id} setiap 1.5 detik sampai selesai.
+  void _applyProgress(Map<String, dynamic> data) {
+    final pct = (data['percentage'] ?? 0) as int;
+    final msg = (data['message'] ?? '') as String;
+    final cur = (data['current_page'] ?? 0) as int;
+    final tot = (data['total_pages'] ?? 0) as int;
+    if (mounted) {
+      setState(() {
+        _progress = pct / 100.0;
+        _progressMessage = msg;
+        _currentPage = cur;
+        if (tot > 0) _totalPages = tot;
+      });
+    }
+  }
+
+  /// Ikuti /progress/{session_id}/stream (Server-Sent Events).
+  /// Return true jika stream berjalan sampai selesai; false → pakai polling.
+  Future<bool> _streamProgress(String sessionId) async {
+    final client = http.Client();
+    bool finished = false;
+    try {
+      final req = http.Request(
+        'GET',
+        Uri.parse('http://127.0.0.1:8000/progress/$sessionId/stream'),
+      );
+      req.headers['Accept'] = 'text/event-stream';
+      final res = await client.send(req).timeout(const Duration(seconds: 5));
+      if (res.statusCode != 200) return false;
+      final lines = res.stream.transform(utf8.decoder).transform(const LineSplitter());
+      await for (final line in lines) {
+        if (!_isProcessing) break;
+        if (!line.startsWith('data:')) continue;
+        final data = json.decode(line.substring(5).trim()) as Map<String, dynamic>;
+        if (data.containsKey('percentage')) _applyProgress(data);
+        if (data['result_ready'] == true) {
+          finished = true;
+          break;
+        }
+      }
+    } catch (_) {
+      // stream gagal — fallback ke polling
+    } finally {
+      client.close();
+    }
+    return finished || !_isProcessing;
+  }
+
+  /// Progress via SSE stream; fallback: poll /progress/{session_id} setiap 1.5 detik.
   Future<void> _pollProgress(String sessionId) async {
+    if (await _streamProgress(sessionId)) return;
     while (_isProcessing) {
       await Future.delayed(const Duration(milliseconds: 1500));
       if (!_isProcessing) break;
@@ -135,19 +183,7 @@ class _ManbookHomeState extends State<ManbookHome> {
         ).timeout(const Duration(seconds: 3));
         if (res.statusCode == 200) {
           debugPrint('Progress response: ${res.body}');
-          final data = json.decode(res.body);
-          final pct = (data['percentage'] ?? 0) as int;
-          final msg = (data['message'] ?? '') as String;
-          final cur = (data['current_page'] ?? 0) as int;
-          final tot = (data['total_pages'] ?? 0) as int;
-          if (mounted) {
-            setState(() {
-              _progress = pct / 100.0;
-              _progressMessage = msg;
-              _currentPage = cur;
-              if (tot > 0) _totalPages = tot;
-            });
-          }
+          _applyProgress(json.decode(res.body) as Map<String, dynamic>);
         }
       } catch (_) {
         // jika polling gagal, diam saja dan coba lagi
@@ -155,6 +191,24 @@ class _ManbookHomeState extends State<ManbookHome> {
     }
   }
 
+  /// Tunggu job /process selesai, lalu ambil payload akhir dari /result/{session_id}.
+  Future<Map<String, dynamic>> _waitForResult(String sessionId) async {
+    while (true) {
+      await Future.delayed(const Duration(milliseconds: 1500));
+      try {
+        final res = await http.get(
+          Uri.parse('http://127.0.0.1:8000/result/$sessionId'),
+        ).timeout(const Duration(seconds: 10));
+        if (res.statusCode == 200) {
+          final data = json.decode(res.body) as Map<String, dynamic>;
+          if (data['pending'] != true) return data;
+        }
+      } catch (_) {
+        // server sibuk / timeout — coba lagi
+      }
+    }
+  }
+
   Future<void> _pickFile() async {
     try {
       FilePickerResult? result = await FilePicker.platform.pickFiles(
@@ -457,7 +511,11 @@ class _ManbookHomeState extends State<ManbookHome> {
 
       if (res.statusCode == 200) {
         debugPrint('File upload response: ${res.body}');
-        final data = json.decode(res.body);
+        var data = json.decode(res.body);
+        // /process hanya memasukkan job ke antrian — tunggu hasil akhirnya
+        if (data['success'] == true && data['queued'] == true) {
+          data = await _waitForResult(sessionId);
+        }
         if (data['success'] == true) {
           setState(() {
             _sessionId = data['session_id'];